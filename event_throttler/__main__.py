@@ -0,0 +1,14 @@
+"""
+Entry point for python -m event_throttler; see cli.py.
+"""
+import sys
+from pathlib import Path
+
+# Add the package directory to the Python path
+# This lets the modules import each other directly, as they do elsewhere
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
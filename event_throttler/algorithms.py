@@ -0,0 +1,239 @@
+"""
+Rate-limiting Algorithms
+
+This module provides the rate-limiting algorithms an EventThrottler can use
+instead of its default rule of processing the first event per key per window:
+
+- GCRA, a smooth rate limit with a burst allowance,
+- TokenBucket, the same limit expressed as a refilling bucket of tokens,
+- SlidingWindowCounter, at most N events per window, weighting the previous
+  window's count by how much of it still overlaps the sliding window.
+
+Each algorithm keeps a single Python int of state per key, so an
+EventThrottler stores it where it would otherwise store the key's last
+processed timestamp. Rates are kept in integers by scaling time or tokens,
+which keeps every decision exact.
+"""
+from typing import Optional
+
+# Bits per packed field in token bucket and sliding window counter states
+_FIELD_BITS = 32
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+class RateAlgorithm:
+    """
+    Base class of the algorithms accepted by EventThrottler(algorithm=...).
+
+    The window of every call is the key's throttling window in seconds, so
+    window policies and update_window apply to algorithms as well. Throttled
+    events never change a key's state.
+    """
+
+    def start(self, timestamp: int, window: int) -> int:
+        """
+        Returns the state of a new key after its first event, which is always processed.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            window: The key's window in seconds.
+
+        Returns:
+            int: The key's new state.
+        """
+        raise NotImplementedError
+
+    def admit(self, state: int, timestamp: int, window: int) -> Optional[int]:
+        """
+        Decides an event for a key that has state.
+
+        Args:
+            state: The key's current state.
+            timestamp: Time (in seconds) the event arrived.
+            window: The key's window in seconds.
+
+        Returns:
+            Optional[int]: The key's new state if the event should be
+            processed, or None if it should be throttled.
+        """
+        raise NotImplementedError
+
+    def reset_time(self, state: int, window: int) -> int:
+        """
+        Returns the time from which the state decides events as a new key would.
+
+        The result must not decrease if window grows, so the throttler can
+        pass the longest window a key might have.
+
+        Args:
+            state: The key's current state.
+            window: The key's window in seconds.
+
+        Returns:
+            int: Time in seconds after which the key can be forgotten.
+        """
+        raise NotImplementedError
+
+    def check_window(self, window: int) -> None:
+        """
+        Raises ValueError if the algorithm cannot keep state for a window.
+
+        EventThrottler calls it with the longest window any key can have
+        whenever its windows are set, and HierarchicalThrottler with each
+        level's window, before any key is decided with them.
+
+        Args:
+            window: A window in seconds.
+        """
+
+class GCRA(RateAlgorithm):
+    """
+    Generic cell rate algorithm: limit events per window, evenly spaced,
+    with up to burst events at once.
+
+    The state is the key's theoretical arrival time (TAT), in units of
+    1/limit seconds so that the emission interval, window / limit seconds,
+    is exactly window units.
+    """
+
+    def __init__(self, limit: int, burst: Optional[int] = None):
+        """
+        Initialize the algorithm.
+
+        Args:
+            limit: Events allowed per window.
+            burst: Events allowed at once after the key has been idle;
+                defaults to limit.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if burst is None:
+            burst = limit
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.limit = limit
+        self.burst = burst
+
+    def start(self, timestamp: int, window: int) -> int:
+        return timestamp * self.limit + window
+
+    def admit(self, state: int, timestamp: int, window: int) -> Optional[int]:
+        now = timestamp * self.limit
+        # An event may arrive up to burst - 1 emission intervals early
+        if now < state - (self.burst - 1) * window:
+            return None
+        return (state if state > now else now) + window
+
+    def reset_time(self, state: int, window: int) -> int:
+        return -(-state // self.limit)
+
+    def __repr__(self) -> str:
+        return f"GCRA(limit={self.limit}, burst={self.burst})"
+
+class TokenBucket(RateAlgorithm):
+    """
+    Token bucket: a bucket of burst tokens, refilled with limit tokens per
+    window; each processed event takes one token.
+
+    Tokens are counted in units of 1/window, so the bucket refills by
+    exactly limit units per second. The state packs the time of the last
+    processed event above the number of units in the bucket.
+    """
+
+    def __init__(self, limit: int, burst: Optional[int] = None):
+        """
+        Initialize the algorithm.
+
+        Args:
+            limit: Tokens added per window.
+            burst: Bucket capacity in tokens; defaults to limit.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if burst is None:
+            burst = limit
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.limit = limit
+        self.burst = burst
+
+    def check_window(self, window: int) -> None:
+        if self.burst * window > _FIELD_MASK:
+            raise ValueError(f"burst * window must be below 2**{_FIELD_BITS}")
+
+    def start(self, timestamp: int, window: int) -> int:
+        self.check_window(window)
+        return (timestamp << _FIELD_BITS) | (self.burst * window - window)
+
+    def admit(self, state: int, timestamp: int, window: int) -> Optional[int]:
+        last = state >> _FIELD_BITS
+        units = state & _FIELD_MASK
+        if timestamp > last:
+            units += (timestamp - last) * self.limit
+            capacity = self.burst * window
+            if units > capacity:
+                units = capacity
+        else:
+            timestamp = last
+        if units < window:
+            return None
+        return (timestamp << _FIELD_BITS) | (units - window)
+
+    def reset_time(self, state: int, window: int) -> int:
+        missing = self.burst * window - (state & _FIELD_MASK)
+        return (state >> _FIELD_BITS) + max(-(-missing // self.limit), 0)
+
+    def __repr__(self) -> str:
+        return f"TokenBucket(limit={self.limit}, burst={self.burst})"
+
+class SlidingWindowCounter(RateAlgorithm):
+    """
+    At most limit events per sliding window, approximated from fixed windows.
+
+    The count of the previous fixed window is weighted by the fraction of it
+    the sliding window still covers and added to the count of the current
+    one. The state packs the start time of the current window, in seconds,
+    above both counts, so its reset time does not depend on the window it
+    is read with.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Initialize the algorithm.
+
+        Args:
+            limit: Events allowed per window.
+        """
+        if not 1 <= limit <= _FIELD_MASK:
+            raise ValueError(f"limit must be between 1 and 2**{_FIELD_BITS} - 1")
+        self.limit = limit
+
+    def start(self, timestamp: int, window: int) -> int:
+        start = timestamp - timestamp % window if window > 0 else timestamp
+        return (start << 2 * _FIELD_BITS) | 1
+
+    def admit(self, state: int, timestamp: int, window: int) -> Optional[int]:
+        if window <= 0:
+            return self.start(timestamp, window)
+
+        start = state >> 2 * _FIELD_BITS
+        previous = (state >> _FIELD_BITS) & _FIELD_MASK
+        current = state & _FIELD_MASK
+        event_start = timestamp - timestamp % window
+        if event_start > start:
+            previous = current if event_start == start + window else 0
+            current = 0
+            start = event_start
+
+        # Seconds of the previous window still inside the sliding window;
+        # events from before the current window count it in full
+        overlap = window - max(timestamp - start, 0)
+        if previous * overlap + current * window >= self.limit * window:
+            return None
+        return (start << 2 * _FIELD_BITS) | (previous << _FIELD_BITS) | (current + 1)
+
+    def reset_time(self, state: int, window: int) -> int:
+        # Both counts have left the sliding window once the next window has ended
+        return (state >> 2 * _FIELD_BITS) + 2 * max(window, 1)
+
+    def __repr__(self) -> str:
+        return f"SlidingWindowCounter(limit={self.limit})"
@@ -0,0 +1,416 @@
+"""
+Approximate Event Throttler
+
+This module provides an ApproximateEventThrottler for key spaces too large to
+track exactly, such as anonymous or IP keys, in a fixed amount of memory.
+
+State is a count-min-style sketch of timestamps: rows x width int64 cells,
+each holding the latest processed timestamp of any key hashed to it. A key
+maps to one cell per row, and its last processed timestamp is estimated as
+the minimum of its cells. Every cell of a key is at least the key's last
+processed timestamp, so the estimate is never too old and a key is never
+processed twice within a window. The only error is throttling an event of a
+key that has been idle for the window, which happens when every one of its
+cells was updated by other keys within the window.
+
+If n distinct keys were processed during the last window, a key that has
+been idle for the window is falsely throttled with probability about
+
+    (1 - exp(-n / width)) ** rows
+
+which estimate_false_throttle_rate returns and memory_for inverts.
+
+A deduplicator, typically a BloomEventDeduplicator so that memory stays
+fixed, drops repeat deliveries of the same event ID under the same lock.
+"""
+import math
+import threading
+from array import array
+from typing import Hashable, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches fall back to a Python loop
+    np = None
+
+# Import the custom logger, deduplication and configuration
+from logger import get_module_logger
+from dedup import EventDeduplicator
+from config import DEFAULT_WINDOW, APPROX_MEMORY_BYTES, APPROX_ROWS, BATCH_VECTORIZE_THRESHOLD
+
+# Get a logger for this module
+logger = get_module_logger("approx_throttler")
+
+# Value of a cell no key has been processed in; far enough from the int64
+# minimum that subtracting it from a timestamp cannot overflow in NumPy
+_EMPTY = -(2 ** 62)
+_UINT64_MASK = (1 << 64) - 1
+_UINT32_MASK = (1 << 32) - 1
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = (1 << 63) - 1
+# splitmix64 finalizer constants
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+_CELL_SIZE = 8
+
+class ApproximateEventThrottler:
+    """
+    A fixed-memory EventThrottler that never processes a key twice within
+    a window, but may throttle a small, bounded share of events whose key
+    has been idle for the window.
+
+    Memory does not depend on the number of keys, so there is no max_keys,
+    expiry or eviction; stale cells simply stop throttling once they are
+    a window old.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        memory_bytes: int = APPROX_MEMORY_BYTES,
+        rows: int = APPROX_ROWS,
+        dedup: Optional[EventDeduplicator] = None
+    ):
+        """
+        Initialize the ApproximateEventThrottler.
+
+        Args:
+            window: The throttling window in seconds (default from config).
+            memory_bytes: Size of the sketch in bytes (default from config).
+            rows: Cells per key; more rows lower the false-throttle rate
+                while the sketch is lightly loaded (default from config).
+            dedup: Deduplicator that throttles events whose ID was already
+                seen, or None to ignore event IDs.
+        """
+        if rows < 1:
+            raise ValueError("rows must be at least 1")
+        width = memory_bytes // (_CELL_SIZE * rows)
+        if width < 1:
+            raise ValueError("memory_bytes must hold at least one cell per row")
+
+        self._window = window
+        self._rows = rows
+        # Columns per row; below 2**32 so that positions fit the multiply-shift
+        self._width = min(width, _UINT32_MASK)
+        self._watermark: Optional[int] = None
+        self._dedup = dedup
+        self._allocate()
+        self._lock = threading.RLock()
+        logger.info(f"ApproximateEventThrottler initialized with window of {window} seconds, "
+                    f"{rows} rows of {self._width:,} cells")
+
+    def _allocate(self) -> None:
+        """
+        Replaces the sketch with an empty one.
+        """
+        self._cells = array("q", [_EMPTY]) * (self._rows * self._width)
+        # Zero-copy view of the same buffer for batches
+        self._cells_view = np.frombuffer(self._cells, dtype=np.int64) if np is not None else None
+
+    @staticmethod
+    def _hash(key: Hashable) -> int:
+        """
+        Reduces a key to 64 bits, keeping 64-bit integer keys as they are.
+        """
+        if type(key) is int and _INT64_MIN <= key <= _INT64_MAX:
+            return key & _UINT64_MASK
+        return hash(key) & _UINT64_MASK
+
+    def _positions(self, hashed: int) -> List[int]:
+        """
+        Returns the cell of a key hash in each row.
+
+        The hash is mixed with the splitmix64 finalizer, and the row cells
+        are derived from its two halves by double hashing.
+        """
+        mixed = ((hashed ^ (hashed >> 30)) * _MIX_1) & _UINT64_MASK
+        mixed = ((mixed ^ (mixed >> 27)) * _MIX_2) & _UINT64_MASK
+        mixed ^= mixed >> 31
+        low = mixed & _UINT32_MASK
+        step = (mixed >> 32) | 1
+        width = self._width
+        return [
+            row * width + ((((low + row * step) & _UINT32_MASK) * width) >> 32)
+            for row in range(self._rows)
+        ]
+
+    def should_process(self, timestamp: int, event_id: str, key: Hashable) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (only used by a deduplicator).
+            key: Unique identifier for the user/session: a str, an int or a
+                pre-hashed 64-bit integer.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        positions = self._positions(self._hash(key))
+        with self._lock:
+            if self._dedup is not None and self._dedup.is_duplicate(timestamp, event_id):
+                return False
+            return self._process_locked(timestamp, positions)
+
+    def _process_locked(self, timestamp: int, positions: List[int]) -> bool:
+        """
+        Applies the throttling rule to one event. Must be called with the lock held.
+        """
+        cells = self._cells
+        if timestamp - min([cells[position] for position in positions]) < self._window:
+            return False
+        for position in positions:
+            if cells[position] < timestamp:
+                cells[position] = timestamp
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+        return True
+
+    def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[Hashable]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Determines which events of a batch should be processed.
+
+        With NumPy, batches whose timestamps never go backwards are split
+        into runs shorter than the window and each run is decided with
+        vectorized operations, or one event at a time if keys processed in
+        it share a cell. Other batches are decided with a plain loop. Either
+        way, the decisions are those of calling should_process for each
+        event in order.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (only used by a deduplicator).
+            keys: Unique identifier for the user/session of each event.
+
+        Returns:
+            A NumPy boolean mask when NumPy is installed, otherwise a list.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        if self._dedup is not None:
+            return self._decide_batch_dedup(timestamps, event_ids, keys)
+        return self._decide_batch(timestamps, keys)
+
+    def _decide_batch_dedup(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[Hashable]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Throttles the duplicates of a batch and decides the rest with _decide_batch.
+        """
+        with self._lock:
+            is_duplicate = self._dedup.is_duplicate
+            fresh = [
+                index for index, (timestamp, event_id) in enumerate(zip(timestamps, event_ids))
+                if not is_duplicate(timestamp, event_id)
+            ]
+            fresh_mask = self._decide_batch([timestamps[index] for index in fresh],
+                                            [keys[index] for index in fresh])
+        if np is not None:
+            mask = np.zeros(len(keys), dtype=bool)
+            mask[fresh] = fresh_mask
+            return mask
+        mask = [False] * len(keys)
+        for index, processed in zip(fresh, fresh_mask):
+            mask[index] = processed
+        return mask
+
+    def _decide_batch(self, timestamps: Sequence[int], keys: Sequence[Hashable]) -> Union[List[bool], "np.ndarray"]:
+        """
+        Decides a batch without regard to event IDs, as described in should_process_batch.
+        """
+        hashes = [self._hash(key) for key in keys]
+        if np is not None and len(keys) >= BATCH_VECTORIZE_THRESHOLD:
+            times = np.asarray(timestamps, dtype=np.int64)
+            if not np.any(times[1:] < times[:-1]):
+                with self._lock:
+                    return self._process_batch_vectorized(times, np.array(hashes, dtype=np.uint64))
+
+        positions = [self._positions(hashed) for hashed in hashes]
+        with self._lock:
+            decisions = [
+                self._process_locked(timestamp, cells)
+                for timestamp, cells in zip(timestamps, positions)
+            ]
+        if np is not None:
+            return np.array(decisions, dtype=bool)
+        return decisions
+
+    def _positions_vectorized(self, hashes: "np.ndarray") -> "np.ndarray":
+        """
+        Returns a (rows, len(hashes)) array of cells, as _positions does for one hash.
+        """
+        mixed = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(_MIX_1)
+        mixed = (mixed ^ (mixed >> np.uint64(27))) * np.uint64(_MIX_2)
+        mixed ^= mixed >> np.uint64(31)
+        low = mixed & np.uint64(_UINT32_MASK)
+        step = (mixed >> np.uint64(32)) | np.uint64(1)
+        width = np.uint64(self._width)
+        rows = np.arange(self._rows, dtype=np.uint64)[:, None]
+        columns = (((low + rows * step) & np.uint64(_UINT32_MASK)) * width) >> np.uint64(32)
+        return (rows * width + columns).astype(np.intp)
+
+    def _process_batch_vectorized(self, timestamps: "np.ndarray", hashes: "np.ndarray") -> "np.ndarray":
+        """
+        Decides a batch whose timestamps never go backwards. Must be called with the lock held.
+
+        In a run shorter than the window, a key is processed at most once:
+        at its first event at least a window after its estimate from the
+        start of the run. That is exact unless two keys processed in the run
+        share a cell, in which case the run is decided one event at a time.
+        Without a positive window a key may be processed several times in
+        any run, so every event is decided on its own.
+        """
+        positions = self._positions_vectorized(hashes)
+        cells = self._cells_view
+        window = self._window
+        admitted = np.zeros(len(timestamps), dtype=bool)
+        if window <= 0:
+            for index in range(len(timestamps)):
+                admitted[index] = self._process_locked(int(timestamps[index]), positions[:, index].tolist())
+            return admitted
+
+        # Split wherever the run would reach a window past its first event
+        starts = [0]
+        if window > 0 and timestamps[-1] - timestamps[0] >= window:
+            while True:
+                start = int(np.searchsorted(timestamps, timestamps[starts[-1]] + window, side="left"))
+                if start >= len(timestamps):
+                    break
+                starts.append(start)
+        bounds = starts + [len(timestamps)]
+
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            run_positions = positions[:, start:end]
+            run_timestamps = timestamps[start:end]
+            estimates = cells[run_positions].min(axis=0)
+            candidates = np.flatnonzero(run_timestamps - estimates >= window)
+            if not len(candidates):
+                continue
+            _, first = np.unique(hashes[start:end][candidates], return_index=True)
+            chosen = candidates[first]
+            chosen_cells = run_positions[:, chosen].ravel()
+            if len(np.unique(chosen_cells)) < len(chosen_cells):
+                # Keys processed in this run share a cell, so processing one
+                # can throttle another: decide the run one event at a time
+                for index in range(start, end):
+                    admitted[index] = self._process_locked(int(timestamps[index]), positions[:, index].tolist())
+                continue
+            admitted[start + chosen] = True
+            np.maximum.at(cells, run_positions[:, chosen].ravel(), np.tile(run_timestamps[chosen], self._rows))
+
+        if admitted.any():
+            latest = int(timestamps[np.flatnonzero(admitted)[-1]])
+            if self._watermark is None or latest > self._watermark:
+                self._watermark = latest
+        return admitted
+
+    def update_window(self, new_window: int) -> None:
+        """
+        Updates the throttling window size dynamically.
+
+        Args:
+            new_window: The new throttling window size in seconds.
+        """
+        with self._lock:
+            old_window = self._window
+            self._window = new_window
+            logger.info(f"Window updated from {old_window}s to {new_window}s")
+
+    def get_window(self) -> int:
+        """
+        Returns the current throttling window size.
+
+        Returns:
+            int: The current window size in seconds.
+        """
+        with self._lock:
+            return self._window
+
+    def clear(self) -> None:
+        """
+        Clears the sketch, effectively resetting the throttler.
+        """
+        with self._lock:
+            self._allocate()
+            if self._dedup is not None:
+                self._dedup.clear()
+            self._watermark = None
+            logger.info("ApproximateEventThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Estimates the number of keys processed within the last window.
+
+        Counts the first row's cells updated within the window and corrects
+        for collisions (linear counting).
+
+        Returns:
+            int: Estimated number of active keys.
+        """
+        with self._lock:
+            if self._watermark is None:
+                return 0
+            horizon = self._watermark - self._window
+            width = self._width
+            if self._cells_view is not None:
+                active = int(np.count_nonzero(self._cells_view[:width] > horizon))
+            else:
+                active = sum(1 for cell in self._cells[:width] if cell > horizon)
+        if active >= width:
+            # Saturated; the estimate is only a lower bound from here on
+            return round(width * math.log(width))
+        return round(-width * math.log(1 - active / width))
+
+    def estimate_false_throttle_rate(self, active_keys: Optional[int] = None) -> float:
+        """
+        Returns the probability that an event of a key idle for the window is throttled.
+
+        Args:
+            active_keys: Distinct keys processed per window; defaults to
+                get_key_count().
+
+        Returns:
+            float: The estimated false-throttle rate.
+        """
+        if active_keys is None:
+            active_keys = self.get_key_count()
+        return (1 - math.exp(-active_keys / self._width)) ** self._rows
+
+    @staticmethod
+    def memory_for(active_keys: int, false_throttle_rate: float, rows: int = APPROX_ROWS) -> int:
+        """
+        Returns the memory_bytes that keeps the false-throttle rate at or
+        below a target for a number of keys processed per window.
+
+        Args:
+            active_keys: Distinct keys processed per window.
+            false_throttle_rate: Target rate, between 0 and 1.
+            rows: Cells per key (default from config).
+
+        Returns:
+            int: The sketch size in bytes.
+        """
+        if not 0 < false_throttle_rate < 1:
+            raise ValueError("false_throttle_rate must be between 0 and 1")
+        width = math.ceil(-active_keys / math.log(1 - false_throttle_rate ** (1 / rows)))
+        return max(width, 1) * rows * _CELL_SIZE
+
+    def get_memory_usage(self) -> int:
+        """
+        Returns the number of bytes used by the sketch.
+
+        Returns:
+            int: Size of the cell buffer in bytes.
+        """
+        with self._lock:
+            return len(self._cells) * self._cells.itemsize
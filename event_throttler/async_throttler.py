@@ -0,0 +1,219 @@
+"""
+Asyncio Event Throttler
+
+This module provides an AsyncEventThrottler for use from coroutines running
+on a single event loop, and throttle_pipeline, an asyncio pipeline stage that
+reads events from a queue or async iterator, throttles them in batches and
+yields only the events that should be processed.
+"""
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence, Union
+
+# Import the throttler and configuration
+from throttler import EventThrottler
+from policy import WindowPolicy
+from algorithms import RateAlgorithm
+from config import DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, PIPELINE_BATCH_SIZE
+
+class AsyncEventThrottler:
+    """
+    An EventThrottler for coroutines on a single event loop.
+
+    The decision logic is the same as EventThrottler's, but no lock is taken:
+    the throttler must only be used from the loop that owns it, and since a
+    decision never awaits, each one runs atomically with respect to other
+    coroutines on that loop.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL,
+        policy: Optional[WindowPolicy] = None,
+        algorithm: Optional[RateAlgorithm] = None
+    ):
+        """
+        Initialize the AsyncEventThrottler with a specified window size.
+
+        Args:
+            window: The throttling window in seconds (default from config).
+            max_keys: Maximum number of keys to track (default from config).
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the window (default from config).
+            policy: Per-key windows; keys it does not match use window.
+            algorithm: Rate-limiting algorithm applied per key, or None to
+                process the first event per window.
+        """
+        # Never shared with other threads, so its lock is not needed for decisions
+        self._throttler = EventThrottler(window, max_keys=max_keys, cleanup_interval=cleanup_interval,
+                                         policy=policy, algorithm=algorithm)
+
+    async def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        return self._throttler._process_locked(timestamp, event_id, key)
+
+    async def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], Any]:
+        """
+        Determines which events of a batch should be processed.
+
+        See EventThrottler.should_process_batch for the semantics.
+
+        Returns:
+            A boolean mask that is True for each event that should be processed.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+        return self._throttler._process_batch_locked(timestamps, event_ids, keys)
+
+    def update_window(self, new_window: Optional[int] = None, policy: Optional[WindowPolicy] = None) -> None:
+        """
+        Updates the throttling window size and/or window policy dynamically.
+
+        See EventThrottler.update_window for the semantics.
+        """
+        self._throttler.update_window(new_window, policy)
+
+    def get_window(self, key: Optional[str] = None) -> int:
+        """
+        Returns the current throttling window size.
+
+        Args:
+            key: If given, return this key's window under the policy instead.
+
+        Returns:
+            int: The current window size in seconds.
+        """
+        return self._throttler.get_window(key)
+
+    def clear(self) -> None:
+        """
+        Clears all stored timestamps, effectively resetting the throttler.
+        """
+        self._throttler.clear()
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        return self._throttler.get_key_count()
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+
+        Returns:
+            Dict[str, int]: Number of tracked, expired and evicted keys.
+        """
+        return self._throttler.get_eviction_stats()
+
+class _SourceFailed:
+    """
+    Queue marker carrying an exception raised by an async iterator source.
+    """
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+async def _feed(source: AsyncIterable, queue: asyncio.Queue) -> None:
+    """
+    Copies events from an async iterator into a bounded queue.
+
+    The queue is bounded, so the source is only read as fast as the
+    pipeline consumes it. None is enqueued once the source is exhausted.
+    """
+    try:
+        async for event in source:
+            await queue.put(event)
+    except Exception as error:
+        await queue.put(_SourceFailed(error))
+        return
+    await queue.put(None)
+
+async def throttle_pipeline(
+    source: Union[asyncio.Queue, AsyncIterable],
+    throttler: AsyncEventThrottler,
+    batch_size: int = PIPELINE_BATCH_SIZE
+) -> AsyncIterator[Sequence]:
+    """
+    Throttles a stream of events and yields only the ones to process.
+
+    Events are tuples (or other sequences) starting with timestamp, event_id
+    and key; any further fields are passed through untouched. Whatever events
+    are already waiting, up to batch_size, are decided together with one
+    batch call, so latency stays low when the stream is quiet and per-event
+    overhead drops when it is busy.
+
+    Backpressure comes from the pull-based design: no more events are taken
+    from the source until the consumer has received the processed events of
+    the current batch, so a bounded asyncio.Queue source makes producers wait.
+
+    Args:
+        source: An asyncio.Queue (put None to end the stream) or an async
+            iterator of events.
+        throttler: The AsyncEventThrottler that makes the decisions.
+        batch_size: Maximum number of events decided together (default from config).
+
+    Yields:
+        Each event that should be processed, in arrival order.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    feeder = None
+    if isinstance(source, asyncio.Queue):
+        queue = source
+    else:
+        queue = asyncio.Queue(maxsize=batch_size)
+        feeder = asyncio.ensure_future(_feed(source, queue))
+
+    try:
+        finished = False
+        failure = None
+        while not finished:
+            event = await queue.get()
+            batch = []
+            while True:
+                if event is None or isinstance(event, _SourceFailed):
+                    # Decide the events already read before ending the stream
+                    finished = True
+                    failure = event
+                    break
+                batch.append(event)
+                if len(batch) >= batch_size or queue.empty():
+                    break
+                event = queue.get_nowait()
+
+            if batch:
+                mask = await throttler.should_process_batch(
+                    [event[0] for event in batch],
+                    [event[1] for event in batch],
+                    [event[2] for event in batch]
+                )
+                for event, processed in zip(batch, mask):
+                    if processed:
+                        yield event
+
+        if failure is not None:
+            raise failure.error
+    finally:
+        if feeder is not None and not feeder.done():
+            feeder.cancel()
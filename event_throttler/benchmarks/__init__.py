@@ -0,0 +1,7 @@
+"""
+Benchmark suite for the Event Throttler.
+
+Run benchmarks/run_benchmarks.py to measure throughput, latency percentiles
+and memory on pregenerated workloads and to check for regressions against a
+stored baseline.
+"""
@@ -0,0 +1,132 @@
+"""
+Benchmark suite for EventThrottler and its variants.
+
+This script pregenerates each workload (uniform keys, Zipfian hot keys, key
+churn, bursty timestamps and multi-threaded contention), replays it against a
+fresh throttler and reports should_process throughput, p50/p99/p999 latency
+and memory per tracked key as JSON. --algorithm runs the same workloads with
+a rate-limiting algorithm instead of the first-event-per-window rule.
+
+With --baseline, the run is compared with a stored JSON result and the script
+exits with status 1 if any workload's throughput dropped by more than
+--tolerance, so it can gate changes in CI:
+
+    python benchmarks/run_benchmarks.py --output baseline.json
+    python benchmarks/run_benchmarks.py --baseline baseline.json --tolerance 0.1
+"""
+import sys
+import json
+import logging
+import argparse
+import platform
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from sharded_throttler import ShardedEventThrottler
+from compact_throttler import CompactEventThrottler
+from algorithms import GCRA, TokenBucket, SlidingWindowCounter
+from benchmarks.workloads import WORKLOADS
+from benchmarks.runner import run_workload, compare_to_baseline
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+THROTTLERS = {
+    "EventThrottler": EventThrottler,
+    "ShardedEventThrottler": ShardedEventThrottler,
+    "CompactEventThrottler": CompactEventThrottler,
+}
+
+ALGORITHMS = {
+    "first-event": None,
+    "gcra": GCRA,
+    "token-bucket": TokenBucket,
+    "sliding-window": SlidingWindowCounter,
+}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        epilog="Workloads: " + ", ".join(WORKLOADS)
+    )
+    parser.add_argument("--throttler", choices=THROTTLERS, default="EventThrottler")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="first-event")
+    parser.add_argument("--limit", type=int, default=5, help="events per window for --algorithm")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the JSON result to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed fractional throughput drop against the baseline")
+    args = parser.parse_args()
+    if args.algorithm != "first-event" and args.throttler == "CompactEventThrottler":
+        parser.error("CompactEventThrottler only supports the first-event algorithm")
+
+    for module in ("throttler", "sharded_throttler", "compact_throttler"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    throttler_class = THROTTLERS[args.throttler]
+    options = {}
+    if ALGORITHMS[args.algorithm] is not None:
+        options["algorithm"] = ALGORITHMS[args.algorithm](args.limit)
+    results = {}
+    for name in args.workloads:
+        workload = WORKLOADS[name]
+        events = workload.generate(args.events, args.keys, args.seed)
+        results[name] = run_workload(
+            lambda: throttler_class(window=args.window, **options),
+            events,
+            threads=workload.threads,
+            measure_memory=not args.no_memory
+        )
+        latency = results[name]["latency_ns"]
+        logger.info(f"{name:<11} events/sec={results[name]['events_per_sec']:>10,} "
+                    f"p50={latency['p50']:>6,}ns p99={latency['p99']:>6,}ns "
+                    f"p999={latency['p999']:>7,}ns")
+
+    report = {
+        "throttler": args.throttler,
+        "algorithm": args.algorithm,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "events": args.events,
+            "keys": args.keys,
+            "window": args.window,
+            "limit": args.limit,
+            "seed": args.seed,
+        },
+        "workloads": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_to_baseline(results, baseline["workloads"], args.tolerance)
+        for message in regressions:
+            logger.error(f"Throughput regression in {message}")
+        if regressions:
+            sys.exit(1)
+        logger.info(f"No workload is more than {args.tolerance:.0%} below the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Benchmark measurements and baseline comparison.
+
+run_workload replays pregenerated events against fresh throttlers three
+times: once untimed per event for throughput, once timing every call for
+latency percentiles, and once under tracemalloc for memory. Keeping the
+passes separate stops the per-call timer and tracemalloc from distorting the
+throughput figure.
+"""
+import time
+import tracemalloc
+from threading import Barrier, Thread
+from typing import Callable, Dict, List, Sequence
+
+from benchmarks.workloads import Event
+
+def _split(events: Sequence[Event], threads: int) -> List[Sequence[Event]]:
+    """
+    Splits events into one contiguous, time-ordered slice per thread.
+    """
+    size = -(-len(events) // threads)
+    return [events[start:start + size] for start in range(0, len(events), size)]
+
+def _replay(throttler, events: Sequence[Event]) -> int:
+    """
+    Replays events and returns how many were processed.
+    """
+    should_process = throttler.should_process
+    processed = 0
+    for timestamp, event_id, key in events:
+        if should_process(timestamp, event_id, key):
+            processed += 1
+    return processed
+
+def _replay_timed(throttler, events: Sequence[Event], latencies: List[int]) -> None:
+    """
+    Replays events, appending each call's latency in nanoseconds.
+    """
+    should_process = throttler.should_process
+    clock = time.perf_counter_ns
+    append = latencies.append
+    for timestamp, event_id, key in events:
+        start = clock()
+        should_process(timestamp, event_id, key)
+        append(clock() - start)
+
+def _run_threads(target: Callable, slices: List[Sequence[Event]]) -> float:
+    """
+    Runs target(index, slice) on one thread per slice and returns the
+    wall-clock time from a common start barrier until every thread is done.
+    """
+    barrier = Barrier(len(slices) + 1)
+
+    def run(index, events):
+        barrier.wait()
+        target(index, events)
+
+    threads = [Thread(target=run, args=item) for item in enumerate(slices)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start_time
+
+def percentile(sorted_values: Sequence[int], fraction: float) -> int:
+    """
+    Returns the value below which the given fraction of sorted_values lie.
+
+    Args:
+        sorted_values: Values in ascending order.
+        fraction: Percentile as a fraction, e.g. 0.99.
+
+    Returns:
+        int: The nearest-rank percentile.
+    """
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def run_workload(
+    throttler_factory: Callable,
+    events: Sequence[Event],
+    threads: int = 1,
+    measure_memory: bool = True
+) -> Dict:
+    """
+    Measures throughput, latency and memory of one throttler on one workload.
+
+    Args:
+        throttler_factory: Called with no arguments to create a fresh throttler per pass.
+        events: Pregenerated (timestamp, event_id, key) tuples.
+        threads: Number of threads the events are split across.
+        measure_memory: Whether to run the tracemalloc pass.
+
+    Returns:
+        Dict: events, threads, processed, events_per_sec, latency_ns
+        (p50/p99/p999) and, if measured, memory_bytes and memory_bytes_per_key.
+    """
+    slices = _split(events, threads)
+
+    throttler = throttler_factory()
+    processed = [0] * len(slices)
+
+    def replay(index, part):
+        processed[index] = _replay(throttler, part)
+
+    elapsed = _run_threads(replay, slices)
+
+    throttler = throttler_factory()
+    per_thread = [[] for _ in slices]
+    _run_threads(lambda index, part: _replay_timed(throttler, part, per_thread[index]), slices)
+    latencies = sorted(latency for values in per_thread for latency in values)
+
+    result = {
+        "events": len(events),
+        "threads": threads,
+        "processed": sum(processed),
+        "events_per_sec": round(len(events) / elapsed),
+        "latency_ns": {
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "p999": percentile(latencies, 0.999),
+        },
+    }
+
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            throttler = throttler_factory()
+            _replay(throttler, events)
+            memory = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        result["memory_bytes"] = memory
+        result["memory_bytes_per_key"] = round(memory / max(1, throttler.get_key_count()), 1)
+
+    return result
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Finds workloads whose throughput dropped by more than tolerance.
+
+    Args:
+        results: The "workloads" mapping of the current run.
+        baseline: The "workloads" mapping of a stored run.
+        tolerance: Allowed fractional drop, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: One message per regressed workload; empty if none regressed.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]["events_per_sec"]
+        actual = result["events_per_sec"]
+        if actual < expected * (1 - tolerance):
+            regressions.append(
+                f"{name}: {actual:,} events/sec is {1 - actual / expected:.1%} below "
+                f"the baseline of {expected:,} (tolerance {tolerance:.0%})"
+            )
+    return regressions
@@ -0,0 +1,123 @@
+"""
+Pregenerated benchmark workloads.
+
+Every generator returns a list of (timestamp, event_id, key) tuples built up
+front from a seeded random.Random, so generating events is never part of a
+timing and two runs with the same arguments replay exactly the same events.
+"""
+import random
+from itertools import accumulate
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+Event = Tuple[int, str, str]
+
+# Events per simulated second in the steady workloads
+EVENTS_PER_SECOND = 1000
+
+def generate_uniform(num_events: int, num_keys: int, seed: int = 0) -> List[Event]:
+    """
+    Generates events whose keys are drawn uniformly from num_keys keys.
+
+    Args:
+        num_events: Number of events to generate.
+        num_keys: Number of distinct keys to draw from.
+        seed: Random seed for reproducible workloads.
+
+    Returns:
+        List[Event]: Events in timestamp order.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // EVENTS_PER_SECOND, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def generate_zipfian(
+    num_events: int,
+    num_keys: int,
+    seed: int = 0,
+    exponent: float = 1.1
+) -> List[Event]:
+    """
+    Generates events whose keys follow a Zipf distribution, so a few hot
+    keys receive most of the events.
+
+    Args:
+        num_events: Number of events to generate.
+        num_keys: Number of distinct keys to draw from.
+        seed: Random seed for reproducible workloads.
+        exponent: Zipf exponent; larger values concentrate more events on the hottest keys.
+
+    Returns:
+        List[Event]: Events in timestamp order.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, num_keys + 1)))
+    chosen = rng.choices(keys, cum_weights=cumulative, k=num_events)
+    return [(i // EVENTS_PER_SECOND, f"e{i}", key) for i, key in enumerate(chosen)]
+
+def generate_churn(
+    num_events: int,
+    num_keys: int,
+    seed: int = 0,
+    events_per_key: int = 4
+) -> List[Event]:
+    """
+    Generates events for short-lived sessions: each key receives a few events
+    and is never seen again, so keys are constantly created and expired.
+
+    Args:
+        num_events: Number of events to generate.
+        num_keys: Number of sessions active at the same time.
+        seed: Random seed for reproducible workloads.
+        events_per_key: Number of events each session receives.
+
+    Returns:
+        List[Event]: Events in timestamp order.
+    """
+    rng = random.Random(seed)
+    events = []
+    for i in range(num_events):
+        # Pick one of the num_keys sessions currently active around event i
+        session = (i + rng.randrange(num_keys * events_per_key)) // events_per_key
+        events.append((i // EVENTS_PER_SECOND, f"e{i}", f"session{session}"))
+    return events
+
+def generate_bursty(
+    num_events: int,
+    num_keys: int,
+    seed: int = 0,
+    burst_size: int = 5000,
+    gap: int = 30
+) -> List[Event]:
+    """
+    Generates bursts of events that share one timestamp, separated by idle
+    gaps, so most events in a burst are throttled and expiry runs in spurts.
+
+    Args:
+        num_events: Number of events to generate.
+        num_keys: Number of distinct keys to draw from.
+        seed: Random seed for reproducible workloads.
+        burst_size: Number of events in each burst.
+        gap: Seconds between bursts.
+
+    Returns:
+        List[Event]: Events in timestamp order.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [((i // burst_size) * gap, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+class Workload(NamedTuple):
+    """
+    A named event generator and the number of threads that replay it.
+    """
+    generate: Callable[..., List[Event]]
+    threads: int
+
+WORKLOADS: Dict[str, Workload] = {
+    "uniform": Workload(generate_uniform, 1),
+    "zipfian": Workload(generate_zipfian, 1),
+    "churn": Workload(generate_churn, 1),
+    "bursty": Workload(generate_bursty, 1),
+    "contention": Workload(generate_uniform, 4),
+}
@@ -0,0 +1,119 @@
+"""
+Bloom Filter
+
+This module provides BloomFilter, a fixed-size set of keys that answers
+membership with no false negatives and a bounded false-positive rate, and
+cannot remove keys.
+
+Bit positions are derived by double hashing from the key's built-in hash(),
+which Python caches on each str, so a lookup does not re-hash the key.
+Because hash() is randomized per process, a filter is only meaningful in
+the process that built it and is never persisted.
+"""
+import math
+from typing import Iterable
+
+# Import the configuration
+from config import BLOOM_ERROR_RATE
+
+_HASH_MASK = (1 << 64) - 1
+
+class BloomFilter:
+    """
+    A Bloom filter sized for a number of keys and a false-positive rate.
+
+    Adding more keys than the capacity keeps working, but the false-positive
+    rate rises; callers compare len() with capacity and rebuild.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Number of keys the filter is sized for.
+            error_rate: False-positive rate at capacity (default from config).
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hash_count = max(1, round(self._bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self._bit_count + 7) // 8)
+        self._count = 0
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], capacity: int, error_rate: float = BLOOM_ERROR_RATE) -> "BloomFilter":
+        """
+        Creates a filter holding keys.
+
+        Args:
+            keys: Keys to add.
+            capacity: Number of keys the filter is sized for.
+            error_rate: False-positive rate at capacity (default from config).
+
+        Returns:
+            BloomFilter: The filled filter.
+        """
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str) -> range:
+        """
+        Returns the bit positions of a key before reduction modulo the size.
+        """
+        hashed = hash(key) & _HASH_MASK
+        step = (hashed & 0xFFFFFFFF) | 1
+        start = hashed >> 32
+        return range(start, start + step * self._hash_count, step)
+
+    def add(self, key: str) -> None:
+        """
+        Adds a key.
+
+        Args:
+            key: Unique identifier for the user/session.
+        """
+        bits = self._bits
+        size = self._bit_count
+        for position in self._positions(key):
+            position %= size
+            bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Returns False if the key was never added, and True if it probably was.
+        """
+        bits = self._bits
+        size = self._bit_count
+        for position in self._positions(key):
+            position %= size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        """
+        Returns the number of adds, counting a key added twice twice.
+        """
+        return self._count
+
+    def clear(self) -> None:
+        """
+        Removes every key.
+        """
+        self._bits = bytearray(len(self._bits))
+        self._count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size of the bit array in bytes.
+        """
+        return len(self._bits)
@@ -0,0 +1,352 @@
+"""
+Command-line interface for throttling recorded event streams.
+
+Reads events from files or stdin in CSV, JSONL or a packed binary format,
+throttles them with an EventThrottler and writes either the processed events
+or every event with its decision. Input is read in chunks of about
+CLI_CHUNK_BYTES and each chunk is decided with one should_process_batch call,
+so memory use depends on the chunk size and the number of tracked keys, not
+on the size of the input.
+
+Formats:
+
+- csv: one event per line, "timestamp,event_id,key[,...]". A first line whose
+  timestamp field is not an integer is treated as a header and passed through.
+- jsonl: one JSON object per line with "timestamp", "event_id" and "key".
+- binary: the magic bytes b"ETEVENT1", then records of a little-endian int64
+  timestamp, two uint16 lengths and the UTF-8 event ID and key.
+
+Records are always written back exactly as they were read. With --decisions,
+CSV lines get a trailing 1/0 column, JSON objects a "processed" field, and
+binary input produces one byte (1 or 0) per event instead of records.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import struct
+import sys
+import time
+from itertools import compress
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Import the throttler, custom logger and configuration
+from throttler import EventThrottler
+from logger import get_module_logger
+from config import DEFAULT_WINDOW, MAX_KEYS, CLEANUP_INTERVAL, CLI_CHUNK_BYTES
+
+# Get a logger for this module
+logger = get_module_logger("cli")
+
+BINARY_MAGIC = b"ETEVENT1"
+# timestamp, event ID length, key length
+_BINARY_RECORD = struct.Struct("<qHH")
+_LINE_ENDINGS = "\r\n"
+
+class Chunk(NamedTuple):
+    """
+    A run of events read from the input, with the raw records to write back.
+    """
+    records: List[Union[str, bytes]]
+    timestamps: List[int]
+    event_ids: List[str]
+    keys: List[str]
+    header: Optional[str] = None
+
+def _read_lines(stream: io.TextIOBase, chunk_bytes: int) -> List[str]:
+    """
+    Reads whole lines totalling about chunk_bytes characters, making sure the
+    last line of the input also ends with a newline.
+    """
+    lines = stream.readlines(chunk_bytes)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    return lines
+
+def read_csv_chunks(stream: io.TextIOBase, chunk_bytes: int = CLI_CHUNK_BYTES) -> Iterator[Chunk]:
+    """
+    Reads CSV events in chunks of about chunk_bytes.
+
+    Args:
+        stream: Text stream opened with newline="".
+        chunk_bytes: Approximate number of characters read per chunk.
+
+    Yields:
+        Chunk: The next run of events; the first may carry a header line.
+
+    Raises:
+        ValueError: If a record is malformed.
+    """
+    header = None
+    first = True
+    while True:
+        lines = _read_lines(stream, chunk_bytes)
+        if not lines:
+            return
+        lines = [line for line in lines if line.strip()]
+        rows = list(csv.reader(lines))
+        if first and rows:
+            first = False
+            if rows[0] and not rows[0][0].strip().lstrip("-").isdigit():
+                header = lines.pop(0)
+                rows.pop(0)
+        try:
+            timestamps = [int(row[0]) for row in rows]
+            event_ids = [row[1] for row in rows]
+            keys = [row[2] for row in rows]
+        except (IndexError, ValueError):
+            raise ValueError(f"Invalid CSV record in chunk starting with {lines[0]!r}") from None
+        del rows
+        yield Chunk(lines, timestamps, event_ids, keys, header)
+        header = None
+
+def read_jsonl_chunks(stream: io.TextIOBase, chunk_bytes: int = CLI_CHUNK_BYTES) -> Iterator[Chunk]:
+    """
+    Reads JSON Lines events in chunks of about chunk_bytes.
+
+    Args:
+        stream: Text stream.
+        chunk_bytes: Approximate number of characters read per chunk.
+
+    Yields:
+        Chunk: The next run of events.
+
+    Raises:
+        ValueError: If a record is malformed.
+    """
+    loads = json.loads
+    while True:
+        lines = _read_lines(stream, chunk_bytes)
+        if not lines:
+            return
+        lines = [line for line in lines if line.strip()]
+        try:
+            objects = [loads(line) for line in lines]
+            timestamps = [int(event["timestamp"]) for event in objects]
+            event_ids = [event["event_id"] for event in objects]
+            keys = [event["key"] for event in objects]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid JSONL record in chunk starting with {lines[0]!r}") from None
+        del objects
+        yield Chunk(lines, timestamps, event_ids, keys)
+
+def read_binary_chunks(stream: BinaryIO, chunk_bytes: int = CLI_CHUNK_BYTES) -> Iterator[Chunk]:
+    """
+    Reads packed binary events in chunks of about chunk_bytes.
+
+    Args:
+        stream: Binary stream positioned at the magic bytes.
+        chunk_bytes: Number of bytes read per chunk.
+
+    Yields:
+        Chunk: The next run of events.
+
+    Raises:
+        ValueError: If the stream is not in the binary format or is truncated.
+    """
+    if stream.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Input is not in the binary event format")
+
+    unpack_from = _BINARY_RECORD.unpack_from
+    fixed = _BINARY_RECORD.size
+    pending = b""
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            if pending:
+                raise ValueError("Binary input ends with a truncated record")
+            return
+        buffer = pending + data if pending else data
+        records, timestamps, event_ids, keys = [], [], [], []
+        position = 0
+        end = len(buffer)
+        while position + fixed <= end:
+            timestamp, event_id_length, key_length = unpack_from(buffer, position)
+            record_end = position + fixed + event_id_length + key_length
+            if record_end > end:
+                break
+            key_start = position + fixed + event_id_length
+            records.append(buffer[position:record_end])
+            timestamps.append(timestamp)
+            event_ids.append(buffer[position + fixed:key_start].decode("utf-8"))
+            keys.append(buffer[key_start:record_end].decode("utf-8"))
+            position = record_end
+        pending = buffer[position:]
+        if records:
+            yield Chunk(records, timestamps, event_ids, keys)
+
+def pack_binary_event(timestamp: int, event_id: str, key: str) -> bytes:
+    """
+    Encodes one event as a binary format record.
+
+    Args:
+        timestamp: Time (in seconds) the event arrived.
+        event_id: Unique event ID.
+        key: Unique identifier for the user/session.
+
+    Returns:
+        bytes: The record, to be written after BINARY_MAGIC.
+    """
+    encoded_id = event_id.encode("utf-8")
+    encoded_key = key.encode("utf-8")
+    return _BINARY_RECORD.pack(timestamp, len(encoded_id), len(encoded_key)) + encoded_id + encoded_key
+
+def _write_text(output: io.TextIOBase, chunk: Chunk, mask: Sequence[bool], fmt: str, decisions: bool) -> None:
+    """
+    Writes the processed records of a text chunk, or every record with its decision.
+    """
+    if not decisions:
+        output.write("".join(compress(chunk.records, mask)))
+    elif fmt == "csv":
+        output.write("".join(
+            f"{record.rstrip(_LINE_ENDINGS)},{1 if processed else 0}\n"
+            for record, processed in zip(chunk.records, mask)
+        ))
+    else:
+        # Every record is an object with at least the three event fields,
+        # so the decision can be added before its closing brace
+        output.write("".join(
+            f"{record.rstrip()[:-1]}, \"processed\": {'true' if processed else 'false'}}}\n"
+            for record, processed in zip(chunk.records, mask)
+        ))
+
+def throttle_stream(
+    throttler: EventThrottler,
+    chunks: Iterator[Chunk],
+    output: Union[io.TextIOBase, BinaryIO],
+    fmt: str,
+    decisions: bool = False
+) -> Tuple[int, int]:
+    """
+    Throttles chunks of events and writes the results.
+
+    Args:
+        throttler: The throttler that makes the decisions.
+        chunks: Chunks from one of the read_*_chunks readers.
+        output: Text stream for csv and jsonl, binary stream for binary.
+        fmt: "csv", "jsonl" or "binary".
+        decisions: Write every event with its decision instead of only the
+            processed events.
+
+    Returns:
+        Tuple[int, int]: Number of events read and number processed.
+    """
+    events = processed = 0
+    header_written = False
+    for chunk in chunks:
+        if chunk.header is not None and not header_written:
+            header = chunk.header.rstrip("\r\n")
+            output.write(f"{header},processed\n" if decisions else f"{header}\n")
+            header_written = True
+
+        mask = throttler.should_process_batch(chunk.timestamps, chunk.event_ids, chunk.keys)
+        if not isinstance(mask, list):
+            mask = mask.tolist()
+        events += len(mask)
+        processed += sum(mask)
+
+        if fmt != "binary":
+            _write_text(output, chunk, mask, fmt, decisions)
+        elif decisions:
+            output.write(bytes(mask))
+        else:
+            output.write(b"".join(compress(chunk.records, mask)))
+    return events, processed
+
+_READERS = {"csv": read_csv_chunks, "jsonl": read_jsonl_chunks, "binary": read_binary_chunks}
+_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl", ".bin": "binary"}
+
+def _read_inputs(paths: Sequence[str], fmt: str, chunk_bytes: int) -> Iterator[Chunk]:
+    """
+    Reads the chunks of every input in turn; "-" is stdin.
+    """
+    for path in paths:
+        raw_input = sys.stdin.buffer if path == "-" else open(path, "rb")
+        stream = raw_input if fmt == "binary" else io.TextIOWrapper(raw_input, encoding="utf-8", newline="")
+        try:
+            yield from _READERS[fmt](stream, chunk_bytes)
+        finally:
+            if raw_input is sys.stdin.buffer:
+                if stream is not raw_input:
+                    # Do not let the wrapper close stdin when it is collected
+                    stream.detach()
+            else:
+                stream.close()
+
+def _detect_format(paths: Sequence[str]) -> str:
+    """
+    Guesses the input format from the first file's extension; stdin is CSV.
+    """
+    for path in paths:
+        if path != "-":
+            for extension, fmt in _EXTENSIONS.items():
+                if path.endswith(extension):
+                    return fmt
+    return "csv"
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command-line argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m event_throttler",
+        description="Throttle recorded events, keeping the first event per key in each window."
+    )
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="input files; - or nothing reads stdin")
+    parser.add_argument("-f", "--format", choices=_READERS,
+                        help="input and output format (default: from the file extension, else csv)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-w", "--window", type=int, default=DEFAULT_WINDOW,
+                        help="throttling window in seconds")
+    parser.add_argument("--max-keys", type=int, default=MAX_KEYS)
+    parser.add_argument("--cleanup-interval", type=int, default=CLEANUP_INTERVAL)
+    parser.add_argument("--decisions", action="store_true",
+                        help="write every event with its decision instead of only processed events")
+    parser.add_argument("--chunk-bytes", type=int, default=CLI_CHUNK_BYTES,
+                        help="approximate bytes read per chunk")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report events/sec")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Runs the command-line interface.
+
+    Args:
+        argv: Arguments, without the program name (default: sys.argv[1:]).
+
+    Returns:
+        int: Process exit status.
+    """
+    args = build_parser().parse_args(argv)
+    fmt = args.format or _detect_format(args.inputs)
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    if args.quiet:
+        logger.setLevel(logging.WARNING)
+
+    throttler = EventThrottler(args.window, max_keys=args.max_keys, cleanup_interval=args.cleanup_interval)
+    raw_output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    output = raw_output if fmt == "binary" else io.TextIOWrapper(raw_output, encoding="utf-8", newline="")
+    if fmt == "binary" and not args.decisions:
+        output.write(BINARY_MAGIC)
+
+    start_time = time.perf_counter()
+    try:
+        chunks = _read_inputs(args.inputs, fmt, args.chunk_bytes)
+        events, processed = throttle_stream(throttler, chunks, output, fmt, args.decisions)
+    except (OSError, ValueError) as error:
+        logger.error(str(error))
+        return 1
+    finally:
+        output.flush()
+        if raw_output is not sys.stdout.buffer:
+            output.close()
+        elif output is not raw_output:
+            # Do not let the wrapper close stdout when it is collected
+            output.detach()
+
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"{events:,} events, {processed:,} processed, {events - processed:,} throttled "
+                f"in {elapsed:.2f}s ({events / elapsed if elapsed else 0:,.0f} events/sec)")
+    return 0
@@ -0,0 +1,780 @@
+"""
+Cluster Mode
+
+This module spreads throttling over several hosts. ThrottlerServer serves an
+EventThrottler over asyncio TCP, and ClusterClient routes every key to one
+server with a consistent-hash ring, so each key is throttled by exactly one
+EventThrottler cluster-wide.
+
+Requests are length-prefixed binary frames. A decision request carries a
+whole batch of events and its response one byte per event; the client writes
+requests without waiting for earlier responses, which the server returns in
+order, so a connection keeps many batches in flight.
+
+When a node is added or removed, the client asks the nodes that lose keys
+for a copy of their state, imports it into the new owners, and only then
+has the old owners release the keys and routes with the new ring.
+
+Run a server with:
+
+    python cluster.py --port 7070 --window 10
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import struct
+import sys
+from array import array
+from collections import deque
+from contextlib import asynccontextmanager
+from itertools import accumulate
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Import the throttler, key hash, custom logger and configuration
+from throttler import EventThrottler
+from shm_throttler import key_hash
+from logger import get_module_logger
+from config import (
+    DEFAULT_WINDOW,
+    MAX_KEYS,
+    CLEANUP_INTERVAL,
+    CLUSTER_PORT,
+    CLUSTER_VNODES,
+    CLUSTER_ROUTE_CACHE_SIZE,
+    CLUSTER_MAX_FRAME_BYTES
+)
+
+# Get a logger for this module
+logger = get_module_logger("cluster")
+
+# Request opcodes
+OP_DECIDE = 1
+OP_HANDOFF = 2
+OP_IMPORT = 3
+OP_STATS = 4
+OP_RELEASE = 5
+
+# Response statuses
+_STATUS_OK = 0
+_STATUS_ERROR = 1
+
+# Every frame starts with an opcode (or status) and the payload length
+_HEADER = struct.Struct("<BI")
+_COUNT = struct.Struct("<I")
+
+class ClusterError(Exception):
+    """
+    Raised when a server rejects a request.
+    """
+
+def _little_endian(values: array) -> array:
+    """
+    Converts an array between native and little-endian byte order in place.
+    """
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def _encode_strings(strings: Sequence[str]) -> List[bytes]:
+    """
+    Encodes the uint16 UTF-8 length of each string, then the UTF-8 strings.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    return [_little_endian(array("H", map(len, encoded))).tobytes(), *encoded]
+
+def _decode_strings(payload: bytes, start: int, count: int) -> Tuple[List[str], int]:
+    """
+    Decodes count strings written by _encode_strings at start, and returns
+    them with the offset just past them.
+    """
+    blob_start = start + 2 * count
+    if len(payload) < blob_start:
+        raise ValueError("Truncated event payload")
+    lengths = _little_endian(array("H", payload[start:blob_start]))
+    ends = list(accumulate(lengths))
+    blob_end = blob_start + (ends[-1] if ends else 0)
+    if len(payload) < blob_end:
+        raise ValueError("Truncated event payload")
+
+    blob = payload[blob_start:blob_end]
+    text = blob.decode("utf-8")
+    if len(text) == len(blob):
+        # ASCII strings: byte offsets are character offsets
+        return [text[end - length:end] for end, length in zip(ends, lengths)], blob_end
+    return [blob[end - length:end].decode("utf-8") for end, length in zip(ends, lengths)], blob_end
+
+def encode_events(
+    timestamps: Sequence[int],
+    keys: Sequence[str],
+    event_ids: Optional[Sequence[str]] = None
+) -> bytes:
+    """
+    Encodes timestamps (or other int64 states), keys and optionally event
+    IDs for a request.
+
+    The layout is a uint32 count, the int64 timestamps, the uint16 UTF-8
+    length of each key and the concatenated UTF-8 keys, all little-endian.
+    Event IDs follow the keys in the same form as the keys.
+
+    Args:
+        timestamps: One int64 per key.
+        keys: Keys of at most 65535 UTF-8 bytes.
+        event_ids: Optional event IDs of at most 65535 UTF-8 bytes.
+
+    Returns:
+        bytes: The encoded payload.
+    """
+    parts = [_COUNT.pack(len(keys)), _little_endian(array("q", timestamps)).tobytes()]
+    parts.extend(_encode_strings(keys))
+    if event_ids is not None:
+        parts.extend(_encode_strings(event_ids))
+    return b"".join(parts)
+
+def decode_events(payload: bytes, with_event_ids: bool = False) -> Tuple[Any, ...]:
+    """
+    Decodes a payload written by encode_events.
+
+    Args:
+        payload: The encoded payload.
+        with_event_ids: True if the payload was encoded with event IDs.
+
+    Returns:
+        Tuple[array, List[str]]: The int64 timestamps and the keys, followed
+        by the event IDs if with_event_ids is True.
+
+    Raises:
+        ValueError: If the payload is truncated or has trailing bytes.
+    """
+    (count,) = _COUNT.unpack_from(payload)
+    lengths_start = _COUNT.size + 8 * count
+    if len(payload) < lengths_start:
+        raise ValueError("Truncated event payload")
+    timestamps = _little_endian(array("q", payload[_COUNT.size:lengths_start]))
+
+    keys, end = _decode_strings(payload, lengths_start, count)
+    decoded = (timestamps, keys)
+    if with_event_ids:
+        event_ids, end = _decode_strings(payload, end, count)
+        decoded += (event_ids,)
+    if end != len(payload):
+        raise ValueError("Trailing bytes in event payload")
+    return decoded
+
+class HashRing:
+    """
+    A consistent-hash ring of nodes, each placed at vnodes points.
+
+    Keys and points are hashed with the same process-independent hash, so
+    every client and server computes the same owner for a key. Adding or
+    removing a node only moves the keys that the node gains or loses.
+
+    A ring never changes, so owners are cached; the cache is emptied when
+    it reaches cache_size keys.
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable[str] = (),
+        vnodes: int = CLUSTER_VNODES,
+        cache_size: int = CLUSTER_ROUTE_CACHE_SIZE
+    ):
+        """
+        Initialize a ring.
+
+        Args:
+            nodes: Node names, usually "host:port" addresses.
+            vnodes: Points per node (default from config).
+            cache_size: Keys whose owner is cached (default from config).
+        """
+        if vnodes < 1:
+            raise ValueError("vnodes must be at least 1")
+        self.vnodes = vnodes
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (key_hash(f"{node}#{index}"), node)
+            for node in self.nodes
+            for index in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+        self._cache: Dict[str, str] = {}
+        self._cache_size = cache_size
+
+    def node_for(self, key: str) -> str:
+        """
+        Returns the node that owns a key.
+
+        Args:
+            key: Unique identifier for the user/session.
+
+        Returns:
+            str: The owning node.
+        """
+        node = self._cache.get(key)
+        if node is not None:
+            return node
+        if not self._points:
+            raise ValueError("The ring has no nodes")
+        index = bisect.bisect_right(self._points, key_hash(key))
+        node = self._owners[index if index < len(self._owners) else 0]
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[key] = node
+        return node
+
+    def with_node(self, node: str) -> "HashRing":
+        """
+        Returns a copy of the ring with a node added.
+        """
+        return HashRing([*self.nodes, node], self.vnodes, self._cache_size)
+
+    def without_node(self, node: str) -> "HashRing":
+        """
+        Returns a copy of the ring with a node removed.
+        """
+        return HashRing([other for other in self.nodes if other != node], self.vnodes, self._cache_size)
+
+class ThrottlerServer:
+    """
+    Serves an EventThrottler's decisions to ClusterClients over TCP.
+
+    Decisions run on the event loop; key handoffs, which hash every tracked
+    key, run on a worker thread and hash the keys outside the throttler's
+    lock, so decisions are not held up.
+    """
+
+    def __init__(self, throttler: EventThrottler):
+        """
+        Initialize the server.
+
+        Args:
+            throttler: The throttler that owns this node's keys.
+        """
+        self._throttler = throttler
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = CLUSTER_PORT) -> None:
+        """
+        Starts listening.
+
+        Args:
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free port (default from config).
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"ThrottlerServer listening on {host}:{self.port}")
+
+    @property
+    def port(self) -> int:
+        """
+        The port the server listens on.
+        """
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """
+        Serves connections until the server is closed.
+        """
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """
+        Stops listening and waits for the server to close.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        logger.info("ThrottlerServer closed")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the requests of one connection, in order.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                opcode, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                if length > CLUSTER_MAX_FRAME_BYTES:
+                    logger.error(f"Closing connection after a frame of {length} bytes")
+                    break
+                payload = await reader.readexactly(length)
+                try:
+                    if opcode == OP_DECIDE:
+                        body = self._decide(payload)
+                    else:
+                        body = await loop.run_in_executor(None, self._dispatch, opcode, payload)
+                    status = _STATUS_OK
+                except (ValueError, OverflowError, struct.error) as error:
+                    status, body = _STATUS_ERROR, str(error).encode("utf-8")
+                writer.write(_HEADER.pack(status, len(body)))
+                writer.write(body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _decide(self, payload: bytes) -> bytes:
+        """
+        Decides a batch of events and returns one byte per event.
+        """
+        timestamps, keys, event_ids = decode_events(payload, with_event_ids=True)
+        mask = self._throttler.should_process_batch(timestamps, event_ids, keys)
+        return mask.tobytes() if hasattr(mask, "tobytes") else bytes(mask)
+
+    def _dispatch(self, opcode: int, payload: bytes) -> bytes:
+        """
+        Answers a handoff, import or stats request.
+        """
+        if opcode == OP_HANDOFF:
+            # Keys stay here until the client confirms their import with OP_RELEASE
+            ring, node = _parse_handoff(payload)
+            items = self._throttler.export_keys(lambda key: ring.node_for(key) != node, remove=False)
+            return encode_events([state for _, state in items], [key for key, _ in items])
+        if opcode == OP_RELEASE:
+            ring, node = _parse_handoff(payload)
+            items = self._throttler.export_keys(lambda key: ring.node_for(key) != node)
+            return _COUNT.pack(len(items))
+        if opcode == OP_IMPORT:
+            timestamps, keys = decode_events(payload)
+            return _COUNT.pack(self._throttler.import_keys(zip(keys, timestamps)))
+        if opcode == OP_STATS:
+            stats = self._throttler.get_eviction_stats()
+            stats["window"] = self._throttler.get_window()
+            return json.dumps(stats).encode("utf-8")
+        raise ValueError(f"Unknown opcode {opcode}")
+
+def _parse_handoff(payload: bytes) -> Tuple[HashRing, str]:
+    """
+    Decodes the new ring and node name of a handoff or release request.
+
+    Raises:
+        ValueError: If the request is malformed.
+    """
+    try:
+        spec = json.loads(payload)
+        nodes, vnodes, node = spec["nodes"], spec["vnodes"], spec["node"]
+        if not (isinstance(nodes, list) and all(isinstance(other, str) for other in nodes)
+                and isinstance(vnodes, int) and isinstance(node, str)):
+            raise TypeError("Handoff fields have the wrong types")
+        return HashRing(nodes, vnodes), node
+    except (KeyError, TypeError) as error:
+        raise ValueError(f"Malformed handoff request: {error}") from error
+
+class _Connection:
+    """
+    A pipelined client connection.
+
+    Requests are written back to back without waiting, and since the server
+    answers them in order, responses are matched to a FIFO of futures.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._pending: Deque[asyncio.Future] = deque()
+        self._reader_task = asyncio.ensure_future(self._read_responses())
+
+    @classmethod
+    async def open(cls, node: str) -> "_Connection":
+        """
+        Connects to a node given as "host:port".
+        """
+        host, _, port = node.rpartition(":")
+        reader, writer = await asyncio.open_connection(host, int(port))
+        return cls(reader, writer)
+
+    async def request(self, opcode: int, payload: bytes) -> bytes:
+        """
+        Sends a request and waits for its response body.
+
+        Raises:
+            ClusterError: If the server rejected the request.
+            ConnectionError: If the connection was lost.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(_HEADER.pack(opcode, len(payload)))
+        self._writer.write(payload)
+        await self._writer.drain()
+        return await future
+
+    async def _read_responses(self) -> None:
+        """
+        Resolves pending requests as their responses arrive.
+        """
+        error: Exception = ConnectionError("Connection closed")
+        try:
+            while True:
+                status, length = _HEADER.unpack(await self._reader.readexactly(_HEADER.size))
+                body = await self._reader.readexactly(length)
+                future = self._pending.popleft()
+                if future.done():
+                    continue
+                if status == _STATUS_OK:
+                    future.set_result(body)
+                else:
+                    future.set_exception(ClusterError(body.decode("utf-8")))
+        except (asyncio.IncompleteReadError, ConnectionError) as lost:
+            error = ConnectionError(f"Connection lost: {lost}")
+        finally:
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._reader_task.cancel()
+
+class ClusterClient:
+    """
+    Routes decisions to the ThrottlerServer that owns each key.
+
+    Batches are split by owner and sent to all owners at once. Several
+    batches may be in flight on the same connections at the same time;
+    add_node and remove_node wait for them and hold new ones back until
+    the key handoff is complete.
+
+    Only one client should rebalance at a time. Other clients must be
+    given the new node list, and events they send to a key's previous
+    owner during the handoff may be decided without its state.
+    """
+
+    def __init__(self, nodes: Sequence[str], vnodes: int = CLUSTER_VNODES):
+        """
+        Initialize the client.
+
+        Args:
+            nodes: Server addresses as "host:port".
+            vnodes: Points per node on the ring (default from config); must
+                match every other client of the cluster.
+        """
+        if not nodes:
+            raise ValueError("At least one node is required")
+        self._ring = HashRing(nodes, vnodes)
+        self._connections: Dict[str, _Connection] = {}
+        self._condition = asyncio.Condition()
+        self._in_flight = 0
+        self._rebalancing = False
+
+    @property
+    def nodes(self) -> List[str]:
+        """
+        The nodes keys are currently routed to.
+        """
+        return list(self._ring.nodes)
+
+    async def connect(self) -> None:
+        """
+        Opens a connection to every node.
+        """
+        for node in self._ring.nodes:
+            self._connections[node] = await _Connection.open(node)
+        logger.info(f"ClusterClient connected to {len(self._connections)} nodes")
+
+    async def close(self) -> None:
+        """
+        Closes every connection.
+        """
+        for connection in self._connections.values():
+            await connection.close()
+        self._connections.clear()
+
+    async def __aenter__(self) -> "ClusterClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID, used by a server with a deduplicator.
+            key: Unique identifier for the user/session.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        return (await self.should_process_batch([timestamp], [event_id], [key]))[0]
+
+    async def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> List[bool]:
+        """
+        Determines which events of a batch should be processed.
+
+        The events of each node are sent as one request, and all requests
+        are sent before any response is awaited.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs, used by servers with a deduplicator.
+            keys: Unique identifier for the user/session of each event.
+
+        Returns:
+            List[bool]: True for each event that should be processed.
+
+        Raises:
+            ClusterError: If a server rejected the batch.
+            ConnectionError: If a server could not be reached.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        async with self._shared():
+            ring = self._ring
+            if len(ring.nodes) == 1:
+                response = await self._connections[ring.nodes[0]].request(
+                    OP_DECIDE, encode_events(timestamps, keys, event_ids)
+                )
+                return [byte == 1 for byte in response]
+
+            node_for = ring.node_for
+            groups: Dict[str, List[int]] = {}
+            for index, key in enumerate(keys):
+                groups.setdefault(node_for(key), []).append(index)
+            responses = await asyncio.gather(*(
+                self._connections[node].request(
+                    OP_DECIDE,
+                    encode_events(
+                        [timestamps[i] for i in indices],
+                        [keys[i] for i in indices],
+                        [event_ids[i] for i in indices]
+                    )
+                )
+                for node, indices in groups.items()
+            ))
+
+        mask = [False] * len(keys)
+        for indices, response in zip(groups.values(), responses):
+            for index, byte in zip(indices, response):
+                mask[index] = byte == 1
+        return mask
+
+    async def add_node(self, node: str) -> int:
+        """
+        Adds a node and hands it the state of the keys it now owns.
+
+        Args:
+            node: Server address as "host:port".
+
+        Returns:
+            int: Number of keys handed off.
+        """
+        if node in self._ring.nodes:
+            raise ValueError(f"{node} is already in the cluster")
+        connection = await _Connection.open(node)
+        async with self._exclusive():
+            self._connections[node] = connection
+            ring = self._ring.with_node(node)
+            try:
+                moved = await self._handoff(ring, self._ring.nodes)
+            except Exception:
+                del self._connections[node]
+                await connection.close()
+                raise
+            self._ring = ring
+        logger.info(f"Added {node}; {moved} keys handed off")
+        return moved
+
+    async def remove_node(self, node: str) -> int:
+        """
+        Removes a node and hands the state of its keys to their new owners.
+
+        Args:
+            node: Server address as "host:port".
+
+        Returns:
+            int: Number of keys handed off.
+        """
+        if node not in self._ring.nodes:
+            raise ValueError(f"{node} is not in the cluster")
+        if len(self._ring.nodes) == 1:
+            raise ValueError("The last node cannot be removed")
+        async with self._exclusive():
+            ring = self._ring.without_node(node)
+            moved = await self._handoff(ring, [node])
+            self._ring = ring
+            connection = self._connections.pop(node)
+        await connection.close()
+        logger.info(f"Removed {node}; {moved} keys handed off")
+        return moved
+
+    async def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns each node's tracked, expired and evicted keys and window.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Statistics by node.
+        """
+        async with self._shared():
+            nodes = list(self._ring.nodes)
+            responses = await asyncio.gather(*(
+                self._connections[node].request(OP_STATS, b"") for node in nodes
+            ))
+        return {node: json.loads(response) for node, response in zip(nodes, responses)}
+
+    async def _handoff(self, ring: HashRing, sources: Sequence[str]) -> int:
+        """
+        Moves the keys of the source nodes that ring assigns elsewhere.
+
+        Must be called while rebalancing, with no batches in flight. The
+        sources keep their keys until every new owner has imported them, so
+        if an import fails, the error is raised with the old ring still
+        complete; keys imported by other owners are left unused there.
+        """
+        specs = {
+            source: json.dumps({"nodes": ring.nodes, "vnodes": ring.vnodes, "node": source}).encode("utf-8")
+            for source in sources
+        }
+        exports = await asyncio.gather(*(
+            self._connections[source].request(OP_HANDOFF, spec) for source, spec in specs.items()
+        ))
+
+        targets: Dict[str, Tuple[List[int], List[str]]] = {}
+        for payload in exports:
+            states, keys = decode_events(payload)
+            for state, key in zip(states, keys):
+                target = targets.setdefault(ring.node_for(key), ([], []))
+                target[0].append(state)
+                target[1].append(key)
+
+        await asyncio.gather(*(
+            self._connections[node].request(OP_IMPORT, encode_events(states, keys))
+            for node, (states, keys) in targets.items()
+        ))
+        await asyncio.gather(*(
+            self._connections[source].request(OP_RELEASE, spec) for source, spec in specs.items()
+        ))
+        return sum(len(keys) for _, keys in targets.values())
+
+    @asynccontextmanager
+    async def _shared(self) -> AsyncIterator[None]:
+        """
+        Marks a request as in flight, waiting while a rebalance is running.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._rebalancing)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def _exclusive(self) -> AsyncIterator[None]:
+        """
+        Holds new requests back and waits for the ones in flight to finish.
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._rebalancing)
+            self._rebalancing = True
+            await self._condition.wait_for(lambda: self._in_flight == 0)
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._rebalancing = False
+                self._condition.notify_all()
+
+def _serve_process(host: str, port: int, throttler_kwargs: Dict[str, Any], connection: Any) -> None:
+    """
+    Entry point of a server process started by start_server_process.
+    """
+    async def run() -> None:
+        server = ThrottlerServer(EventThrottler(**throttler_kwargs))
+        await server.start(host, port)
+        connection.send(server.port)
+        connection.close()
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+def start_server_process(host: str = "127.0.0.1", port: int = 0, **throttler_kwargs: Any) -> Tuple[multiprocessing.Process, str]:
+    """
+    Starts a ThrottlerServer in a new process, for tests and benchmarks.
+
+    Args:
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free port.
+        **throttler_kwargs: EventThrottler arguments.
+
+    Returns:
+        Tuple[multiprocessing.Process, str]: The process, which the caller
+        terminates, and the server address as "host:port".
+    """
+    # Spawned rather than forked, so the child does not inherit logging threads
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_serve_process, args=(host, port, throttler_kwargs, sender), daemon=True
+    )
+    process.start()
+    sender.close()
+    try:
+        bound_port = receiver.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"Server process exited with code {process.exitcode}")
+    return process, f"{host}:{bound_port}"
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Returns the argument parser of the server command.
+    """
+    parser = argparse.ArgumentParser(description="Serve EventThrottler decisions to cluster clients.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=CLUSTER_PORT, help="port to listen on")
+    parser.add_argument("-w", "--window", type=int, default=DEFAULT_WINDOW, help="throttling window in seconds")
+    parser.add_argument("--max-keys", type=int, default=MAX_KEYS, help="maximum number of tracked keys")
+    parser.add_argument("--cleanup-interval", type=int, default=CLEANUP_INTERVAL,
+                        help="idle seconds after which a key is expired")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Runs a ThrottlerServer until interrupted.
+
+    Args:
+        argv: Command-line arguments; defaults to sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    throttler = EventThrottler(args.window, max_keys=args.max_keys, cleanup_interval=args.cleanup_interval)
+
+    async def run() -> None:
+        server = ThrottlerServer(throttler)
+        await server.start(args.host, args.port)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        logger.error(f"Server failed: {error}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
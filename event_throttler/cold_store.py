@@ -0,0 +1,234 @@
+"""
+Cold Key Tier
+
+This module provides ColdStore, a SQLite table of keys that an
+EventThrottler has evicted from memory, so that a throttler given one keeps
+the state of far more keys than max_keys without holding them all in memory.
+
+Evicted keys are buffered and written in batches of COLD_BATCH_SIZE per
+transaction. A key that misses in memory is looked for in the write buffer,
+then in a Bloom filter of every spilled key, and only queried in SQLite if
+the filter says it may be there. Keys found are removed from the tier, also
+in batches, since the throttler moves them back into memory.
+
+The filter cannot forget keys, so once capacity keys have been spilled the
+tier is compacted: keys idle past the expiry horizon are deleted and the
+filter is rebuilt from the keys that remain.
+
+The file is scratch space: it is emptied when the store is opened. Use
+EventThrottler snapshots to keep state across restarts.
+"""
+import sqlite3
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Import the Bloom filter, custom logger and configuration
+from bloom import BloomFilter
+from logger import get_module_logger
+from config import COLD_BATCH_SIZE, COLD_BLOOM_CAPACITY, BLOOM_ERROR_RATE
+
+# Get a logger for this module
+logger = get_module_logger("cold_store")
+
+class ColdStore:
+    """
+    A SQLite-backed tier of evicted keys and their last processed timestamps.
+
+    Not thread-safe on its own; an EventThrottler only calls it with its
+    lock held, so a ColdStore must not be shared between throttlers.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = COLD_BATCH_SIZE,
+        bloom_capacity: int = COLD_BLOOM_CAPACITY,
+        bloom_error_rate: float = BLOOM_ERROR_RATE
+    ):
+        """
+        Open (and empty) a cold tier.
+
+        Args:
+            path: SQLite database file, or ":memory:".
+            batch_size: Buffered writes that trigger a transaction (default from config).
+            bloom_capacity: Spilled keys before the tier is compacted (default from config).
+            bloom_error_rate: False-positive rate of the Bloom filter (default from config).
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self._batch_size = batch_size
+        self._bloom_error_rate = bloom_error_rate
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        # Spilled keys not yet written, and taken keys not yet deleted
+        self._pending: Dict[str, int] = {}
+        self._deleted: Set[str] = set()
+        # Keys in the tier; a spilled key is never already in it
+        self._count = 0
+        self._stats = {
+            "spilled": 0,
+            "loaded": 0,
+            "filtered": 0,
+            "false_positives": 0,
+            "flushes": 0,
+            "compactions": 0,
+        }
+
+        # Another thread may use the store, but only under the throttler's lock
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cold_keys (key TEXT PRIMARY KEY, timestamp INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._db.execute("DELETE FROM cold_keys")
+        logger.info(f"ColdStore opened at {path} with batches of {batch_size} keys")
+
+    def spill(self, key: str, timestamp: int, horizon: Optional[int]) -> int:
+        """
+        Adds a key evicted from memory.
+
+        Args:
+            key: Unique identifier for the user/session.
+            timestamp: The key's last processed timestamp.
+            horizon: Keys last processed at or before this are idle and may
+                be deleted by a compaction; None if unknown.
+
+        Returns:
+            int: Number of idle keys deleted by a compaction, usually 0.
+        """
+        self._pending[key] = timestamp
+        self._bloom.add(key)
+        self._count += 1
+        self._stats["spilled"] += 1
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+            if len(self._bloom) >= self._bloom.capacity:
+                return self._compact(horizon)
+        return 0
+
+    def take(self, key: str) -> Optional[int]:
+        """
+        Removes a key from the tier and returns its timestamp.
+
+        Args:
+            key: Unique identifier for the user/session.
+
+        Returns:
+            The key's timestamp, or None if the tier does not have it.
+        """
+        timestamp = self._pending.pop(key, None)
+        if timestamp is None:
+            if key in self._deleted:
+                return None
+            if key not in self._bloom:
+                self._stats["filtered"] += 1
+                return None
+            row = self._db.execute("SELECT timestamp FROM cold_keys WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["false_positives"] += 1
+                return None
+            timestamp = row[0]
+
+        # An older row may still be on disk if the key was spilled twice
+        self._deleted.add(key)
+        self._count -= 1
+        self._stats["loaded"] += 1
+        if len(self._deleted) >= self._batch_size:
+            self._flush()
+        return timestamp
+
+    def items(self) -> List[Tuple[str, int]]:
+        """
+        Returns every (key, timestamp) pair in the tier.
+        """
+        self._flush()
+        return self._db.execute("SELECT key, timestamp FROM cold_keys").fetchall()
+
+    def export(self, predicate: Callable[[str], bool]) -> List[Tuple[str, int]]:
+        """
+        Removes the keys matching predicate and returns their timestamps.
+
+        Args:
+            predicate: Called with each key; True exports it.
+
+        Returns:
+            List[Tuple[str, int]]: (key, timestamp) pairs.
+        """
+        exported = [item for item in self.items() if predicate(item[0])]
+        self._db.execute("BEGIN")
+        self._db.executemany("DELETE FROM cold_keys WHERE key = ?", ((key,) for key, _ in exported))
+        self._db.execute("COMMIT")
+        self._count -= len(exported)
+        return exported
+
+    def count(self) -> int:
+        """
+        Returns the number of keys in the tier.
+        """
+        return self._count
+
+    def clear(self) -> None:
+        """
+        Removes every key.
+        """
+        self._pending.clear()
+        self._deleted.clear()
+        self._db.execute("DELETE FROM cold_keys")
+        self._bloom.clear()
+        self._count = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing the tier's traffic.
+
+        Returns:
+            Dict[str, int]: Keys spilled and loaded back, lookups answered
+            by the Bloom filter alone, lookups the filter sent to SQLite in
+            vain, write transactions and compactions.
+        """
+        return dict(self._stats)
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+        """
+        self._db.close()
+
+    def _flush(self) -> None:
+        """
+        Writes buffered deletes and spills in one transaction.
+        """
+        if not self._pending and not self._deleted:
+            return
+        self._db.execute("BEGIN")
+        # Deletes first: a key may have been taken and then spilled again
+        self._db.executemany("DELETE FROM cold_keys WHERE key = ?", ((key,) for key in self._deleted))
+        self._db.executemany("INSERT OR REPLACE INTO cold_keys VALUES (?, ?)", self._pending.items())
+        self._db.execute("COMMIT")
+        self._pending.clear()
+        self._deleted.clear()
+        self._stats["flushes"] += 1
+
+    def _compact(self, horizon: Optional[int]) -> int:
+        """
+        Deletes idle keys and rebuilds the Bloom filter from the rest.
+
+        The filter grows to twice the remaining keys if that is more than
+        its capacity, so compactions stay rare while most keys are live.
+
+        Args:
+            horizon: Keys last processed at or before this are deleted.
+
+        Returns:
+            int: Number of keys deleted.
+        """
+        purged = 0
+        if horizon is not None:
+            purged = self._db.execute("DELETE FROM cold_keys WHERE timestamp <= ?", (horizon,)).rowcount
+        keys = [key for (key,) in self._db.execute("SELECT key FROM cold_keys")]
+        self._count = len(keys)
+        capacity = max(self._bloom.capacity, 2 * len(keys))
+        self._bloom = BloomFilter.from_keys(keys, capacity, self._bloom_error_rate)
+        self._stats["compactions"] += 1
+        logger.info(f"ColdStore compacted: {purged} idle keys deleted, {len(keys)} kept")
+        return purged
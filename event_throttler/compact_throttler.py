@@ -0,0 +1,342 @@
+"""
+Compact Event Throttler
+
+This module provides a CompactEventThrottler, an EventThrottler with the same
+API whose per-key state takes a fraction of the memory of a dict.
+
+Keys are not stored at all. Each key is reduced to a 64-bit hash, and state
+lives in an open-addressing (linear probing) table made of two array('q')
+buffers: one of key hashes and one of last processed timestamps. A slot costs
+16 bytes, about 23 bytes per key at the maximum load factor, compared with
+well over 100 bytes per key for a Dict[str, int] entry plus its str and int
+objects.
+
+Integer keys that fit in 64 bits, including keys the caller has already
+hashed, are stored as they are, so distinct integer keys never share state. Two
+distinct str keys share state only if their 64-bit hashes collide, which is
+vanishingly unlikely even at tens of millions of keys.
+"""
+import threading
+from array import array
+from typing import Dict, Hashable, List, Sequence
+
+# Import the custom logger and configuration
+from logger import get_module_logger
+from config import DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, EXPIRY_BATCH_SIZE
+
+# Get a logger for this module
+logger = get_module_logger("compact_throttler")
+
+# Marks an unused slot; hash() never returns it for str or small int keys
+_EMPTY = -(2 ** 63)
+# Multiplier for Fibonacci hashing, which spreads clustered (e.g. sequential) keys
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_UINT64_MASK = (1 << 64) - 1
+_INT64_MAX = (1 << 63) - 1
+_MAX_LOAD_FACTOR = 0.7
+_INITIAL_CAPACITY = 1024
+
+class CompactEventThrottler:
+    """
+    A memory-compact EventThrottler backed by array('q') buffers.
+
+    The throttling rule is the same as EventThrottler's. Idle keys are
+    expired by an incremental sweep that inspects a few slots per new key,
+    and once max_keys keys are tracked, a new key replaces the least
+    recently processed key in its probe sequence (an approximation of
+    EventThrottler's least-recently-processed eviction).
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL,
+        initial_capacity: int = _INITIAL_CAPACITY
+    ):
+        """
+        Initialize the CompactEventThrottler with a specified window size.
+
+        Args:
+            window: The throttling window in seconds (default from config).
+            max_keys: Maximum number of keys to track (default from config).
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the window (default from config).
+            initial_capacity: Initial number of slots; the table doubles as needed.
+        """
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+
+        self._window = window
+        self._max_keys = max_keys
+        self._cleanup_interval = cleanup_interval
+        self._watermark = None
+        self._expired_count = 0
+        self._evicted_count = 0
+        self._sweep_position = 0
+        self._allocate(max(8, 1 << (max(initial_capacity, 1) - 1).bit_length()))
+        self._lock = threading.RLock()
+        logger.info(f"CompactEventThrottler initialized with window of {window} seconds")
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Replaces the table with an empty one of the given power-of-two capacity.
+        """
+        self._capacity = capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._hashes = array("q", [_EMPTY]) * capacity
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._count = 0
+        self._resize_at = int(capacity * _MAX_LOAD_FACTOR)
+
+    def _home(self, hashed: int) -> int:
+        """
+        Returns the first slot probed for a key hash.
+        """
+        return ((hashed * _MULTIPLIER) & _UINT64_MASK) >> self._shift
+
+    @staticmethod
+    def _hash(key: Hashable) -> int:
+        """
+        Reduces a key to a 64-bit hash that is never the empty marker.
+        """
+        if type(key) is int and _EMPTY < key <= _INT64_MAX:
+            # Already a 64-bit value; hash() would fold it to 61 bits
+            return key
+        hashed = hash(key)
+        return hashed + 1 if hashed == _EMPTY else hashed
+
+    def should_process(self, timestamp: int, event_id: str, key: Hashable) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session: a str, an int or a
+                pre-hashed 64-bit integer.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        hashed = self._hash(key)
+        with self._lock:
+            return self._process_locked(timestamp, hashed)
+
+    def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[Hashable]
+    ) -> List[bool]:
+        """
+        Determines which events of a batch should be processed.
+
+        The decisions are identical to calling should_process for each event
+        in order, but the lock is acquired only once.
+
+        Returns:
+            List[bool]: True for each event that should be processed.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        hashes = [self._hash(key) for key in keys]
+        with self._lock:
+            return [
+                self._process_locked(timestamp, hashed)
+                for timestamp, hashed in zip(timestamps, hashes)
+            ]
+
+    def _process_locked(self, timestamp: int, hashed: int) -> bool:
+        """
+        Applies the throttling rule to one event. Must be called with the lock held.
+        """
+        hashes = self._hashes
+        mask = self._capacity - 1
+        # Same as self._home(hashed), inlined for the hot path
+        index = ((hashed * _MULTIPLIER) & _UINT64_MASK) >> self._shift
+
+        while True:
+            slot_hash = hashes[index]
+            if slot_hash == hashed:
+                if timestamp - self._timestamps[index] >= self._window:
+                    self._timestamps[index] = timestamp
+                    if timestamp > self._watermark:
+                        self._watermark = timestamp
+                    return True
+                return False
+            if slot_hash == _EMPTY:
+                break
+            index = (index + 1) & mask
+
+        # First time seeing this key, so process it
+        if self._count >= self._max_keys:
+            self._evict_for(hashed)
+        elif self._count >= self._resize_at:
+            self._grow()
+        self._insert(hashed, timestamp)
+        self._advance(timestamp)
+        return True
+
+    def _insert(self, hashed: int, timestamp: int) -> None:
+        """
+        Stores a key that is known not to be in the table.
+        """
+        hashes = self._hashes
+        mask = self._capacity - 1
+        index = self._home(hashed)
+        while hashes[index] != _EMPTY:
+            index = (index + 1) & mask
+        hashes[index] = hashed
+        self._timestamps[index] = timestamp
+        self._count += 1
+
+    def _delete(self, index: int) -> None:
+        """
+        Empties a slot, shifting later entries of its probe run back so that
+        lookups never stop early at the hole (no tombstones are needed).
+        """
+        hashes = self._hashes
+        timestamps = self._timestamps
+        mask = self._capacity - 1
+        hole = index
+        index = (index + 1) & mask
+        while hashes[index] != _EMPTY:
+            home = self._home(hashes[index])
+            # Move the entry into the hole unless its home lies cyclically in (hole, index]
+            if (index - home) & mask >= (index - hole) & mask:
+                hashes[hole] = hashes[index]
+                timestamps[hole] = timestamps[index]
+                hole = index
+            index = (index + 1) & mask
+        hashes[hole] = _EMPTY
+        self._count -= 1
+
+    def _grow(self) -> None:
+        """
+        Doubles the table and re-inserts every key.
+        """
+        old_hashes = self._hashes
+        old_timestamps = self._timestamps
+        self._allocate(self._capacity * 2)
+        for hashed, timestamp in zip(old_hashes, old_timestamps):
+            if hashed != _EMPTY:
+                self._insert(hashed, timestamp)
+        self._sweep_position = 0
+        logger.debug("CompactEventThrottler grew to %d slots", self._capacity)
+
+    def _evict_for(self, hashed: int) -> None:
+        """
+        Evicts the least recently processed key in a new key's probe sequence.
+        """
+        hashes = self._hashes
+        timestamps = self._timestamps
+        mask = self._capacity - 1
+        index = self._home(hashed)
+        if hashes[index] == _EMPTY:
+            # The new key's home slot is free; evict from the next probe run instead
+            while hashes[index] == _EMPTY:
+                index = (index + 1) & mask
+
+        oldest = index
+        while hashes[index] != _EMPTY:
+            if timestamps[index] < timestamps[oldest]:
+                oldest = index
+            index = (index + 1) & mask
+        self._delete(oldest)
+        self._evicted_count += 1
+
+    def _advance(self, timestamp: int) -> None:
+        """
+        Moves the expiry clock forward and sweeps a few slots for idle keys.
+
+        Must be called with the lock held, after inserting a new key. The
+        sweep visits the table in slot order, EXPIRY_BATCH_SIZE slots per new
+        key, so idle keys are reclaimed at least as fast as new keys arrive
+        and the table only grows when the number of live keys does.
+        """
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+
+        horizon = self._watermark - max(self._window, self._cleanup_interval)
+        hashes = self._hashes
+        timestamps = self._timestamps
+        mask = self._capacity - 1
+        position = self._sweep_position
+        for _ in range(EXPIRY_BATCH_SIZE):
+            if hashes[position] != _EMPTY and timestamps[position] <= horizon:
+                # Deleting may shift another entry into this slot, so look again
+                self._delete(position)
+                self._expired_count += 1
+            else:
+                position = (position + 1) & mask
+        self._sweep_position = position
+
+    def update_window(self, new_window: int) -> None:
+        """
+        Updates the throttling window size dynamically.
+
+        Args:
+            new_window: The new throttling window size in seconds.
+        """
+        with self._lock:
+            old_window = self._window
+            self._window = new_window
+            logger.info(f"Window updated from {old_window}s to {new_window}s")
+
+    def get_window(self) -> int:
+        """
+        Returns the current throttling window size.
+
+        Returns:
+            int: The current window size in seconds.
+        """
+        with self._lock:
+            return self._window
+
+    def clear(self) -> None:
+        """
+        Clears all stored timestamps, effectively resetting the throttler.
+        """
+        with self._lock:
+            self._allocate(_INITIAL_CAPACITY)
+            self._sweep_position = 0
+            self._watermark = None
+            logger.info("CompactEventThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        with self._lock:
+            return self._count
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+
+        Returns:
+            Dict[str, int]: Number of tracked keys, keys expired after being
+            idle, and keys evicted because max_keys was reached.
+        """
+        with self._lock:
+            return {
+                "tracked_keys": self._count,
+                "expired_keys": self._expired_count,
+                "evicted_keys": self._evicted_count,
+            }
+
+    def get_memory_usage(self) -> int:
+        """
+        Returns the number of bytes used by the slot buffers.
+
+        Returns:
+            int: Size of the hash and timestamp buffers in bytes.
+        """
+        with self._lock:
+            return (len(self._hashes) * self._hashes.itemsize
+                    + len(self._timestamps) * self._timestamps.itemsize)
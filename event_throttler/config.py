@@ -13,10 +13,53 @@ LOG_TO_FILE = False       # Whether to log to file by default
 LOG_DIRECTORY = "logs"    # Directory to store log files
 MAX_LOG_SIZE_MB = 10      # Maximum size of log file before rotation
 LOG_BACKUP_COUNT = 5      # Number of backup log files to keep
+LOG_USE_QUEUE = True      # Write log records from a background thread via a queue
+LOG_SAMPLE_RATE = 1       # Log 1 in N throttled events per key at DEBUG level
 
 # Throttler Configuration
 DEFAULT_WINDOW = 10       # Default throttling window in seconds
 
 # Performance Settings
-CLEANUP_INTERVAL = 3600   # Interval (in seconds) to clean up old keys (optional feature)
-MAX_KEYS = 1000000        # Maximum number of keys to track before cleanup
\ No newline at end of file
+CLEANUP_INTERVAL = 3600   # Keys idle for this long (or the window, if longer) are expired
+MAX_KEYS = 1000000        # Maximum number of keys to track before evicting the oldest
+EXPIRY_BATCH_SIZE = 4     # Maximum expired keys removed per processed event
+BATCH_VECTORIZE_THRESHOLD = 32  # Smaller batches are decided with a plain loop
+DEFAULT_SHARDS = 16       # Number of independently locked shards in ShardedEventThrottler
+SNAPSHOT_INTERVAL = 60    # Seconds between periodic background snapshots
+PIPELINE_BATCH_SIZE = 1024  # Maximum events decided together by the asyncio pipeline
+CLI_CHUNK_BYTES = 1024 * 1024  # Bytes of input read and decided together by the CLI
+REPLAY_CHUNK_EVENTS = 1 << 20  # Events of a replayed event log decided together
+DISPATCH_BATCH_SIZE = 256  # Events handed to a KeyAffinityDispatcher worker at a time
+DISPATCH_QUEUE_BATCHES = 16  # Batches queued per dispatcher worker before submitting blocks
+DISPATCH_MAX_PENDING = 65536  # Unread ordered dispatcher decisions before submitting blocks
+
+# Approximate Throttler Configuration
+APPROX_MEMORY_BYTES = 64 * 1024 * 1024  # Fixed size of ApproximateEventThrottler's sketch
+APPROX_ROWS = 4           # Sketch cells per key; the estimate is the minimum over them
+
+# Metrics Configuration
+METRICS_TOP_K = 10        # Hot keys reported by ThrottlerMetrics (0 disables tracking)
+METRICS_SAMPLE_RATE = 8   # Lock timings and hot keys are sampled on 1 in N lock acquisitions
+METRICS_PORT = 9100       # Default port of the Prometheus metrics server
+
+# Reorder Buffer Configuration
+REORDER_LATENESS = 2      # Seconds an event may arrive behind the latest event of its partition
+REORDER_PARTITIONS = 64   # Independently locked reorder heaps
+REORDER_MAX_BUFFERED = 100000  # Events held across all partitions before the oldest is released early
+LATE_EVENT_POLICY = "drop"  # Events behind the watermark are dropped, processed or decided as they are
+
+# Cluster Configuration
+CLUSTER_PORT = 7070       # Default port of a throttler server
+CLUSTER_VNODES = 128      # Points per node on the consistent-hash ring
+CLUSTER_ROUTE_CACHE_SIZE = 100000  # Keys whose owning node a client caches
+CLUSTER_MAX_FRAME_BYTES = 64 * 1024 * 1024  # Largest request or response accepted
+
+# Tiered Storage Configuration
+COLD_BATCH_SIZE = 1000    # Keys spilled to (or removed from) the cold tier per SQLite transaction
+COLD_BLOOM_CAPACITY = 1000000  # Spilled keys before the cold tier is compacted and its filter rebuilt
+BLOOM_ERROR_RATE = 0.01   # False-positive rate of Bloom filters at capacity
+
+# Deduplication Configuration
+DEDUP_HORIZON = 3600      # Seconds of event time an event ID is remembered for
+DEDUP_BUCKETS = 4         # Rotating buckets the dedup horizon is split into
+DEDUP_BLOOM_CAPACITY = 1000000  # Event IDs per bucket of a BloomEventDeduplicator
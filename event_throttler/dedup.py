@@ -0,0 +1,219 @@
+"""
+Event Deduplication
+
+This module provides the deduplicators an EventThrottler or
+ApproximateEventThrottler can use to drop events that are delivered more
+than once, for example when an upstream retries:
+
+- EventDeduplicator, exact, keeping event IDs in sets,
+- BloomEventDeduplicator, approximate, keeping them in a fixed-size
+  Bloom filter whose cells expire.
+
+Both remember the event IDs seen in the last horizon seconds of event time,
+split into buckets that each cover a slice of the horizon. When event time
+moves into a new slice, the oldest bucket is dropped whole, so memory is
+bounded by the events of one horizon rather than by every event ever seen.
+"""
+import math
+from collections import deque
+from typing import Any, Deque, Optional
+
+# Import the configuration
+from config import DEDUP_HORIZON, DEDUP_BUCKETS, DEDUP_BLOOM_CAPACITY, BLOOM_ERROR_RATE
+
+_HASH_MASK = (1 << 64) - 1
+
+class EventDeduplicator:
+    """
+    Remembers event IDs for at least horizon seconds of event time.
+
+    An event ID is remembered from its event's timestamp (or the latest
+    timestamp seen, if that is later) until event time has moved between
+    horizon and horizon plus one bucket past it. Not thread-safe; a
+    throttler calls it with its own lock held.
+    """
+
+    def __init__(self, horizon: int = DEDUP_HORIZON, buckets: int = DEDUP_BUCKETS):
+        """
+        Initialize an empty deduplicator.
+
+        Args:
+            horizon: Seconds of event time an event ID is remembered for
+                (default from config).
+            buckets: Slices the horizon is split into; more buckets keep
+                IDs closer to the horizon at a small lookup cost (default
+                from config).
+        """
+        if horizon < 1:
+            raise ValueError("horizon must be at least 1")
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        self.horizon = horizon
+        self._bucket_width = math.ceil(horizon / buckets)
+        # One bucket more than the horizon needs, since the newest one is partly filled
+        self._bucket_count = math.ceil(horizon / self._bucket_width) + 1
+        self.clear()
+
+    def is_duplicate(self, timestamp: int, event_id: str) -> bool:
+        """
+        Returns True if event_id was seen within the horizon, and remembers it otherwise.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID.
+
+        Returns:
+            bool: True if the event is a repeat delivery.
+        """
+        buckets = self._rotate(timestamp)
+        for bucket in buckets:
+            if event_id in bucket:
+                self._duplicate_count += 1
+                return True
+        buckets[-1].add(event_id)
+        return False
+
+    def _rotate(self, timestamp: int) -> Deque[Any]:
+        """
+        Drops the buckets that have moved past the horizon and returns the
+        buckets, oldest first.
+        """
+        index = timestamp // self._bucket_width
+        buckets = self._buckets
+        if self._current is None:
+            self._current = index
+        elif index > self._current:
+            for _ in range(min(index - self._current, self._bucket_count)):
+                buckets.popleft()
+                buckets.append(set())
+            self._current = index
+        return buckets
+
+    def get_duplicate_count(self) -> int:
+        """
+        Returns the number of events found to be duplicates.
+
+        Returns:
+            int: Duplicates since creation or the last clear().
+        """
+        return self._duplicate_count
+
+    def clear(self) -> None:
+        """
+        Forgets every event ID.
+        """
+        self._buckets: Deque[Any] = deque(set() for _ in range(self._bucket_count))
+        self._current: Optional[int] = None
+        self._duplicate_count = 0
+
+class BloomEventDeduplicator(EventDeduplicator):
+    """
+    An EventDeduplicator that keeps event IDs in a Bloom filter of fixed size.
+
+    Each cell of the filter is a byte holding the bucket that last set it,
+    or 0. When a bucket is dropped, its cells are reset with one
+    bytes.translate pass, so an ID is hashed once and checked with a single
+    set of lookups however many buckets there are.
+
+    No duplicate within the horizon is ever missed. A new event is mistaken
+    for a duplicate with probability up to about error_rate while at most
+    capacity IDs were seen over the last horizon plus one bucket. Memory is
+    about 9.6 bytes per ID of capacity at a 1% error rate.
+    """
+
+    def __init__(
+        self,
+        horizon: int = DEDUP_HORIZON,
+        buckets: int = DEDUP_BUCKETS,
+        capacity: int = DEDUP_BLOOM_CAPACITY,
+        error_rate: float = BLOOM_ERROR_RATE
+    ):
+        """
+        Initialize an empty deduplicator.
+
+        Args:
+            horizon: Seconds of event time an event ID is remembered for
+                (default from config).
+            buckets: Slices the horizon is split into, at most 254
+                (default from config).
+            capacity: Event IDs per horizon the filter is sized for
+                (default from config).
+            error_rate: False-positive rate at capacity (default from config).
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self._cell_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self._hash_range = range(max(1, round(self._cell_count / capacity * math.log(2))))
+        super().__init__(horizon, buckets)
+        if self._bucket_count > 255:
+            raise ValueError("buckets must be at most 254")
+
+    def is_duplicate(self, timestamp: int, event_id: str) -> bool:
+        """
+        Returns True if event_id was probably seen within the horizon, and
+        remembers it otherwise.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID.
+
+        Returns:
+            bool: True if the event is probably a repeat delivery.
+        """
+        index = timestamp // self._bucket_width
+        if self._current is None:
+            self._current = index
+        elif index > self._current:
+            self._expire(index)
+
+        # Double hashing from the built-in hash(), as in BloomFilter
+        hashed = hash(event_id) & _HASH_MASK
+        step = (hashed & 0xFFFFFFFF) | 1
+        start = hashed >> 32
+        size = self._cell_count
+        cells = self._cells
+        positions = [(start + step * i) % size for i in self._hash_range]
+        for position in positions:
+            if not cells[position]:
+                break
+        else:
+            self._duplicate_count += 1
+            return True
+
+        generation = self._current % self._bucket_count + 1
+        for position in positions:
+            cells[position] = generation
+        return False
+
+    def _expire(self, index: int) -> None:
+        """
+        Resets the cells of the buckets that have moved past the horizon
+        and moves the current bucket to index.
+        """
+        dropped = index - self._current
+        if dropped >= self._bucket_count:
+            self._cells = bytearray(self._cell_count)
+        else:
+            # Each new bucket reuses the generation of the bucket it replaces
+            table = bytearray(range(256))
+            for bucket in range(self._current + 1, index + 1):
+                table[bucket % self._bucket_count + 1] = 0
+            self._cells = self._cells.translate(table)
+        self._current = index
+
+    def clear(self) -> None:
+        """
+        Forgets every event ID.
+        """
+        self._cells = bytearray(self._cell_count)
+        self._current: Optional[int] = None
+        self._duplicate_count = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size of the filter in bytes.
+        """
+        return len(self._cells)
@@ -0,0 +1,405 @@
+"""
+Key-affinity Dispatcher
+
+This module provides a KeyAffinityDispatcher, a stage that partitions events
+by key hash onto a fixed pool of worker threads or processes. Each worker
+owns a private EventThrottler that no other worker touches, so decisions
+take no shared lock. Events are handed to a worker in batches through a
+bounded queue, and decisions come back through a callback or as an ordered
+result stream.
+"""
+import math
+import multiprocessing
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Import the throttler, custom logger and configuration
+from throttler import EventThrottler
+from policy import WindowPolicy
+from algorithms import RateAlgorithm
+from logger import get_module_logger
+from config import (
+    DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, DISPATCH_BATCH_SIZE,
+    DISPATCH_QUEUE_BATCHES, DISPATCH_MAX_PENDING
+)
+
+# Get a logger for this module
+logger = get_module_logger("dispatcher")
+
+Decision = Tuple[int, str, str, bool]
+
+class _WorkerFailed:
+    """
+    Result queue marker carrying an exception raised by a worker.
+    """
+
+    def __init__(self, worker: int, error: Exception):
+        self.worker = worker
+        self.error = error
+
+def _run_worker(worker: int, inbox: Any, outbox: Any, throttler_kwargs: Dict[str, Any]) -> None:
+    """
+    Decides the batches handed to one worker until it receives None.
+
+    The throttler is created here and never shared, so it is called without
+    its lock. After a failure the rest of the inbox is still drained, so the
+    dispatcher never blocks on a full queue of a dead worker.
+    """
+    throttler = EventThrottler(**throttler_kwargs)
+    failed = False
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        if failed:
+            continue
+        batch_id, timestamps, event_ids, keys = batch
+        try:
+            mask = throttler._process_batch_locked(timestamps, event_ids, keys)
+        except Exception as error:
+            failed = True
+            outbox.put(_WorkerFailed(worker, error))
+            continue
+        # One byte per decision, which is cheap to send between processes
+        outbox.put((batch_id, bytes(mask)))
+    outbox.put(None)
+
+class KeyAffinityDispatcher:
+    """
+    Throttles events on a pool of workers, each owning the keys that hash to it.
+
+    Every key always goes to the same worker and each worker decides its
+    batches in the order they were handed off, so the decisions for a key
+    are made in submission order and are identical to a single
+    EventThrottler's.
+
+    Events are buffered per worker and handed off batch_size at a time, or
+    when flush() is called. Each worker's queue holds at most queue_batches
+    batches, and submitting blocks while the target queue is full, which
+    pushes back on producers. With a callback, decisions are reported as
+    workers finish them, in submission order per key. Without one, they are
+    read in submission order from results(). Either way, submitting blocks
+    while max_pending events have not been reported or read.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        window: int = DEFAULT_WINDOW,
+        processes: bool = False,
+        callback: Optional[Callable[[int, str, str, bool], None]] = None,
+        batch_size: int = DISPATCH_BATCH_SIZE,
+        queue_batches: int = DISPATCH_QUEUE_BATCHES,
+        max_pending: int = DISPATCH_MAX_PENDING,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL,
+        policy: Optional[WindowPolicy] = None,
+        algorithm: Optional[RateAlgorithm] = None
+    ):
+        """
+        Initialize the KeyAffinityDispatcher and start its workers.
+
+        Args:
+            workers: Number of worker threads or processes.
+            window: The throttling window in seconds (default from config).
+            processes: Run workers in spawned processes instead of threads,
+                so decisions run in parallel on a GIL build. The policy and
+                algorithm must then be picklable.
+            callback: Called as callback(timestamp, event_id, key, processed)
+                for each decision from the dispatcher's collector thread, or
+                None to read decisions from results().
+            batch_size: Events handed to a worker at a time (default from config).
+            queue_batches: Batches each worker's queue holds (default from config).
+            max_pending: Submitted events not yet reported to the callback
+                or read from results() before submitting blocks (default
+                from config).
+            max_keys: Maximum number of keys to track across all workers.
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the window (default from config).
+            policy: Per-key windows; keys it does not match use window.
+            algorithm: Rate-limiting algorithm applied per key, or None to
+                process the first event per window.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if batch_size < 1 or queue_batches < 1 or max_pending < 1:
+            raise ValueError("batch_size, queue_batches and max_pending must be at least 1")
+
+        self._worker_count = workers
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._callback = callback
+        throttler_kwargs = {
+            "window": window,
+            "max_keys": max(1, math.ceil(max_keys / workers)),
+            "cleanup_interval": cleanup_interval,
+            "policy": policy,
+            "algorithm": algorithm,
+        }
+
+        # Events waiting to be handed off, per worker: sequences, timestamps, event IDs and keys
+        self._buffers: List[Tuple[List[int], List[int], List[str], List[str]]] = [
+            ([], [], [], []) for _ in range(workers)
+        ]
+        self._next_sequence = 0
+        self._next_batch = 0
+        # Batches handed off to a worker, by ID, until their decisions are reported
+        self._in_flight: Dict[int, Tuple[List[int], List[int], List[str], List[str]]] = {}
+        # Events submitted whose decision has not been reported or read
+        self._pending = 0
+        # Decisions not yet yielded by results(), by sequence
+        self._decisions: Dict[int, Decision] = {}
+        self._next_result = 0
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._finished = False
+        # Serializes producers, so sequences and per-key order follow submission order
+        self._submit_lock = threading.Lock()
+        self._condition = threading.Condition()
+
+        if processes:
+            # Spawned rather than forked, so workers do not inherit logging threads or held locks
+            context = multiprocessing.get_context("spawn")
+            self._inboxes = [context.Queue(maxsize=queue_batches) for _ in range(workers)]
+            self._outbox = context.Queue()
+            worker_type = context.Process
+        else:
+            self._inboxes = [queue.Queue(maxsize=queue_batches) for _ in range(workers)]
+            self._outbox = queue.Queue()
+            worker_type = threading.Thread
+        self._workers = [
+            worker_type(target=_run_worker, args=(index, inbox, self._outbox, throttler_kwargs),
+                        name=f"throttler-worker-{index}", daemon=True)
+            for index, inbox in enumerate(self._inboxes)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._collector = threading.Thread(target=self._collect, name="throttler-collector", daemon=True)
+        self._collector.start()
+        logger.info(f"KeyAffinityDispatcher started {workers} worker "
+                    f"{'processes' if processes else 'threads'} with window of {window} seconds")
+
+    def submit(self, timestamp: int, event_id: str, key: str) -> None:
+        """
+        Submits one event for a decision.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+        """
+        self.submit_batch([timestamp], [event_id], [key])
+
+    def submit_batch(self, timestamps: Sequence[int], event_ids: Sequence[str], keys: Sequence[str]) -> None:
+        """
+        Submits a batch of events for decisions.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (not used in throttling logic).
+            keys: Unique identifier for the user/session of each event.
+
+        Raises:
+            RuntimeError: If the dispatcher is closed or a worker has failed.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        with self._submit_lock:
+            self._check_open()
+            # Stay within max_pending (or one batch past it) decisions that have not been read
+            for start in range(0, len(keys), self._max_pending):
+                end = min(start + self._max_pending, len(keys))
+                self._reserve(end - start)
+                self._partition(timestamps[start:end], event_ids[start:end], keys[start:end])
+
+    def _check_open(self) -> None:
+        """
+        Raises if no more events can be submitted.
+        """
+        if self._closed:
+            raise RuntimeError("The dispatcher is closed")
+        if self._error is not None:
+            raise RuntimeError("A throttler worker failed") from self._error
+
+    def _reserve(self, count: int) -> None:
+        """
+        Waits for room for count undecided or unread events.
+
+        Must be called with the submit lock held. Buffered events count as
+        pending but are only decided once handed off, so every buffer is
+        handed off before waiting; otherwise room might never be made.
+        """
+        with self._condition:
+            full = self._pending and self._pending + count > self._max_pending
+        if full:
+            for worker in range(self._worker_count):
+                self._hand_off(worker)
+        with self._condition:
+            while self._pending and self._pending + count > self._max_pending:
+                if self._error is not None:
+                    break
+                self._condition.wait()
+            self._check_open()
+            self._pending += count
+
+    def _partition(self, timestamps: Sequence[int], event_ids: Sequence[str], keys: Sequence[str]) -> None:
+        """
+        Buffers events per worker, handing off every buffer that fills up.
+        """
+        workers = self._worker_count
+        buffers = self._buffers
+        sequence = self._next_sequence
+        self._next_sequence += len(keys)
+        for timestamp, event_id, key in zip(timestamps, event_ids, keys):
+            worker = hash(key) % workers
+            buffer = buffers[worker]
+            buffer[0].append(sequence)
+            buffer[1].append(timestamp)
+            buffer[2].append(event_id)
+            buffer[3].append(key)
+            sequence += 1
+            if len(buffer[0]) >= self._batch_size:
+                self._hand_off(worker)
+
+    def _hand_off(self, worker: int) -> None:
+        """
+        Sends a worker its buffered events, blocking while its queue is full.
+        """
+        buffer = self._buffers[worker]
+        if not buffer[0]:
+            return
+        self._buffers[worker] = ([], [], [], [])
+        batch_id = self._next_batch
+        self._next_batch += 1
+        with self._condition:
+            self._in_flight[batch_id] = buffer
+        self._inboxes[worker].put((batch_id, buffer[1], buffer[2], buffer[3]))
+
+    def flush(self) -> None:
+        """
+        Hands off every buffered event, without waiting for the decisions.
+        """
+        with self._submit_lock:
+            for worker in range(self._worker_count):
+                self._hand_off(worker)
+
+    def _collect(self) -> None:
+        """
+        Receives decisions from the workers until all of them have stopped.
+        """
+        running = self._worker_count
+        while running:
+            result = self._outbox.get()
+            if result is None:
+                running -= 1
+                continue
+            if isinstance(result, _WorkerFailed):
+                logger.error(f"Throttler worker {result.worker} failed: {result.error!r}")
+                with self._condition:
+                    if self._error is None:
+                        self._error = result.error
+                    self._condition.notify_all()
+                continue
+
+            batch_id, mask = result
+            with self._condition:
+                sequences, timestamps, event_ids, keys = self._in_flight.pop(batch_id)
+                if self._callback is None:
+                    decisions = self._decisions
+                    for sequence, timestamp, event_id, key, processed in zip(
+                            sequences, timestamps, event_ids, keys, mask):
+                        decisions[sequence] = (timestamp, event_id, key, bool(processed))
+                    self._condition.notify_all()
+                    continue
+            callback = self._callback
+            for timestamp, event_id, key, processed in zip(timestamps, event_ids, keys, mask):
+                try:
+                    callback(timestamp, event_id, key, bool(processed))
+                except Exception:
+                    logger.exception("Decision callback failed")
+            with self._condition:
+                self._pending -= len(mask)
+                self._condition.notify_all()
+
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def results(self) -> Iterator[Decision]:
+        """
+        Yields decisions in submission order as they become available.
+
+        Read from a different thread than the one submitting events, or
+        interleave reads with submissions, since submitting blocks once
+        max_pending decisions are unread. Buffered events are not decided
+        until their batch fills up or flush() or close() is called.
+
+        Yields:
+            (timestamp, event_id, key, processed) for each submitted event.
+
+        Raises:
+            RuntimeError: If the dispatcher was created with a callback, or
+                if a worker has failed.
+        """
+        if self._callback is not None:
+            raise RuntimeError("Decisions are reported to the callback")
+        return self._iterate_results()
+
+    def _iterate_results(self) -> Iterator[Decision]:
+        """
+        Generator behind results().
+        """
+        while True:
+            with self._condition:
+                while self._next_result not in self._decisions:
+                    if self._error is not None:
+                        raise RuntimeError("A throttler worker failed") from self._error
+                    if self._finished:
+                        return
+                    self._condition.wait()
+                ready = []
+                while self._next_result in self._decisions:
+                    ready.append(self._decisions.pop(self._next_result))
+                    self._next_result += 1
+                self._pending -= len(ready)
+                self._condition.notify_all()
+            yield from ready
+
+    def close(self) -> None:
+        """
+        Hands off the buffered events, stops the workers and waits for every
+        decision to be made. Decisions can still be read from results().
+
+        Raises:
+            RuntimeError: If a worker failed.
+        """
+        with self._submit_lock:
+            if not self._closed:
+                for worker in range(self._worker_count):
+                    self._hand_off(worker)
+                self._closed = True
+                for inbox in self._inboxes:
+                    inbox.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._collector.join()
+        logger.info("KeyAffinityDispatcher has been closed")
+        if self._error is not None:
+            raise RuntimeError("A throttler worker failed") from self._error
+
+    def __enter__(self) -> "KeyAffinityDispatcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the number of workers.
+
+        Returns:
+            int: Number of worker threads or processes.
+        """
+        return self._worker_count
@@ -0,0 +1,101 @@
+"""
+Throughput and memory benchmark for the rate-limiting algorithms.
+
+For the default first-event rule and each algorithm (GCRA, token bucket and
+sliding window counter), this script fills an EventThrottler with --keys keys
+in a fresh child process and reports the memory held per key (tracemalloc),
+then measures should_process throughput on the same pregenerated events.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from algorithms import GCRA, TokenBucket, SlidingWindowCounter
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+ALGORITHMS = {
+    "first-event": lambda limit: None,
+    "gcra": lambda limit: GCRA(limit),
+    "token-bucket": lambda limit: TokenBucket(limit),
+    "sliding-window": lambda limit: SlidingWindowCounter(limit),
+}
+
+def fill(name, num_keys, limit, results):
+    """
+    Fills a throttler with num_keys keys and reports the memory it holds.
+
+    Runs in a child process so that each measurement starts from a clean heap.
+    """
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    tracemalloc.start()
+    throttler = EventThrottler(window=10, max_keys=num_keys, algorithm=ALGORITHMS[name](limit))
+    should_process = throttler.should_process
+    for i in range(num_keys):
+        # Two events per key, so every key has a state that is not its first
+        should_process(i // 1000, "e", f"session{i}")
+        should_process(i // 1000, "e", f"session{i}")
+    results.put(tracemalloc.get_traced_memory()[0])
+
+def measure_memory(name, num_keys, limit):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=fill, args=(name, num_keys, limit, results))
+    process.start()
+    traced = results.get()
+    process.join()
+    return traced
+
+def measure_throughput(name, events, limit):
+    """
+    Returns should_process events per second and the fraction processed.
+    """
+    throttler = EventThrottler(window=10, algorithm=ALGORITHMS[name](limit))
+    should_process = throttler.should_process
+    processed = 0
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        processed += should_process(timestamp, event_id, key)
+    elapsed = time.perf_counter() - start_time
+    return len(events) / elapsed, processed / len(events)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS))
+    parser.add_argument("--keys", type=int, default=1_000_000, help="keys for the memory measurement")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--event-keys", type=int, default=10_000, help="distinct keys in the throughput events")
+    parser.add_argument("--limit", type=int, default=5, help="events allowed per window")
+    parser.add_argument("--no-memory", action="store_true", help="skip the memory measurement")
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+
+    rng = random.Random(0)
+    events = [(i // 20_000, f"e{i}", f"user{rng.randrange(args.event_keys)}") for i in range(args.events)]
+
+    for name in args.algorithms:
+        events_per_sec, processed = measure_throughput(name, events, args.limit)
+        memory_text = ""
+        if not args.no_memory:
+            traced = measure_memory(name, args.keys, args.limit)
+            memory_text = f" memory={traced / args.keys:6.1f} bytes/key at {args.keys:,} keys"
+        logger.info(f"{name:<15} events/sec={events_per_sec:>10,.0f} processed={processed:6.1%}{memory_text}")
+
+if __name__ == "__main__":
+    main()
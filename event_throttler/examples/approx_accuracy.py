@@ -0,0 +1,111 @@
+"""
+Accuracy-versus-memory harness for ApproximateEventThrottler.
+
+This script replays uniformly distributed keys (as from anonymous or IP
+traffic) through an EventThrottler and through ApproximateEventThrottler at
+several sketch sizes. For each size it reports the measured false-throttle
+rate (events throttled although their key had not been processed for a
+window), the rate predicted from the keys active per window, keys processed
+twice within a window (always 0), agreement with EventThrottler and
+throughput for per-event and batch calls.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from approx_throttler import ApproximateEventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def score(events, decisions, window):
+    """
+    Returns false throttles and repeats within a window, from the decisions alone.
+    """
+    last_processed = {}
+    false_throttles = 0
+    repeats = 0
+    for (timestamp, _, key), processed in zip(events, decisions):
+        last = last_processed.get(key)
+        idle = last is None or timestamp - last >= window
+        if processed:
+            repeats += not idle
+            last_processed[key] = timestamp
+        elif idle:
+            false_throttles += 1
+    return false_throttles, repeats
+
+def active_keys_per_window(events, window):
+    """
+    Returns the mean number of distinct keys per window of event time.
+    """
+    windows = {}
+    for timestamp, _, key in events:
+        windows.setdefault(timestamp // window, set()).add(key)
+    return sum(map(len, windows.values())) / len(windows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=10_000_000, help="distinct keys to draw from")
+    parser.add_argument("--rate", type=int, default=20_000, help="events per second of event time")
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--memory", type=int, nargs="+", default=[1 << 20, 4 << 20, 16 << 20, 64 << 20],
+                        help="sketch sizes in bytes")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    for module in ("throttler", "approx_throttler"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    rng = random.Random(0)
+    events = [(i // args.rate, f"e{i}", f"10.{rng.randrange(args.keys)}") for i in range(args.events)]
+    active = active_keys_per_window(events, args.window)
+
+    exact = EventThrottler(window=args.window, max_keys=args.events)
+    should_process = exact.should_process
+    start_time = time.perf_counter()
+    expected = [should_process(*event) for event in events]
+    logger.info(f"EventThrottler       events/sec={args.events / (time.perf_counter() - start_time):>10,.0f} "
+                f"keys={exact.get_key_count():,} active per window={active:,.0f}")
+
+    for memory in args.memory:
+        throttler = ApproximateEventThrottler(window=args.window, memory_bytes=memory, rows=args.rows)
+        should_process = throttler.should_process
+        start_time = time.perf_counter()
+        decisions = [should_process(*event) for event in events]
+        per_event = args.events / (time.perf_counter() - start_time)
+
+        batched = ApproximateEventThrottler(window=args.window, memory_bytes=memory, rows=args.rows)
+        batch_decisions = []
+        start_time = time.perf_counter()
+        for start in range(0, args.events, args.batch_size):
+            batch_decisions.extend(batched.should_process_batch(*zip(*events[start:start + args.batch_size])))
+        per_batch = args.events / (time.perf_counter() - start_time)
+
+        false_throttles, repeats = score(events, decisions, args.window)
+        batch_false_throttles, batch_repeats = score(events, batch_decisions, args.window)
+        agreement = sum(a == b for a, b in zip(decisions, expected)) / args.events
+        logger.info(f"memory={memory / 2 ** 20:7.1f} MiB "
+                    f"false throttles={false_throttles / args.events:8.4%} "
+                    f"(batch {batch_false_throttles / args.events:8.4%}, "
+                    f"predicted {throttler.estimate_false_throttle_rate(round(active)):8.4%}) "
+                    f"repeats={repeats + batch_repeats} agreement={agreement:8.4%} "
+                    f"events/sec={per_event:>10,.0f} batch events/sec={per_batch:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput benchmark for the asyncio throttling pipeline.
+
+This script pushes pregenerated events through a bounded asyncio.Queue into
+throttle_pipeline and reports end-to-end events/sec for several batch sizes,
+next to awaiting AsyncEventThrottler.should_process once per event.
+"""
+import sys
+import time
+import asyncio
+import logging
+import random
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from async_throttler import AsyncEventThrottler, throttle_pipeline
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, seed=0):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 10_000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+async def run_pipeline(events, batch_size, queue_size):
+    """
+    Returns (elapsed seconds, processed events) for one pipeline run.
+    """
+    queue = asyncio.Queue(maxsize=queue_size)
+    throttler = AsyncEventThrottler(window=5)
+
+    async def produce():
+        for event in events:
+            await queue.put(event)
+        await queue.put(None)
+
+    start_time = time.perf_counter()
+    producer = asyncio.ensure_future(produce())
+    processed = 0
+    async for _ in throttle_pipeline(queue, throttler, batch_size=batch_size):
+        processed += 1
+    await producer
+    return time.perf_counter() - start_time, processed
+
+async def run_per_event(events):
+    """
+    Returns (elapsed seconds, processed events) awaiting should_process per event.
+    """
+    throttler = AsyncEventThrottler(window=5)
+    start_time = time.perf_counter()
+    processed = 0
+    for timestamp, event_id, key in events:
+        if await throttler.should_process(timestamp, event_id, key):
+            processed += 1
+    return time.perf_counter() - start_time, processed
+
+async def main(args):
+    events = generate_events(args.events, args.keys)
+
+    elapsed, processed = await run_per_event(events)
+    logger.info(f"{'per-event await':<22} events/sec={len(events) / elapsed:>12,.0f} "
+                f"processed={processed}")
+
+    for batch_size in args.batch_sizes:
+        elapsed, processed = await run_pipeline(events, batch_size, args.queue_size)
+        logger.info(f"{f'pipeline batch={batch_size}':<22} events/sec={len(events) / elapsed:>12,.0f} "
+                    f"processed={processed}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--queue-size", type=int, default=8192)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024])
+    arguments = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    asyncio.run(main(arguments))
@@ -0,0 +1,93 @@
+"""
+Speedup benchmark for EventThrottler.should_process_batch.
+
+This script compares deciding micro-batches with should_process_batch against
+calling should_process once per event, for a few batch sizes and key counts.
+Install NumPy to use the vectorized batch path; without it the batch call
+still saves the per-event lock acquisition and method call.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+import throttler as throttler_module
+from throttler import EventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_batches(num_batches, batch_size, num_keys, events_per_second, seed):
+    """
+    Pregenerate micro-batches of events with non-decreasing timestamps.
+
+    Returns:
+        List of (timestamps, event_ids, keys) tuples, one per batch.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    batches = []
+    event_number = 0
+    for _ in range(num_batches):
+        timestamps, event_ids, batch_keys = [], [], []
+        for _ in range(batch_size):
+            timestamps.append(event_number // events_per_second)
+            event_ids.append(f"e{event_number}")
+            batch_keys.append(rng.choice(keys))
+            event_number += 1
+        batches.append((timestamps, event_ids, batch_keys))
+    return batches
+
+def time_scalar(batches, window):
+    throttler = EventThrottler(window=window)
+    should_process = throttler.should_process
+    start_time = time.perf_counter()
+    for timestamps, event_ids, keys in batches:
+        for timestamp, event_id, key in zip(timestamps, event_ids, keys):
+            should_process(timestamp, event_id, key)
+    return time.perf_counter() - start_time
+
+def time_batch(batches, window):
+    throttler = EventThrottler(window=window)
+    start_time = time.perf_counter()
+    for timestamps, event_ids, keys in batches:
+        throttler.should_process_batch(timestamps, event_ids, keys)
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--events-per-second", type=int, default=50_000)
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    logger.info(f"NumPy {'available' if throttler_module.np is not None else 'not installed'}")
+
+    for batch_size in args.batch_sizes:
+        for num_keys in args.keys:
+            batches = generate_batches(args.events // batch_size, batch_size, num_keys,
+                                       args.events_per_second, seed=batch_size)
+            total_events = len(batches) * batch_size
+            scalar_time = time_scalar(batches, args.window)
+            batch_time = time_batch(batches, args.window)
+            logger.info(f"batch={batch_size:<7} keys={num_keys:<7} "
+                        f"scalar={total_events / scalar_time:>12,.0f} ev/s  "
+                        f"batch={total_events / batch_time:>12,.0f} ev/s  "
+                        f"speedup={scalar_time / batch_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Throughput and memory benchmark for the python -m event_throttler CLI.
+
+This script writes a generated event file in each format to a temporary
+directory, then runs the CLI on it in a child process with output discarded,
+and reports events/sec and the CLI process's peak RSS. Run it with two --lines
+values to check that memory use does not grow with the input size.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import random
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from cli import BINARY_MAGIC, pack_binary_event
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_file(path, fmt, num_lines, num_keys, seed=0):
+    """
+    Writes num_lines events, 1000 per second, with keys drawn uniformly.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    with open(path, "wb") as event_file:
+        if fmt == "binary":
+            event_file.write(BINARY_MAGIC)
+        elif fmt == "csv":
+            event_file.write(b"timestamp,event_id,key\n")
+        for start in range(0, num_lines, 100_000):
+            events = [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(start, min(start + 100_000, num_lines))]
+            if fmt == "binary":
+                event_file.write(b"".join(pack_binary_event(*event) for event in events))
+            elif fmt == "csv":
+                event_file.write("".join(f"{t},{e},{k}\n" for t, e, k in events).encode("utf-8"))
+            else:
+                event_file.write("".join(
+                    json.dumps({"timestamp": t, "event_id": e, "key": k}) + "\n" for t, e, k in events
+                ).encode("utf-8"))
+
+def run_cli(path, extra_args):
+    """
+    Runs the CLI on path and returns the elapsed seconds and the peak RSS in MiB.
+    """
+    command = [sys.executable, "-m", "event_throttler", "-q", "-w", "5", *extra_args, path]
+    start_time = time.perf_counter()
+    process = subprocess.Popen(command, cwd=str(Path(parent_dir).parent), stdout=subprocess.DEVNULL)
+    # wait4 reports the resource usage of this child alone (ru_maxrss is in KiB on Linux)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start_time
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return elapsed, usage.ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1_000_000, 4_000_000])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "binary"])
+    args = parser.parse_args()
+
+    extensions = {"csv": ".csv", "jsonl": ".jsonl", "binary": ".bin"}
+    with tempfile.TemporaryDirectory() as directory:
+        for num_lines in args.lines:
+            for fmt in args.formats:
+                path = os.path.join(directory, f"events{extensions[fmt]}")
+                generate_file(path, fmt, num_lines, args.keys)
+                size_mb = os.path.getsize(path) / 2 ** 20
+                for mode, extra_args in (("processed", []), ("decisions", ["--decisions"])):
+                    elapsed, peak_rss_mb = run_cli(path, extra_args)
+                    logger.info(f"{fmt:<6} {mode:<9} lines={num_lines:>10,} ({size_mb:7.1f} MiB) "
+                                f"events/sec={num_lines / elapsed:>10,.0f} peak RSS={peak_rss_mb:6.1f} MiB")
+                os.remove(path)
+
+if __name__ == "__main__":
+    main()
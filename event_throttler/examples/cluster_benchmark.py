@@ -0,0 +1,113 @@
+"""
+Throughput benchmark for cluster mode by number of nodes.
+
+For each node count, this script starts that many ThrottlerServer processes
+on this host and replays pregenerated events through a ClusterClient, with
+--pipeline batches of --batch-size events in flight at a time. Each client
+runs in its own process; --clients runs several at once on disjoint keys.
+Plain EventThrottler throughput on the same events is shown for reference.
+"""
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from cluster import ClusterClient, start_server_process
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, prefix, seed):
+    """
+    Pregenerate events, 20,000 per second of event time.
+    """
+    rng = random.Random(seed)
+    return [(i // 20_000, f"e{i}", f"{prefix}user{rng.randrange(num_keys)}") for i in range(num_events)]
+
+async def replay(nodes, events, batch_size, pipeline):
+    """
+    Sends the events in batches, keeping up to pipeline batches in flight.
+    """
+    batches = [tuple(zip(*events[start:start + batch_size])) for start in range(0, len(events), batch_size)]
+    async with ClusterClient(nodes) as client:
+        async def worker(offset):
+            for batch in batches[offset::pipeline]:
+                await client.should_process_batch(*batch)
+        await asyncio.gather(*(worker(offset) for offset in range(pipeline)))
+
+def run_client(nodes, args, index, ready, results):
+    """
+    Runs one client, starting when every client is ready.
+    """
+    logging.getLogger("event_throttler.cluster").setLevel(logging.WARNING)
+    events = generate_events(args.events, args.keys, f"c{index}", seed=index)
+    ready.wait()
+    start_time = time.perf_counter()
+    asyncio.run(replay(nodes, events, args.batch_size, args.pipeline))
+    results.put((start_time, time.perf_counter()))
+
+def measure(nodes, args):
+    """
+    Returns the events per second of all clients together.
+    """
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(args.clients)
+    results = context.Queue()
+    clients = [
+        context.Process(target=run_client, args=(nodes, args, index, ready, results))
+        for index in range(args.clients)
+    ]
+    for client in clients:
+        client.start()
+    spans = [results.get() for _ in clients]
+    for client in clients:
+        client.join()
+    elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+    return args.events * args.clients / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--events", type=int, default=1_000_000, help="events per client")
+    parser.add_argument("--keys", type=int, default=100_000, help="distinct keys per client")
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--pipeline", type=int, default=4, help="batches in flight per client")
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+
+    events = generate_events(args.events, args.keys, "c0", seed=0)
+    throttler = EventThrottler(window=args.window)
+    start_time = time.perf_counter()
+    throttler.should_process_batch(*zip(*events))
+    logger.info(f"local          events/sec={args.events / (time.perf_counter() - start_time):>10,.0f}")
+
+    for count in args.nodes:
+        servers = [start_server_process(window=args.window) for _ in range(count)]
+        try:
+            events_per_sec = measure([address for _, address in servers], args)
+        finally:
+            for process, _ in servers:
+                process.terminate()
+                process.join()
+        logger.info(f"nodes={count:<8} events/sec={events_per_sec:>10,.0f} "
+                    f"clients={args.clients} batch={args.batch_size} pipeline={args.pipeline}")
+
+if __name__ == "__main__":
+    main()
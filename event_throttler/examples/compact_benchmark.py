@@ -0,0 +1,103 @@
+"""
+Memory and latency benchmark for CompactEventThrottler.
+
+For each key count this script fills an EventThrottler and a
+CompactEventThrottler in a fresh child process and reports the memory held
+by the throttler (tracemalloc, which follows Python allocations exactly) and
+the growth of the child's peak RSS. It then compares steady-state
+should_process latency on the same pregenerated events.
+"""
+import sys
+import time
+import logging
+import resource
+import argparse
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from compact_throttler import CompactEventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+THROTTLERS = {"EventThrottler": EventThrottler, "CompactEventThrottler": CompactEventThrottler}
+
+def fill(name, num_keys, use_tracemalloc, results):
+    """
+    Fills one throttler with num_keys keys and reports the memory it holds.
+
+    Runs in a child process so that each measurement starts from a clean heap.
+    Keys are created on the fly and not kept, exactly as in a real stream.
+    """
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    logging.getLogger("event_throttler.compact_throttler").setLevel(logging.WARNING)
+    if use_tracemalloc:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    throttler = THROTTLERS[name](window=10, max_keys=num_keys)
+    for i in range(num_keys):
+        throttler.should_process(1, "e", f"session{i}")
+    traced = tracemalloc.get_traced_memory()[0] if use_tracemalloc else 0
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024
+    results.put((traced, rss_growth))
+
+def measure_memory(name, num_keys, use_tracemalloc):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=fill, args=(name, num_keys, use_tracemalloc, results))
+    process.start()
+    traced, rss_growth = results.get()
+    process.join()
+    return traced, rss_growth
+
+def measure_latency(throttler_class, events, num_keys):
+    """
+    Returns the mean should_process latency in microseconds once all keys exist.
+    """
+    throttler = throttler_class(window=5, max_keys=num_keys)
+    should_process = throttler.should_process
+    for timestamp, event_id, key in events:
+        should_process(timestamp, event_id, key)
+
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        should_process(timestamp + 1000, event_id, key)
+    return (time.perf_counter() - start_time) / len(events) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="key counts to measure; 10000000 needs several GB for EventThrottler")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="skip tracemalloc, which slows filling down several times")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    logging.getLogger("event_throttler.compact_throttler").setLevel(logging.WARNING)
+
+    for num_keys in args.sizes:
+        for name in THROTTLERS:
+            traced, rss_growth = measure_memory(name, num_keys, not args.no_tracemalloc)
+            traced_text = f"{traced / num_keys:6.1f} bytes/key" if traced else "           n/a"
+            logger.info(f"{name:<22} keys={num_keys:>10,} traced={traced_text} "
+                        f"rss growth={rss_growth / num_keys:6.1f} bytes/key")
+
+    events = [(i // 1000, f"e{i}", f"session{i % args.keys}") for i in range(args.events)]
+    for name, throttler_class in THROTTLERS.items():
+        latency = measure_latency(throttler_class, events, args.keys)
+        logger.info(f"{name:<22} should_process {latency:.3f}us/event")
+
+if __name__ == "__main__":
+    main()
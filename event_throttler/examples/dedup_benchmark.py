@@ -0,0 +1,114 @@
+"""
+Deduplication overhead benchmark.
+
+This script measures the per-event cost that a deduplicator adds to
+EventThrottler.should_process and should_process_batch, for the exact
+EventDeduplicator and the BloomEventDeduplicator, on events where a share
+of deliveries are retries of earlier events. It also reports the memory the
+deduplicator holds once the horizon is full.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+import tracemalloc
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from dedup import EventDeduplicator, BloomEventDeduplicator
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, rate, retry_share, seed):
+    """
+    Pregenerate events, retrying a share of them a few seconds later.
+    """
+    rng = random.Random(seed)
+    events = []
+    for i in range(num_events):
+        timestamp = i // rate
+        if events and rng.random() < retry_share:
+            _, event_id, key = events[rng.randrange(max(0, len(events) - 5 * rate), len(events))]
+            events.append((timestamp, event_id, key))
+        else:
+            events.append((timestamp, f"evt-{i:012d}", f"user{rng.randrange(num_keys)}"))
+    return events
+
+def measure(throttler, events, batch_size):
+    """
+    Returns events/sec per event and in batches of batch_size.
+    """
+    should_process = throttler.should_process
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        should_process(timestamp, event_id, key)
+    per_event = len(events) / (time.perf_counter() - start_time)
+
+    throttler.clear()
+    batches = [tuple(zip(*events[start:start + batch_size])) for start in range(0, len(events), batch_size)]
+    start_time = time.perf_counter()
+    for batch in batches:
+        throttler.should_process_batch(*batch)
+    per_batch = len(events) / (time.perf_counter() - start_time)
+    return per_event, per_batch
+
+def dedup_memory(factory, events):
+    """
+    Returns the bytes traced for a deduplicator after it has seen the events.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dedup = factory()
+    for timestamp, event_id, _ in events:
+        dedup.is_duplicate(timestamp, event_id)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--keys", type=int, default=50_000)
+    parser.add_argument("--rate", type=int, default=1000, help="events per second of event time")
+    parser.add_argument("--retry-share", type=float, default=0.05)
+    parser.add_argument("--horizon", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+
+    events = generate_events(args.events, args.keys, args.rate, args.retry_share, seed=0)
+    ids_per_horizon = args.rate * args.horizon
+    variants = [
+        ("None", None),
+        ("EventDeduplicator", lambda: EventDeduplicator(horizon=args.horizon)),
+        ("BloomEventDeduplicator", lambda: BloomEventDeduplicator(horizon=args.horizon, capacity=ids_per_horizon)),
+    ]
+
+    baseline = None
+    for name, factory in variants:
+        throttler = EventThrottler(window=10, dedup=factory() if factory else None)
+        per_event, per_batch = measure(throttler, events, args.batch_size)
+        if baseline is None:
+            baseline = per_event
+            extra = "memory=        -"
+        else:
+            memory = dedup_memory(factory, events)
+            extra = f"memory={memory / 2 ** 20:6.1f} MiB"
+        logger.info(f"{name:<24} events/sec={per_event:>10,.0f} "
+                    f"(+{1e9 / per_event - 1e9 / baseline:5.0f} ns/event) "
+                    f"batch events/sec={per_batch:>10,.0f} {extra}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Dispatcher benchmark for KeyAffinityDispatcher.
+
+This script compares the locked approach of usage_example.threaded_example,
+where several ingest threads call should_process on one shared
+EventThrottler, with a KeyAffinityDispatcher that partitions the same events
+by key onto worker threads or processes that each own a private throttler.
+Every run decides the same events and reports events per second; dispatcher
+runs count the time until the last decision has been read.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+from pathlib import Path
+from threading import Thread, Barrier
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from dispatcher import KeyAffinityDispatcher
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, seed):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def run_locked(events, threads, window):
+    """
+    Splits the events over threads sharing one EventThrottler, as threaded_example does.
+    """
+    throttler = EventThrottler(window=window)
+    barrier = Barrier(threads + 1)
+
+    def worker(part):
+        should_process = throttler.should_process
+        barrier.wait()
+        for timestamp, event_id, key in part:
+            should_process(timestamp, event_id, key)
+
+    workers = [Thread(target=worker, args=(events[i::threads],)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start_time
+
+def run_dispatcher(events, workers, window, processes, chunk):
+    """
+    Feeds the events to a KeyAffinityDispatcher in chunks and reads every decision.
+    """
+    dispatcher = KeyAffinityDispatcher(workers, window=window, processes=processes)
+    start_time = time.perf_counter()
+
+    def produce():
+        for start in range(0, len(events), chunk):
+            dispatcher.submit_batch(*zip(*events[start:start + chunk]))
+        dispatcher.close()
+
+    producer = Thread(target=produce)
+    producer.start()
+    decided = sum(1 for _ in dispatcher.results())
+    producer.join()
+    elapsed = time.perf_counter() - start_time
+    assert decided == len(events)
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--events", type=int, default=400_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=4096, help="events submitted per submit_batch call")
+    parser.add_argument("--window", type=int, default=5)
+    args = parser.parse_args()
+
+    # Keep the throttlers' own logging out of the measurement
+    for module in ("throttler", "dispatcher"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    logger.info(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}")
+
+    events = generate_events(args.events, args.keys, seed=0)
+    for workers in args.workers:
+        runs = [
+            ("Locked threads", lambda: run_locked(events, workers, args.window)),
+            ("Dispatcher threads", lambda: run_dispatcher(events, workers, args.window, False, args.chunk)),
+            ("Dispatcher processes", lambda: run_dispatcher(events, workers, args.window, True, args.chunk)),
+        ]
+        for name, run in runs:
+            elapsed = run()
+            logger.info(f"{name:<22} workers={workers:<3} events/sec={args.events / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Hierarchy benchmark for HierarchicalThrottler.
+
+This script throttles events per user, per account and against a global
+GCRA cap in two ways: by composing three EventThrottlers (user, then
+account, then global, stopping at the first rejection), and with one
+HierarchicalThrottler. It reports events per second by thread count, and
+how many single-threaded decisions of the composition differ from the
+atomic ones, because an earlier level recorded an event that a later level
+rejected.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+from threading import Thread, Barrier
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from hierarchy import HierarchicalThrottler
+from algorithms import GCRA
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+class ComposedThrottler:
+    """
+    One EventThrottler per level, each with its own lock.
+    """
+
+    def __init__(self, windows, global_limit):
+        self.levels = [EventThrottler(window=windows[0]), EventThrottler(window=windows[1]),
+                       EventThrottler(window=windows[2], algorithm=GCRA(limit=global_limit))]
+
+    def should_process(self, timestamp, event_id, keys):
+        user, account, cap = self.levels
+        return (user.should_process(timestamp, event_id, keys[0])
+                and account.should_process(timestamp, event_id, keys[1])
+                and cap.should_process(timestamp, event_id, keys[2]))
+
+def generate_events(num_events, num_users, rate, seed):
+    """
+    Pregenerate events from users spread over accounts of 10 users.
+    """
+    rng = random.Random(seed)
+    events = []
+    for i in range(num_events):
+        user = rng.randrange(num_users)
+        events.append((i // rate, f"e{i}", (f"user{user}", f"account{user // 10}", "global")))
+    return events
+
+def run_threads(throttler, workloads):
+    """
+    Runs one thread per workload and returns the elapsed wall-clock time.
+    """
+    barrier = Barrier(len(workloads) + 1)
+
+    def worker(events):
+        should_process = throttler.should_process
+        barrier.wait()
+        for timestamp, event_id, keys in events:
+            should_process(timestamp, event_id, keys)
+
+    threads = [Thread(target=worker, args=(events,)) for events in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--events", type=int, default=300_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--rate", type=int, default=2000, help="events per second of event time")
+    parser.add_argument("--windows", type=int, nargs=3, default=[5, 1, 10], help="user, account and global windows")
+    parser.add_argument("--global-limit", type=int, default=10_000, help="events per global window")
+    args = parser.parse_args()
+
+    for module in ("throttler", "hierarchy"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    algorithms = [None, None, GCRA(limit=args.global_limit)]
+    factories = [
+        ("Composed", lambda: ComposedThrottler(args.windows, args.global_limit)),
+        ("Hierarchical", lambda: HierarchicalThrottler(args.windows, algorithms=algorithms)),
+    ]
+
+    events = generate_events(args.events, args.users, args.rate, seed=0)
+    composed = ComposedThrottler(args.windows, args.global_limit)
+    hierarchical = HierarchicalThrottler(args.windows, algorithms=algorithms)
+    differences = sum(composed.should_process(*event) != hierarchical.should_process(*event) for event in events)
+    logger.info(f"Composed decisions that differ from atomic ones: {differences:,} of {args.events:,}")
+
+    for thread_count in args.threads:
+        workloads = [events[i::thread_count] for i in range(thread_count)]
+        for name, factory in factories:
+            elapsed = run_threads(factory(), workloads)
+            logger.info(f"{name:<14} threads={thread_count:<3} events/sec={args.events / elapsed:>10,.0f}")
+
+if __name__ == "__main__":
+    main()
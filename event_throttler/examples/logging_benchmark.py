@@ -0,0 +1,84 @@
+"""
+Per-call logging overhead benchmark for EventThrottler.should_process.
+
+This script measures the average cost of a should_process call with the
+throttler's logger at WARNING, INFO and DEBUG level, with DEBUG records
+written to a file either through the background queue listener or directly
+from the calling thread, and with sampled throttle logging.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from logger import setup_logger, stop_listeners
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO,
+    use_queue=False
+)
+
+def generate_events(num_events, num_keys, seed=0):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def time_per_call(events, log_sample_rate):
+    """
+    Returns the average should_process cost in nanoseconds.
+    """
+    throttler = EventThrottler(window=5, log_sample_rate=log_sample_rate)
+    should_process = throttler.should_process
+    start_time = time.perf_counter_ns()
+    for timestamp, event_id, key in events:
+        should_process(timestamp, event_id, key)
+    return (time.perf_counter_ns() - start_time) / len(events)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    args = parser.parse_args()
+
+    events = generate_events(args.events, args.keys)
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        scenarios = [
+            ("WARNING", logging.WARNING, True, 1),
+            ("INFO", logging.INFO, True, 1),
+            ("DEBUG queued", logging.DEBUG, True, 1),
+            ("DEBUG queued 1/100", logging.DEBUG, True, 100),
+            ("DEBUG direct", logging.DEBUG, False, 1),
+            ("DEBUG direct 1/100", logging.DEBUG, False, 100),
+        ]
+        for name, level, use_queue, sample_rate in scenarios:
+            setup_logger(
+                logger_name="event_throttler.throttler",
+                log_level=level,
+                log_to_console=False,
+                log_to_file=True,
+                log_dir=log_dir,
+                use_queue=use_queue
+            )
+            nanoseconds = time_per_call(events, sample_rate)
+            logger.info(f"{name:<20} {nanoseconds:>8.0f} ns/call")
+
+        # Flush queued records before the directory is removed
+        stop_listeners()
+
+if __name__ == "__main__":
+    main()
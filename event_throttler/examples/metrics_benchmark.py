@@ -0,0 +1,90 @@
+"""
+Instrumentation overhead benchmark for EventThrottler.
+
+This script measures the average cost of a should_process call without
+metrics, with metrics but no hot-key tracking, with full metrics at the
+default sample rate and with every call timed, from one thread and from
+several threads sharing the throttler. It finishes by
+printing the Prometheus exposition of the last instrumented run.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+from pathlib import Path
+from threading import Thread
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from metrics import ThrottlerMetrics, format_prometheus
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, seed=0):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def replay(throttler, events):
+    should_process = throttler.should_process
+    for timestamp, event_id, key in events:
+        should_process(timestamp, event_id, key)
+
+def time_per_call(throttler, events, threads):
+    """
+    Returns the average should_process cost in nanoseconds across all threads.
+    """
+    size = -(-len(events) // threads)
+    workers = [
+        Thread(target=replay, args=(throttler, events[start:start + size]))
+        for start in range(0, len(events), size)
+    ]
+    start_time = time.perf_counter_ns()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter_ns() - start_time) / len(events)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    events = generate_events(args.events, args.keys)
+
+    scenarios = [
+        ("metrics off", lambda: None),
+        ("metrics, no top-K", lambda: ThrottlerMetrics(top_k=0)),
+        ("metrics, top-10", lambda: ThrottlerMetrics(top_k=10)),
+        ("metrics, unsampled", lambda: ThrottlerMetrics(top_k=10, sample_rate=1)),
+    ]
+    for threads in args.threads:
+        baseline = None
+        for name, make_metrics in scenarios:
+            throttler = EventThrottler(window=5, metrics=make_metrics())
+            nanoseconds = time_per_call(throttler, events, threads)
+            baseline = baseline or nanoseconds
+            logger.info(f"threads={threads} {name:<19} {nanoseconds:>7.0f} ns/call "
+                        f"({nanoseconds / baseline - 1:+.0%})")
+
+    print(format_prometheus(throttler.get_metrics()))
+
+if __name__ == "__main__":
+    main()
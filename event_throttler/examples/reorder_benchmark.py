@@ -0,0 +1,125 @@
+"""
+Latency and throughput benchmark for ReorderBuffer by allowed lateness.
+
+This script pregenerates events whose arrival is delayed by up to --jitter
+seconds, replays them through a ReorderBuffer for each lateness value and
+reports push throughput, the wall-clock time events spend buffered, the
+share of late events and the share of decisions that differ from deciding
+the events in timestamp order. Plain EventThrottler throughput on the same
+arrivals is shown for reference.
+"""
+import sys
+import time
+import random
+import logging
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from reorder import ReorderBuffer
+from benchmarks.runner import percentile
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_arrivals(num_events, num_keys, events_per_second, jitter, seed):
+    """
+    Pregenerate events in timestamp order and in jittered arrival order.
+    """
+    rng = random.Random(seed)
+    events = [(i // events_per_second, f"e{i}", f"user{rng.randrange(num_keys)}") for i in range(num_events)]
+    delays = [rng.uniform(0, jitter) for _ in range(num_events)]
+    arrival = sorted(range(num_events), key=lambda i: events[i][0] + delays[i])
+    return events, [events[i] for i in arrival]
+
+def count_errors(decided, expected):
+    """
+    Returns how many decisions differ from the in-order ones, by timestamp and key.
+    """
+    return sum((expected - Counter(decided)).values())
+
+def run(arrival, window, lateness, batch_size):
+    """
+    Replays the arrivals through a ReorderBuffer and returns its measurements.
+    """
+    buffer = ReorderBuffer(EventThrottler(window=window), lateness=lateness, max_buffered=len(arrival))
+
+    # Throughput pass
+    decisions = []
+    start_time = time.perf_counter()
+    if batch_size:
+        for start in range(0, len(arrival), batch_size):
+            decisions.extend(buffer.push_batch(*zip(*arrival[start:start + batch_size])))
+    else:
+        push = buffer.push
+        for event in arrival:
+            decisions.extend(push(*event))
+    decisions.extend(buffer.flush())
+    elapsed = time.perf_counter() - start_time
+    stats = buffer.get_stats()
+
+    # Latency pass: time from push to release of each event
+    buffer = ReorderBuffer(EventThrottler(window=window), lateness=lateness, max_buffered=len(arrival))
+    pushed = {}
+    latencies = []
+    clock = time.perf_counter_ns
+    for timestamp, event_id, key in arrival:
+        pushed[event_id] = clock()
+        released = buffer.push(timestamp, event_id, key)
+        now = clock()
+        latencies.extend(now - pushed.pop(decision.event_id) for decision in released)
+    latencies.sort()
+
+    return {
+        "events_per_sec": len(arrival) / elapsed,
+        "p50_us": percentile(latencies, 0.5) / 1000 if latencies else 0.0,
+        "p99_us": percentile(latencies, 0.99) / 1000 if latencies else 0.0,
+        "late": stats["late"],
+        "decisions": [(d.timestamp, d.key, d.processed) for d in decisions],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--rate", type=int, default=10_000, help="events per second of event time")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--jitter", type=float, default=2.0, help="maximum arrival delay in seconds")
+    parser.add_argument("--lateness", type=int, nargs="+", default=[0, 1, 2, 5, 10])
+    parser.add_argument("--batch-size", type=int, default=0, help="use push_batch with this many events")
+    args = parser.parse_args()
+
+    for module in ("throttler", "reorder"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    events, arrival = generate_arrivals(args.events, args.keys, args.rate, args.jitter, seed=0)
+    in_order = EventThrottler(window=args.window)
+    expected = Counter((t, key, in_order.should_process(t, event_id, key)) for t, event_id, key in events)
+
+    throttler = EventThrottler(window=args.window)
+    should_process = throttler.should_process
+    start_time = time.perf_counter()
+    unordered = [(t, key, should_process(t, event_id, key)) for t, event_id, key in arrival]
+    events_per_sec = len(arrival) / (time.perf_counter() - start_time)
+    logger.info(f"no reordering  events/sec={events_per_sec:>10,.0f} "
+                f"wrong decisions={count_errors(unordered, expected) / len(events):7.3%}")
+
+    for lateness in args.lateness:
+        result = run(arrival, args.window, lateness, args.batch_size)
+        logger.info(f"lateness={lateness:<4} events/sec={result['events_per_sec']:>10,.0f} "
+                    f"buffered p50={result['p50_us']:>9,.1f}us p99={result['p99_us']:>9,.1f}us "
+                    f"late={result['late'] / len(events):7.3%} "
+                    f"wrong decisions={count_errors(result['decisions'], expected) / len(events):7.3%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Window tuning sweep with the replay engine.
+
+This script converts recorded event files (CSV, JSONL or binary, as read by
+the CLI) into an event log, or generates one with Zipfian keys, then replays
+it through one EventThrottler per candidate window across a process pool.
+It reports for each window the processed and throttled counts, processed
+events per key at the 50th, 90th and 99th percentiles and the maximum, and
+the replay throughput, followed by the wall-clock time of the whole sweep.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from itertools import accumulate
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from cli import Chunk, read_csv_chunks, read_jsonl_chunks, read_binary_chunks
+from replay import ReplayConfig, sweep, write_event_log
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+_READERS = {".csv": read_csv_chunks, ".jsonl": read_jsonl_chunks, ".bin": read_binary_chunks}
+
+def read_files(paths):
+    """
+    Yields the chunks of recorded event files, choosing the reader by extension.
+    """
+    for path in paths:
+        reader = _READERS[Path(path).suffix]
+        if reader is read_binary_chunks:
+            with open(path, "rb") as stream:
+                yield from reader(stream)
+        else:
+            with open(path, encoding="utf-8", newline="") as stream:
+                yield from reader(stream)
+
+def generate_chunks(num_events, num_keys, rate, seed, chunk_size=1_000_000):
+    """
+    Yields chunks of events, rate per second, with Zipf-like key popularity.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    cumulative = list(accumulate(1 / (rank + 1) for rank in range(num_keys)))
+    for start in range(0, num_events, chunk_size):
+        timestamps = [i // rate for i in range(start, min(start + chunk_size, num_events))]
+        chunk_keys = rng.choices(keys, cum_weights=cumulative, k=len(timestamps))
+        yield Chunk([], timestamps, [""] * len(timestamps), chunk_keys)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="*", help="recorded .csv, .jsonl or .bin event files (default: generated)")
+    parser.add_argument("--events", type=int, default=5_000_000)
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--rate", type=int, default=5000, help="generated events per second of event time")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 2, 5, 10, 20, 30, 60, 120])
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    for module in ("throttler", "replay"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "events.log")
+        chunks = read_files(args.inputs) if args.inputs else generate_chunks(args.events, args.keys, args.rate, seed=0)
+        start_time = time.perf_counter()
+        events = write_event_log(path, chunks)
+        logger.info(f"Wrote {events:,} events to the event log in {time.perf_counter() - start_time:.1f}s")
+
+        configs = [ReplayConfig(window=window) for window in args.windows]
+        start_time = time.perf_counter()
+        results = sweep(path, configs, workers=args.workers)
+        elapsed = time.perf_counter() - start_time
+
+    for result in results:
+        percentiles = result.admit_percentiles
+        logger.info(f"window={result.config.window:<5} processed={result.processed:>11,} "
+                    f"throttled={result.throttled / result.events:>6.1%} "
+                    f"per key p50/p90/p99/max={percentiles['p50']}/{percentiles['p90']}/"
+                    f"{percentiles['p99']}/{percentiles['max']} "
+                    f"events/sec={result.events_per_second:>10,.0f}")
+    logger.info(f"{len(configs)} configurations x {events:,} events in {elapsed:.1f}s "
+                f"with {args.workers or os.cpu_count()} workers "
+                f"({len(configs) * events / elapsed:,.0f} decisions/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Contention benchmark for EventThrottler and ShardedEventThrottler.
+
+This script measures how should_process throughput scales with the number of
+ingest threads for a single-lock EventThrottler and for lock-striped
+ShardedEventThrottlers. On a regular (GIL) CPython build, threads cannot run
+Python code in parallel, so the interesting number is how little throughput
+is lost to lock contention. On a free-threaded build (for example
+python3.13t), sharding lets throughput scale with the thread count.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+from pathlib import Path
+from threading import Thread, Barrier
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from sharded_throttler import ShardedEventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, seed):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+
+    Args:
+        num_events: Number of events to generate.
+        num_keys: Number of distinct keys to draw from.
+        seed: Random seed for reproducible workloads.
+
+    Returns:
+        List of (timestamp, event_id, key) tuples.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def run_threads(throttler, workloads):
+    """
+    Run one thread per workload against the throttler.
+
+    Args:
+        throttler: The throttler under test.
+        workloads: One list of events per thread.
+
+    Returns:
+        Elapsed wall-clock time in seconds.
+    """
+    barrier = Barrier(len(workloads) + 1)
+
+    def worker(events):
+        should_process = throttler.should_process
+        barrier.wait()
+        for timestamp, event_id, key in events:
+            should_process(timestamp, event_id, key)
+
+    threads = [Thread(target=worker, args=(events,)) for events in workloads]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shards", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--events-per-thread", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Keep the throttlers' own logging out of the measurement
+    logging.getLogger("event_throttler").setLevel(logging.WARNING)
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    logging.getLogger("event_throttler.sharded_throttler").setLevel(logging.WARNING)
+
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    logger.info(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled else 'disabled'}")
+
+    factories = [("EventThrottler", lambda: EventThrottler(window=5))]
+    for shards in args.shards:
+        factories.append((f"Sharded({shards})",
+                          lambda shards=shards: ShardedEventThrottler(window=5, shards=shards)))
+
+    for thread_count in args.threads:
+        workloads = [generate_events(args.events_per_thread, args.keys, seed)
+                     for seed in range(thread_count)]
+        total_events = thread_count * args.events_per_thread
+
+        for name, factory in factories:
+            elapsed = run_threads(factory(), workloads)
+            logger.info(f"{name:<16} threads={thread_count:<3} "
+                        f"events/sec={total_events / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
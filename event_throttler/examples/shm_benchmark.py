@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for SharedMemoryEventThrottler.
+
+This script starts one worker process per requested count, all sharing one
+SharedMemoryEventThrottler, and reports aggregate should_process throughput.
+Each worker draws keys from the same key space, so the workers really do
+share (and contend for) the same slots. A single-process EventThrottler is
+measured first for reference.
+"""
+import sys
+import time
+import logging
+import random
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from shm_throttler import SharedMemoryEventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def generate_events(num_events, num_keys, seed):
+    """
+    Pregenerate events so that generation cost is not part of the timing.
+    """
+    rng = random.Random(seed)
+    keys = [f"user{i}" for i in range(num_keys)]
+    return [(i // 1000, f"e{i}", rng.choice(keys)) for i in range(num_events)]
+
+def worker(throttler, num_events, num_keys, seed, start_barrier, results):
+    events = generate_events(num_events, num_keys, seed)
+    should_process = throttler.should_process
+    start_barrier.wait()
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        should_process(timestamp, event_id, key)
+    results.put(time.perf_counter() - start_time)
+    throttler.close()
+
+def run_processes(process_count, num_events, num_keys, stripes):
+    """
+    Returns aggregate events/sec for process_count workers sharing one table.
+    """
+    throttler = SharedMemoryEventThrottler(window=5, capacity=num_keys, stripes=stripes)
+    start_barrier = multiprocessing.Barrier(process_count)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(throttler, num_events, num_keys, seed, start_barrier, results)
+        )
+        for seed in range(process_count)
+    ]
+    for process in processes:
+        process.start()
+    elapsed = max(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    throttler.close()
+    throttler.unlink()
+    return process_count * num_events / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--events-per-process", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--stripes", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+    logging.getLogger("event_throttler.shm_throttler").setLevel(logging.WARNING)
+    logger.info(f"{multiprocessing.cpu_count()} CPUs available")
+
+    events = generate_events(args.events_per_process, args.keys, seed=0)
+    throttler = EventThrottler(window=5)
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        throttler.should_process(timestamp, event_id, key)
+    reference = len(events) / (time.perf_counter() - start_time)
+    logger.info(f"{'EventThrottler':<26} events/sec={reference:>12,.0f}")
+
+    for process_count in args.processes:
+        throughput = run_processes(process_count, args.events_per_process, args.keys, args.stripes)
+        logger.info(f"{f'SharedMemory processes={process_count}':<26} events/sec={throughput:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
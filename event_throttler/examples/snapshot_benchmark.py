@@ -0,0 +1,66 @@
+"""
+Snapshot and restore timing benchmark.
+
+This script fills an EventThrottler with the requested number of keys, then
+times writing a snapshot, restoring it lazily (memory-mapped) and eagerly,
+and the first lookups against the lazily restored throttler.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    logging.getLogger("event_throttler.throttler").setLevel(logging.WARNING)
+
+    throttler = EventThrottler(window=10, max_keys=args.keys)
+    for i in range(args.keys):
+        throttler.should_process(i * 10 // args.keys, f"e{i}", f"session{i}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "throttler.snap")
+
+        start_time = time.perf_counter()
+        throttler.snapshot(path)
+        logger.info(f"snapshot        {time.perf_counter() - start_time:8.3f}s "
+                    f"({os.path.getsize(path) / args.keys:.1f} bytes/key)")
+
+        start_time = time.perf_counter()
+        restored = EventThrottler.restore(path)
+        logger.info(f"lazy restore    {time.perf_counter() - start_time:8.3f}s")
+
+        step = max(1, args.keys // args.lookups)
+        start_time = time.perf_counter()
+        for i in range(0, args.keys, step):
+            restored.should_process(10, "e", f"session{i}")
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"lazy lookups    {elapsed / len(range(0, args.keys, step)) * 1e6:8.1f}us/key")
+
+        start_time = time.perf_counter()
+        EventThrottler.restore(path, lazy=False)
+        logger.info(f"eager restore   {time.perf_counter() - start_time:8.3f}s")
+
+if __name__ == "__main__":
+    main()
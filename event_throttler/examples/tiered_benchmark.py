@@ -0,0 +1,115 @@
+"""
+Hit ratio and latency benchmark for the SQLite cold tier under Zipfian traffic.
+
+For each hot-tier size (--hot, as max_keys), this script replays Zipfian
+events through an EventThrottler with a ColdStore on a temporary file and
+reports the share of events answered from memory, the share answered by the
+Bloom filter alone, throughput, per-event latency percentiles and, in a
+separate pass, the memory traced at the end. An EventThrottler of the same
+max_keys without a cold tier shows how many decisions eviction alone gets
+wrong.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the necessary modules directly
+from throttler import EventThrottler
+from cold_store import ColdStore
+from benchmarks.workloads import generate_zipfian
+from benchmarks.runner import percentile
+from logger import setup_logger
+
+logger = setup_logger(
+    logger_name="event_throttler_benchmark",
+    log_level=logging.INFO
+)
+
+def replay(throttler, events):
+    """
+    Decides every event, returning the decisions, elapsed time and sorted latencies.
+    """
+    should_process = throttler.should_process
+    clock = time.perf_counter_ns
+    decisions = []
+    latencies = []
+    start_time = time.perf_counter()
+    for timestamp, event_id, key in events:
+        before = clock()
+        decisions.append(should_process(timestamp, event_id, key))
+        latencies.append(clock() - before)
+    elapsed = time.perf_counter() - start_time
+    latencies.sort()
+    return decisions, elapsed, latencies
+
+def measure_memory(events, hot, args, path):
+    """
+    Returns the memory traced after replaying the events into a fresh tiered throttler.
+    """
+    tracemalloc.start()
+    cold = ColdStore(path)
+    throttler = EventThrottler(window=args.window, max_keys=hot, cleanup_interval=args.cleanup_interval, cold_store=cold)
+    should_process = throttler.should_process
+    for event in events:
+        should_process(*event)
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    cold.close()
+    return traced
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=1_000_000, help="distinct keys in the Zipfian workload")
+    parser.add_argument("--exponent", type=float, default=0.9, help="Zipf exponent")
+    parser.add_argument("--hot", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--cleanup-interval", type=int, default=3600)
+    args = parser.parse_args()
+
+    for module in ("throttler", "cold_store"):
+        logging.getLogger(f"event_throttler.{module}").setLevel(logging.WARNING)
+
+    events = generate_zipfian(args.events, args.keys, exponent=args.exponent)
+    reference = EventThrottler(window=args.window, max_keys=args.keys, cleanup_interval=args.cleanup_interval)
+    expected, elapsed, latencies = replay(reference, events)
+    logger.info(f"unbounded      events/sec={len(events) / elapsed:>10,.0f} "
+                f"p50={percentile(latencies, 0.5) / 1000:6.2f}us p99={percentile(latencies, 0.99) / 1000:6.2f}us "
+                f"keys={reference.get_key_count():,}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for hot in args.hot:
+            evicting = EventThrottler(window=args.window, max_keys=hot, cleanup_interval=args.cleanup_interval)
+            decisions, _, _ = replay(evicting, events)
+            wrong = sum(a != b for a, b in zip(decisions, expected))
+
+            cold = ColdStore(os.path.join(directory, f"cold-{hot}.db"))
+            throttler = EventThrottler(
+                window=args.window, max_keys=hot, cleanup_interval=args.cleanup_interval, cold_store=cold
+            )
+            decisions, elapsed, latencies = replay(throttler, events)
+            stats = cold.get_stats()
+            misses = stats["loaded"] + stats["filtered"] + stats["false_positives"]
+            cold.close()
+            traced = measure_memory(events, hot, args, os.path.join(directory, f"memory-{hot}.db"))
+
+            logger.info(f"hot={hot:<10,} events/sec={len(events) / elapsed:>10,.0f} "
+                        f"p50={percentile(latencies, 0.5) / 1000:6.2f}us p99={percentile(latencies, 0.99) / 1000:6.2f}us "
+                        f"p99.9={percentile(latencies, 0.999) / 1000:7.2f}us "
+                        f"hot hits={1 - misses / len(events):6.1%} filtered={stats['filtered'] / len(events):6.1%} "
+                        f"cold loads={stats['loaded'] / len(events):6.1%} memory={traced / 2 ** 20:6.1f} MiB "
+                        f"wrong={sum(a != b for a, b in zip(decisions, expected))} "
+                        f"(evicting only: {wrong})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Hierarchical Event Throttler
+
+This module provides a HierarchicalThrottler, which throttles each event at
+several levels at once, for example per user, per account and globally. An
+event carries one key per level and is processed only if every level
+admits it; otherwise no level records it.
+
+State is spread over stripes, each with its own plain lock and one dict per
+level, like ShardedEventThrottler's shards. A decision takes the locks of
+the stripes holding its keys, always in stripe order so that concurrent
+decisions cannot deadlock, checks every level, and commits the new states
+only once all of them have admitted the event.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches return a plain list
+    np = None
+
+# Import the rate-limiting algorithms, custom logger and configuration
+from algorithms import RateAlgorithm
+from logger import get_module_logger
+from config import CLEANUP_INTERVAL, MAX_KEYS, EXPIRY_BATCH_SIZE, DEFAULT_SHARDS
+
+# Get a logger for this module
+logger = get_module_logger("hierarchy")
+
+class _Stripe:
+    """
+    The keys of every level that hash to one stripe, and the lock guarding them.
+    """
+
+    def __init__(self, levels: int):
+        self.lock = threading.Lock()
+        # Per level, ordered by the time each key last admitted an event, oldest first
+        self.states: List["OrderedDict[str, int]"] = [OrderedDict() for _ in range(levels)]
+        # Latest timestamp of a processed event, used as the expiry clock
+        self.watermark: Optional[int] = None
+        self.expired_count = 0
+        self.evicted_count = 0
+
+class HierarchicalThrottler:
+    """
+    Throttles events at several levels in one atomic decision.
+
+    Each level has its own window and, optionally, a RateAlgorithm; levels
+    without one process the first event per key per window. A global cap
+    is a level whose key is the same for every event, typically with an
+    algorithm such as GCRA(limit=...). An event that any level rejects
+    changes no state, so a rejection at the global level does not use up
+    the user's or account's allowance.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[int],
+        algorithms: Optional[Sequence[Optional[RateAlgorithm]]] = None,
+        stripes: int = DEFAULT_SHARDS,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL
+    ):
+        """
+        Initialize the HierarchicalThrottler.
+
+        Args:
+            windows: The throttling window in seconds of each level, from
+                the most specific level (such as the user) to the least.
+            algorithms: The rate-limiting algorithm of each level, or None
+                at a level (or altogether) for the first-event rule.
+            stripes: Number of independently locked stripes (default from config).
+            max_keys: Maximum number of keys to track per level.
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, counting its window (default from config).
+        """
+        if not windows:
+            raise ValueError("At least one level is required")
+        if algorithms is None:
+            algorithms = [None] * len(windows)
+        if len(algorithms) != len(windows):
+            raise ValueError("algorithms must have one entry per level")
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        for rule, window in zip(algorithms, windows):
+            if rule is not None:
+                rule.check_window(window)
+
+        self._level_count = len(windows)
+        self._windows = list(windows)
+        # None at a level stands for the first-event rule, which is applied inline
+        self._rules = list(algorithms)
+        self._stripes = [_Stripe(self._level_count) for _ in range(stripes)]
+        self._stripe_count = stripes
+        # The stripe of every level's key when there is only one stripe
+        self._single_stripe = [self._stripes[0]] * self._level_count
+        self._stripe_max_keys = max(1, math.ceil(max_keys / stripes))
+        self._cleanup_interval = cleanup_interval
+        logger.info(f"HierarchicalThrottler initialized with {self._level_count} levels, "
+                    f"windows of {', '.join(map(str, windows))} seconds and {stripes} stripes")
+
+    def should_process(self, timestamp: int, event_id: str, keys: Sequence[str]) -> bool:
+        """
+        Determines if an event should be processed at every level.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            keys: The event's key at each level, in the order of the windows.
+
+        Returns:
+            bool: True if every level admits the event, False otherwise.
+        """
+        if len(keys) != self._level_count:
+            raise ValueError(f"Expected {self._level_count} keys, one per level")
+
+        stripes = self._stripes
+        stripe_count = self._stripe_count
+        if stripe_count == 1:
+            with stripes[0].lock:
+                return self._process_locked(timestamp, keys, self._single_stripe)
+
+        indexes = [hash(key) % stripe_count for key in keys]
+        first = indexes[0]
+        if indexes.count(first) == len(indexes):
+            # Every key is in one stripe, so one lock is enough
+            stripe = stripes[first]
+            with stripe.lock:
+                return self._process_locked(timestamp, keys, [stripe] * len(indexes))
+
+        locks = [stripes[index].lock for index in sorted(set(indexes))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            return self._process_locked(timestamp, keys, [stripes[index] for index in indexes])
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[Sequence[str]]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Determines which events of a batch should be processed.
+
+        The decisions are identical to calling should_process for each event
+        in order, but every stripe lock is acquired once for the whole batch.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (not used in throttling logic).
+            keys: The key at each level of each event.
+
+        Returns:
+            A boolean mask that is True for each event that should be processed
+            (a NumPy array if NumPy is installed, otherwise a list).
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+        if any(len(event_keys) != self._level_count for event_keys in keys):
+            raise ValueError(f"Expected {self._level_count} keys, one per level, for every event")
+
+        stripes = self._stripes
+        stripe_count = self._stripe_count
+        process = self._process_locked
+        self._acquire_all()
+        try:
+            decisions = [
+                process(timestamp, event_keys, [stripes[hash(key) % stripe_count] for key in event_keys])
+                for timestamp, event_keys in zip(timestamps, keys)
+            ]
+        finally:
+            self._release_all()
+        if np is not None:
+            return np.array(decisions, dtype=bool)
+        return decisions
+
+    def _process_locked(self, timestamp: int, keys: Sequence[str], stripes: Sequence[_Stripe]) -> bool:
+        """
+        Decides one event at every level and commits only if all admit it.
+
+        Must be called with the locks of the stripes holding the keys held.
+        """
+        windows = self._windows
+        rules = self._rules
+        admitted = []
+        level = 0
+        for key, stripe in zip(keys, stripes):
+            states = stripe.states[level]
+            state = states.get(key)
+            rule = rules[level]
+            if state is None:
+                new_state = timestamp if rule is None else rule.start(timestamp, windows[level])
+            elif rule is None:
+                if timestamp - state < windows[level]:
+                    return False
+                new_state = timestamp
+            else:
+                new_state = rule.admit(state, timestamp, windows[level])
+                if new_state is None:
+                    return False
+            admitted.append((stripe, states, key, new_state, state is None, level))
+            level += 1
+
+        for stripe, states, key, new_state, is_new, level in admitted:
+            if stripe.watermark is None or timestamp > stripe.watermark:
+                stripe.watermark = timestamp
+            if is_new:
+                if len(states) >= self._stripe_max_keys:
+                    states.popitem(last=False)
+                    stripe.evicted_count += 1
+                states[key] = new_state
+                # Only new keys grow a level, so they pay for its expiry
+                self._expire(stripe, level)
+            else:
+                states[key] = new_state
+                states.move_to_end(key)
+        return True
+
+    def _expire(self, stripe: _Stripe, level: int, budget: int = EXPIRY_BATCH_SIZE) -> None:
+        """
+        Expires a bounded number of idle keys of one level in a stripe.
+
+        Must be called with the stripe's lock held. Only the level just
+        written to is inspected, so the cost per processed event stays O(1)
+        per level. A key is expired once its state has reset, and it has
+        been idle for the cleanup interval counting the window.
+        """
+        states = stripe.states[level]
+        rule = self._rules[level]
+        window = self._windows[level]
+        horizon = stripe.watermark - max(self._cleanup_interval - window, 0)
+        for _ in range(budget):
+            oldest_key = next(iter(states))
+            state = states[oldest_key]
+            reset_time = state + window if rule is None else rule.reset_time(state, window)
+            if reset_time > horizon:
+                break
+            del states[oldest_key]
+            stripe.expired_count += 1
+            if not states:
+                break
+
+    def _acquire_all(self) -> None:
+        """
+        Acquires every stripe lock, in stripe order.
+        """
+        for stripe in self._stripes:
+            stripe.lock.acquire()
+
+    def _release_all(self) -> None:
+        """
+        Releases every stripe lock.
+        """
+        for stripe in reversed(self._stripes):
+            stripe.lock.release()
+
+    def update_window(self, level: int, new_window: int) -> None:
+        """
+        Updates the throttling window size of one level dynamically.
+
+        Args:
+            level: Index of the level, in the order of the windows.
+            new_window: The new throttling window size in seconds.
+        """
+        if not 0 <= level < self._level_count:
+            raise ValueError(f"level must be between 0 and {self._level_count - 1}")
+        if self._rules[level] is not None:
+            self._rules[level].check_window(new_window)
+        self._acquire_all()
+        try:
+            old_window = self._windows[level]
+            self._windows[level] = new_window
+        finally:
+            self._release_all()
+        logger.info(f"Window of level {level} updated from {old_window}s to {new_window}s")
+
+    def get_windows(self) -> List[int]:
+        """
+        Returns the throttling window size of each level.
+
+        Returns:
+            List[int]: The window sizes in seconds, in level order.
+        """
+        return list(self._windows)
+
+    def clear(self) -> None:
+        """
+        Clears the state of every level, effectively resetting the throttler.
+        """
+        self._acquire_all()
+        try:
+            for stripe in self._stripes:
+                for states in stripe.states:
+                    states.clear()
+                stripe.watermark = None
+        finally:
+            self._release_all()
+        logger.info("HierarchicalThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked across all levels.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        self._acquire_all()
+        try:
+            return sum(len(states) for stripe in self._stripes for states in stripe.states)
+        finally:
+            self._release_all()
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+
+        Returns:
+            Dict[str, int]: Number of tracked, expired and evicted keys.
+        """
+        self._acquire_all()
+        try:
+            return {
+                "tracked_keys": sum(len(states) for stripe in self._stripes for states in stripe.states),
+                "expired_keys": sum(stripe.expired_count for stripe in self._stripes),
+                "evicted_keys": sum(stripe.evicted_count for stripe in self._stripes),
+            }
+        finally:
+            self._release_all()
+
+    def get_stripe_count(self) -> int:
+        """
+        Returns the number of stripes.
+
+        Returns:
+            int: Number of stripes.
+        """
+        return self._stripe_count
@@ -3,11 +3,19 @@ Logging utility for the Event Throttler system.
 
 This module provides centralized logging configuration and functions
 for use throughout the application.
+
+By default the configured handlers run on a background QueueListener thread
+and the logger itself only has a QueueHandler, so console and file I/O never
+block the thread that logs. Every logger shares one queue and one listener
+thread, which passes each record to the handlers of the logger that queued it.
 """
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import queue
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Dict, List, Optional
 
 # Import default settings from config - direct import
 from config import (
@@ -16,9 +24,44 @@ from config import (
     LOG_TO_FILE, 
     LOG_DIRECTORY, 
     MAX_LOG_SIZE_MB, 
-    LOG_BACKUP_COUNT
+    LOG_BACKUP_COUNT,
+    LOG_USE_QUEUE
 )
 
+class _TaggingQueueHandler(QueueHandler):
+    """
+    Queues records tagged with the name of the logger whose handlers write them.
+    """
+    
+    def __init__(self, log_queue: queue.SimpleQueue, logger_name: str):
+        super().__init__(log_queue)
+        self.logger_name = logger_name
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        # A propagated record is queued once per logger, each copy for its own handlers
+        record.queue_target = self.logger_name
+        return record
+
+class _RoutingQueueListener(QueueListener):
+    """
+    Passes each queued record to the handlers of the logger that queued it.
+    """
+    
+    def handle(self, record: logging.LogRecord) -> None:
+        record = self.prepare(record)
+        for handler in _handlers.get(record.queue_target, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+# The queue and background listener shared by every logger that writes through a queue
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener = _RoutingQueueListener(_queue)
+# Handlers run by the listener, by logger name
+_handlers: Dict[str, List[logging.Handler]] = {}
+# Serializes starting and stopping the listener
+_listener_lock = threading.Lock()
+
 def setup_logger(
     logger_name: str,
     log_level: int = LOG_LEVEL,
@@ -27,7 +70,8 @@ def setup_logger(
     log_dir: str = LOG_DIRECTORY,
     log_file: Optional[str] = None,
     max_file_size_mb: int = MAX_LOG_SIZE_MB,
-    backup_count: int = LOG_BACKUP_COUNT
+    backup_count: int = LOG_BACKUP_COUNT,
+    use_queue: bool = LOG_USE_QUEUE
 ) -> logging.Logger:
     """
     Configure and return a logger with specified settings.
@@ -41,6 +85,7 @@ def setup_logger(
         log_file: Specific filename (default: same as logger_name + .log)
         max_file_size_mb: Maximum size of log file in MB before rotation (default: 10)
         backup_count: Number of backup log files to keep (default: 5)
+        use_queue: Whether to write records from a background thread (default: True)
         
     Returns:
         configured logging.Logger instance
@@ -50,9 +95,12 @@ def setup_logger(
     logger.setLevel(log_level)
     
     # Clear any existing handlers (in case the logger already exists)
+    _remove_handlers(logger_name)
     if logger.hasHandlers():
         logger.handlers.clear()
     
+    handlers = []
+    
     # Create formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     
@@ -60,7 +108,7 @@ def setup_logger(
     if log_to_console:
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # Add file handler if requested
     if log_to_file:
@@ -81,10 +129,56 @@ def setup_logger(
             backupCount=backup_count
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if use_queue and handlers:
+        # The logging thread only enqueues records; the listener thread does the I/O
+        with _listener_lock:
+            _handlers[logger_name] = handlers
+            if _listener._thread is None:
+                _listener.start()
+        logger.addHandler(_TaggingQueueHandler(_queue, logger_name))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
+def _remove_handlers(logger_name: str) -> None:
+    """
+    Remove a logger's handlers from the background listener, writing out
+    its queued records first.
+    
+    Args:
+        logger_name: Name of the logger whose handlers should be removed
+    """
+    with _listener_lock:
+        if logger_name not in _handlers:
+            return
+        # Stopping the listener writes out every record queued so far
+        _listener.stop()
+        handlers = _handlers.pop(logger_name)
+        if _handlers:
+            _listener.start()
+    for handler in handlers:
+        handler.close()
+
+def stop_listeners() -> None:
+    """
+    Stop the background log listener, writing out any queued records.
+    
+    Called automatically at interpreter exit.
+    """
+    with _listener_lock:
+        if _listener._thread is not None:
+            _listener.stop()
+        handlers = [handler for logger_handlers in _handlers.values() for handler in logger_handlers]
+        _handlers.clear()
+    for handler in handlers:
+        handler.close()
+
+atexit.register(stop_listeners)
+
 # Convenience function to get the root application logger
 def get_app_logger(log_to_file: bool = False) -> logging.Logger:
     """
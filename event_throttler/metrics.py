@@ -0,0 +1,341 @@
+"""
+Throttler Metrics
+
+This module provides ThrottlerMetrics, the instrumentation surface of
+EventThrottler, and an optional stdlib-only HTTP exporter that serves the
+metrics in the Prometheus text exposition format.
+
+Counters are kept per thread: each thread that calls an instrumented
+throttler gets its own _ThreadCounters cell, found through a threading.local,
+so recording an event never takes a lock. Cells are only summed when the
+metrics are collected. Hot keys are tracked with one space-saving sketch per
+thread, merged at collection time.
+
+Event counts are exact. Lock timings and hot keys, which cost more to
+record than the throttling decision itself, are sampled on 1 in sample_rate
+lock acquisitions per thread and scaled up when collected.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Import the custom logger and configuration
+from logger import get_module_logger
+from config import METRICS_TOP_K, METRICS_SAMPLE_RATE, METRICS_PORT
+
+# Get a logger for this module
+logger = get_module_logger("metrics")
+
+# Keys tracked per sketch for each of the top-K keys that are reported
+_SKETCH_FACTOR = 4
+
+class SpaceSavingSketch:
+    """
+    Approximate heavy-hitter counts using the space-saving algorithm.
+
+    At most capacity keys are tracked. When a new key arrives and the sketch
+    is full, it replaces a key with the minimum count and inherits that count,
+    so every count is an overestimate by at most the minimum count. Keys are
+    grouped in buckets by count, which makes each update O(1).
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            capacity: Maximum number of keys to track.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._capacity = capacity
+        self._counts: Dict[Any, int] = {}
+        # Keys by count; dicts keep the order keys reached that count
+        self._buckets: Dict[int, Dict[Any, None]] = {}
+        self._min_count = 0
+
+    def add(self, key: Any) -> None:
+        """
+        Counts one occurrence of a key.
+
+        Args:
+            key: The key that was seen.
+        """
+        counts = self._counts
+        count = counts.get(key)
+        if count is None:
+            if len(counts) < self._capacity:
+                count = 0
+            else:
+                # Replace the key with the minimum count, which was seen least recently
+                bucket = self._buckets[self._min_count]
+                victim = next(iter(bucket))
+                del bucket[victim]
+                del counts[victim]
+                count = self._min_count
+                if not bucket:
+                    # The new key, at count + 1, now has the minimum count
+                    del self._buckets[count]
+                    self._min_count = count + 1
+        else:
+            bucket = self._buckets[count]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[count]
+                if count == self._min_count:
+                    self._min_count = count + 1
+
+        counts[key] = count + 1
+        self._buckets.setdefault(count + 1, {})[key] = None
+        if count == 0:
+            self._min_count = 1
+
+    def items(self) -> List[Tuple[Any, int]]:
+        """
+        Returns every tracked key with its estimated count.
+
+        Returns:
+            List[Tuple[Any, int]]: (key, count) pairs, highest count first.
+        """
+        # dict.copy does not release the GIL, so it is safe while the owning thread adds keys
+        return sorted(self._counts.copy().items(), key=lambda item: item[1], reverse=True)
+
+class _ThreadCounters:
+    """
+    The counters of one thread. Only the owning thread writes to them.
+    """
+
+    __slots__ = ("events", "processed", "lock_acquisitions", "lock_wait_ns",
+                 "lock_hold_ns", "hot_keys")
+
+    def __init__(self, top_k: int):
+        self.events = 0
+        self.processed = 0
+        self.lock_acquisitions = 0
+        self.lock_wait_ns = 0
+        self.lock_hold_ns = 0
+        self.hot_keys = SpaceSavingSketch(top_k * _SKETCH_FACTOR) if top_k else None
+
+class ThrottlerMetrics:
+    """
+    Per-thread event counters, lock timings and hot-key sketches.
+
+    Pass an instance to EventThrottler(metrics=...) to instrument it, then
+    read everything with EventThrottler.get_metrics().
+    """
+
+    def __init__(self, top_k: int = METRICS_TOP_K, sample_rate: int = METRICS_SAMPLE_RATE):
+        """
+        Initialize empty metrics.
+
+        Args:
+            top_k: Number of hot keys to report; 0 disables hot-key tracking
+                (default from config).
+            sample_rate: Time the lock and record hot keys on 1 in N lock
+                acquisitions per thread; 1 records every one (default from config).
+        """
+        if top_k < 0:
+            raise ValueError("top_k must not be negative")
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be at least 1")
+        self._top_k = top_k
+        self.sample_rate = sample_rate
+        self._local = threading.local()
+        self._cells: List[_ThreadCounters] = []
+        self._cells_lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_collected: Optional[Tuple[float, int]] = None
+        self._rate_lock = threading.Lock()
+
+    def counters(self) -> _ThreadCounters:
+        """
+        Returns the calling thread's counters, creating them on first use.
+
+        Returns:
+            _ThreadCounters: Counters that only the calling thread updates.
+        """
+        try:
+            return self._local.counters
+        except AttributeError:
+            cell = _ThreadCounters(self._top_k)
+            # Registration happens once per thread, never on the hot path
+            with self._cells_lock:
+                self._cells.append(cell)
+            self._local.counters = cell
+            return cell
+
+    def collect(self, new_keys: int) -> Dict[str, Any]:
+        """
+        Sums the per-thread counters and merges the hot-key sketches.
+
+        Counters written by other threads while collecting may be missed by
+        this call but are never lost; they appear in the next one.
+
+        Args:
+            new_keys: Total number of new keys seen by the throttler, used to
+                compute the new-key rate.
+
+        Returns:
+            Dict[str, Any]: processed, throttled, lock_acquisitions,
+            lock_wait_seconds and lock_hold_seconds (estimated from samples),
+            new_key_rate (new keys per second since the previous collection)
+            and hot_keys, a list of (key, estimated events) pairs.
+        """
+        with self._cells_lock:
+            cells = list(self._cells)
+
+        scale = self.sample_rate
+        hot_keys: Dict[Any, int] = {}
+        for cell in cells:
+            if cell.hot_keys is not None:
+                for key, count in cell.hot_keys.items():
+                    hot_keys[key] = hot_keys.get(key, 0) + count * scale
+
+        with self._rate_lock:
+            now = time.monotonic()
+            previous_time, previous_keys = self._last_collected or (self._started, 0)
+            # A concurrent caller may have read the key count earlier but got here later
+            if new_keys >= previous_keys:
+                self._last_collected = (now, new_keys)
+        new_key_rate = _rate(previous_time, previous_keys, now, new_keys)
+
+        events = sum(cell.events for cell in cells)
+        processed = sum(cell.processed for cell in cells)
+        return {
+            "processed": processed,
+            "throttled": events - processed,
+            "lock_acquisitions": sum(cell.lock_acquisitions for cell in cells),
+            "lock_wait_seconds": sum(cell.lock_wait_ns for cell in cells) * scale / 1e9,
+            "lock_hold_seconds": sum(cell.lock_hold_ns for cell in cells) * scale / 1e9,
+            "new_key_rate": new_key_rate,
+            "hot_keys": sorted(hot_keys.items(), key=lambda item: item[1], reverse=True)[:self._top_k],
+        }
+
+def _rate(previous_time: float, previous_keys: int, now: float, new_keys: int) -> float:
+    """
+    Returns new keys per second between two samples, never negative.
+    """
+    elapsed = now - previous_time
+    return max(new_keys - previous_keys, 0) / elapsed if elapsed > 0 else 0.0
+
+# Prometheus metric name, type, help text and get_metrics() field
+_PROMETHEUS_METRICS = [
+    ("event_throttler_new_keys_total", "counter", "Keys seen for the first time.", "new_keys"),
+    ("event_throttler_expired_keys_total", "counter", "Keys expired after being idle.", "expired_keys"),
+    ("event_throttler_evicted_keys_total", "counter", "Keys evicted because max_keys was reached.", "evicted_keys"),
+    ("event_throttler_tracked_keys", "gauge", "Keys currently tracked.", "tracked_keys"),
+    ("event_throttler_new_key_rate", "gauge", "New keys per second since the previous scrape.", "new_key_rate"),
+    ("event_throttler_lock_acquisitions_total", "counter", "Lock acquisitions by instrumented calls.", "lock_acquisitions"),
+    ("event_throttler_lock_wait_seconds_total", "counter", "Time spent waiting for the lock.", "lock_wait_seconds"),
+    ("event_throttler_lock_hold_seconds_total", "counter", "Time spent holding the lock.", "lock_hold_seconds"),
+]
+
+def _escape_label(value: Any) -> str:
+    """
+    Escapes a label value for the Prometheus text format.
+    """
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_prometheus(metrics: Dict[str, Any]) -> str:
+    """
+    Renders the output of EventThrottler.get_metrics() in the Prometheus
+    text exposition format.
+
+    Args:
+        metrics: The dictionary returned by get_metrics().
+
+    Returns:
+        str: The exposition text, ending with a newline.
+    """
+    lines = [
+        "# HELP event_throttler_events_total Events decided, by decision.",
+        "# TYPE event_throttler_events_total counter",
+        f'event_throttler_events_total{{decision="processed"}} {metrics["processed"]}',
+        f'event_throttler_events_total{{decision="throttled"}} {metrics["throttled"]}',
+    ]
+    for name, metric_type, help_text, field in _PROMETHEUS_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {metrics[field]}")
+
+    lines.append("# HELP event_throttler_hot_key_events Estimated events for the hottest keys.")
+    lines.append("# TYPE event_throttler_hot_key_events gauge")
+    for key, count in metrics["hot_keys"]:
+        lines.append(f'event_throttler_hot_key_events{{key="{_escape_label(key)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """
+    A background HTTP server exposing metrics at /metrics for Prometheus.
+
+    The exported new-key rate is computed from this server's own previous
+    scrape, so other get_metrics() callers do not shorten its interval.
+    """
+
+    def __init__(self, get_metrics: Callable[[], Dict[str, Any]], host: str = "127.0.0.1", port: int = METRICS_PORT):
+        """
+        Start serving on a daemon thread.
+
+        Args:
+            get_metrics: Called on every scrape, usually throttler.get_metrics.
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free port (default from config).
+        """
+
+        server = self
+        self._last_scrape: Optional[Tuple[float, int]] = None
+        self._scrape_lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                metrics = get_metrics()
+                metrics["new_key_rate"] = server._scrape_rate(metrics["new_keys"], metrics["new_key_rate"])
+                body = format_prometheus(metrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("Metrics request: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="event-throttler-metrics", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{host}:{self.port}/metrics")
+
+    def _scrape_rate(self, new_keys: int, first_rate: float) -> float:
+        """
+        Returns new keys per second since this server's previous scrape, or
+        first_rate, the rate get_metrics() reported, on the first scrape.
+        """
+        with self._scrape_lock:
+            now = time.monotonic()
+            previous = self._last_scrape
+            if previous is None or new_keys >= previous[1]:
+                self._last_scrape = (now, new_keys)
+        if previous is None:
+            return first_rate
+        return _rate(previous[0], previous[1], now, new_keys)
+
+    @property
+    def port(self) -> int:
+        """
+        The port the server listens on.
+        """
+        return self._server.server_address[1]
+
+    def stop(self) -> None:
+        """
+        Stops the server and waits for its thread to exit.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        logger.info("Metrics server stopped")
@@ -0,0 +1,270 @@
+"""
+Multi-window Event Throttler
+
+This module provides a MultiWindowThrottler, which enforces several
+throttling windows per key at once (for example 1, 10 and 60 seconds) with
+one key lookup under one lock.
+
+Each key's state is a single list holding the last processed timestamp for
+every window, in the order of the windows. A window admits an event under
+the first-event rule, as an EventThrottler with that window would, and an
+event is processed and recorded only if every window admits it, without one
+dict lookup and one lock acquisition per window.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches return a plain list
+    np = None
+
+# Import the custom logger and configuration
+from logger import get_module_logger
+from config import DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, EXPIRY_BATCH_SIZE
+
+# Get a logger for this module
+logger = get_module_logger("multi_window")
+
+# Timestamp of a window that has never admitted an event for the key
+_NEVER = -(2 ** 62)
+
+class MultiWindowThrottler:
+    """
+    A throttler that checks every configured window in a single lookup.
+
+    should_process processes an event only if every window admits it, and
+    only then records it in every window, so an event that one window
+    rejects never uses up another window. check returns each window's
+    decision without recording anything.
+
+    Keys are expired and evicted like EventThrottler's, ordered by the last
+    time an event of theirs was processed.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[int] = (DEFAULT_WINDOW,),
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL
+    ):
+        """
+        Initialize the MultiWindowThrottler.
+
+        Args:
+            windows: The throttling windows in seconds (default from config).
+            max_keys: Maximum number of keys to track (default from config).
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the longest window (default from config).
+        """
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        windows = tuple(sorted(set(windows)))
+        if not windows:
+            raise ValueError("At least one window is required")
+
+        self._windows = windows
+        self._window_indexes = tuple(enumerate(windows))
+        self._max_keys = max_keys
+        self._cleanup_interval = cleanup_interval
+        # Ordered by the time any window of each key last admitted an event, oldest first
+        self._states: "OrderedDict[str, List[int]]" = OrderedDict()
+        # Latest timestamp of an admitted event, used as the expiry clock
+        self._watermark: Optional[int] = None
+        self._expired_count = 0
+        self._evicted_count = 0
+        self._lock = threading.RLock()
+        logger.info(f"MultiWindowThrottler initialized with windows of {', '.join(map(str, windows))} seconds")
+
+    def check(self, timestamp: int, event_id: str, key: str) -> Tuple[bool, ...]:
+        """
+        Returns each window's decision for an event, without recording it.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+
+        Returns:
+            Tuple[bool, ...]: Whether each window would admit the event, in
+            the order of get_windows().
+        """
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return (True,) * len(self._windows)
+            return tuple(timestamp - state[index] >= window for index, window in self._window_indexes)
+
+    def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Determines if an event should be processed, which it should if every window admits it.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        with self._lock:
+            return self._process_locked(timestamp, key)
+
+    def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Determines which events of a batch should be processed.
+
+        The decisions are identical to calling should_process for each event
+        in order, but the lock is acquired only once.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (not used in throttling logic).
+            keys: Unique identifier for the user/session of each event.
+
+        Returns:
+            A boolean mask that is True for each event that should be processed
+            (a NumPy array if NumPy is installed, otherwise a list).
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        with self._lock:
+            process = self._process_locked
+            decisions = [process(timestamp, key) for timestamp, key in zip(timestamps, keys)]
+        if np is not None:
+            return np.array(decisions, dtype=bool)
+        return decisions
+
+    def _process_locked(self, timestamp: int, key: str) -> bool:
+        """
+        Applies the throttling rule of every window to one event and records
+        it in all of them only if all admit it. Must be called with the lock held.
+        """
+        states = self._states
+        state = states.get(key)
+        if state is None:
+            # First time seeing this key, so every window admits it
+            if len(states) >= self._max_keys:
+                states.popitem(last=False)
+                self._evicted_count += 1
+            states[key] = [timestamp] * len(self._windows)
+            self._advance(timestamp)
+            return True
+
+        # Decide every window before recording anything
+        for index, window in self._window_indexes:
+            if timestamp - state[index] < window:
+                return False
+        state[:] = [timestamp] * len(state)
+        states.move_to_end(key)
+        self._advance(timestamp)
+        return True
+
+    def _advance(self, timestamp: int, budget: int = EXPIRY_BATCH_SIZE) -> None:
+        """
+        Moves the expiry clock forward and expires a bounded number of idle keys.
+
+        Must be called with the lock held. A key is idle once the latest
+        timestamp recorded in any of its windows is older than the longest
+        window and the cleanup interval.
+        """
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+
+        states = self._states
+        horizon = self._watermark - max(self._windows[-1], self._cleanup_interval)
+        for _ in range(budget):
+            if not states:
+                break
+            oldest_key = next(iter(states))
+            if max(states[oldest_key]) > horizon:
+                break
+            del states[oldest_key]
+            self._expired_count += 1
+
+    def update_window(self, add: Iterable[int] = (), remove: Iterable[int] = ()) -> None:
+        """
+        Adds and/or removes windows dynamically.
+
+        Every tracked key's state is rebuilt once, keeping the state of the
+        windows that stay. An added window admits each key's next event.
+
+        Args:
+            add: Windows in seconds to start enforcing; windows already
+                enforced are ignored.
+            remove: Windows in seconds to stop enforcing.
+
+        Raises:
+            ValueError: If a window to remove is not enforced, or no window would remain.
+        """
+        add = set(add)
+        remove = set(remove)
+        with self._lock:
+            old_windows = self._windows
+            missing = remove - set(old_windows)
+            if missing:
+                raise ValueError(f"Windows {sorted(missing)} are not enforced")
+            windows = tuple(sorted((set(old_windows) - remove) | add))
+            if not windows:
+                raise ValueError("At least one window is required")
+            if windows == old_windows:
+                return
+
+            old_index = {window: index for index, window in enumerate(old_windows)}
+            layout = [old_index.get(window) for window in windows]
+            for state in self._states.values():
+                state[:] = [_NEVER if index is None else state[index] for index in layout]
+            self._windows = windows
+            self._window_indexes = tuple(enumerate(windows))
+        logger.info(f"Windows updated from {', '.join(map(str, old_windows))}s "
+                    f"to {', '.join(map(str, windows))}s")
+
+    def get_windows(self) -> Tuple[int, ...]:
+        """
+        Returns the enforced windows.
+
+        Returns:
+            Tuple[int, ...]: The window sizes in seconds, shortest first.
+        """
+        with self._lock:
+            return self._windows
+
+    def clear(self) -> None:
+        """
+        Clears all stored timestamps, effectively resetting the throttler.
+        """
+        with self._lock:
+            self._states.clear()
+            self._watermark = None
+            logger.info("MultiWindowThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        with self._lock:
+            return len(self._states)
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+
+        Returns:
+            Dict[str, int]: Number of tracked, expired and evicted keys.
+        """
+        with self._lock:
+            return {
+                "tracked_keys": len(self._states),
+                "expired_keys": self._expired_count,
+                "evicted_keys": self._evicted_count,
+            }
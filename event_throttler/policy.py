@@ -0,0 +1,98 @@
+"""
+Window Policies
+
+This module provides WindowPolicy, which gives different keys different
+throttling windows: per-key overrides, key classes assigned by a
+user-supplied classifier, and key prefixes.
+
+An EventThrottler resolves a key's window through its policy once, the first
+time it sees the key, and caches the result, so later events for the key pay
+no prefix matching or classifier call.
+"""
+from typing import Callable, Dict, Hashable, Mapping, Optional
+
+class WindowPolicy:
+    """
+    Maps keys to throttling windows.
+
+    A key's window is the first of these that applies:
+
+    1. its entry in overrides,
+    2. the window of the class returned by classifier(key), if classes has it,
+    3. the window of the longest prefix in prefixes that the key starts with,
+    4. default, or the throttler's own window if default is None.
+
+    Policies are not meant to be changed in place. To change the windows of
+    a running throttler, build a new policy and pass it to update_window.
+    """
+
+    def __init__(
+        self,
+        prefixes: Optional[Mapping[str, int]] = None,
+        classes: Optional[Mapping[Hashable, int]] = None,
+        classifier: Optional[Callable[[str], Optional[Hashable]]] = None,
+        overrides: Optional[Mapping[str, int]] = None,
+        default: Optional[int] = None
+    ):
+        """
+        Initialize a policy.
+
+        Args:
+            prefixes: Window for keys starting with each prefix.
+            classes: Window for each key class returned by classifier.
+            classifier: Called with a key; returns its class, or None.
+            overrides: Window for individual keys.
+            default: Window for keys nothing else matches; None means the
+                throttler's window.
+        """
+        if classes and classifier is None:
+            raise ValueError("classes require a classifier")
+
+        self._prefixes: Dict[str, int] = dict(prefixes or {})
+        self._classes: Dict[Hashable, int] = dict(classes or {})
+        self._classifier = classifier
+        self._overrides: Dict[str, int] = dict(overrides or {})
+        self.default = default
+        # Only prefix lengths that occur are tried, longest first
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+
+        windows = [*self._prefixes.values(), *self._classes.values(), *self._overrides.values()]
+        if default is not None:
+            windows.append(default)
+        self.max_window: Optional[int] = max(windows) if windows else None
+
+    def resolve(self, key: str) -> Optional[int]:
+        """
+        Returns the window for a key.
+
+        Args:
+            key: Unique identifier for the user/session.
+
+        Returns:
+            Optional[int]: The key's window in seconds, or None if the
+            throttler's own window applies.
+        """
+        window = self._overrides.get(key)
+        if window is not None:
+            return window
+
+        if self._classifier is not None:
+            window = self._classes.get(self._classifier(key))
+            if window is not None:
+                return window
+
+        for length in self._prefix_lengths:
+            window = self._prefixes.get(key[:length])
+            if window is not None:
+                return window
+
+        return self.default
+
+    def is_empty(self) -> bool:
+        """
+        Returns whether the policy gives every key the throttler's window.
+
+        Returns:
+            bool: True if the policy has no windows at all.
+        """
+        return self.max_window is None
@@ -0,0 +1,297 @@
+"""
+Out-of-order Ingest
+
+This module provides ReorderBuffer, which puts events that arrive slightly
+out of order back into timestamp order before a throttler decides them.
+
+Keys are hashed to a fixed number of partitions, each holding a min-heap of
+buffered events and its own lock, so memory depends on the number of
+buffered events rather than on the number of keys. A partition's watermark
+is its latest event timestamp minus the allowed lateness; events at or
+below the watermark are released to the throttler in timestamp order.
+An event older than one already released from its partition is late, and
+is handled by the late-event policy instead of being reordered.
+"""
+import heapq
+import itertools
+import logging
+import math
+import threading
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+# Import the custom logger and configuration
+from logger import get_module_logger
+from config import REORDER_LATENESS, REORDER_PARTITIONS, REORDER_MAX_BUFFERED, LATE_EVENT_POLICY
+
+# Get a logger for this module
+logger = get_module_logger("reorder")
+
+# What happens to a late event: never processed, always processed without
+# consulting the throttler, or decided by the throttler as it is
+LATE_POLICIES = ("drop", "process", "decide")
+
+class Decision(NamedTuple):
+    """
+    A released event and the throttler's decision.
+    """
+    timestamp: int
+    event_id: str
+    key: str
+    processed: bool
+    late: bool = False
+
+class _Partition:
+    """
+    The heap, lock, watermark state and counters of one partition.
+    """
+
+    __slots__ = ("heap", "lock", "sequence", "max_timestamp", "released",
+                 "released_count", "late_count", "forced_count")
+
+    def __init__(self):
+        # (timestamp, sequence, event_id, key); the sequence keeps ties in arrival order
+        self.heap: List[tuple] = []
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.max_timestamp = -math.inf
+        # Timestamp of the last released event
+        self.released = -math.inf
+        self.released_count = 0
+        self.late_count = 0
+        self.forced_count = 0
+
+class ReorderBuffer:
+    """
+    A bounded reorder buffer in front of a throttler.
+
+    push returns the decisions of the events it releases, which may include
+    events pushed earlier and not the pushed event itself. Decisions within
+    a partition are released in timestamp order; decisions of different
+    partitions are independent, which is safe because every key stays in
+    one partition.
+    """
+
+    def __init__(
+        self,
+        throttler: Any,
+        lateness: int = REORDER_LATENESS,
+        partitions: int = REORDER_PARTITIONS,
+        max_buffered: int = REORDER_MAX_BUFFERED,
+        late_policy: str = LATE_EVENT_POLICY
+    ):
+        """
+        Initialize the ReorderBuffer.
+
+        Args:
+            throttler: Decides released events; any throttler with
+                should_process. should_process_batch is used if it has one.
+            lateness: Seconds an event may arrive behind the latest event of
+                its partition and still be reordered (default from config).
+            partitions: Number of independently locked heaps (default from config).
+            max_buffered: Events held across all partitions; beyond that, a
+                partition releases its oldest events early (default from config).
+            late_policy: "drop", "process" or "decide" (default from config).
+        """
+        if lateness < 0:
+            raise ValueError("lateness must not be negative")
+        if partitions < 1:
+            raise ValueError("partitions must be at least 1")
+        if late_policy not in LATE_POLICIES:
+            raise ValueError(f"late_policy must be one of {', '.join(LATE_POLICIES)}")
+
+        self._throttler = throttler
+        self._should_process_batch = getattr(throttler, "should_process_batch", None)
+        self._lateness = lateness
+        self._partitions = [_Partition() for _ in range(partitions)]
+        self._partition_count = partitions
+        self._partition_capacity = max(1, math.ceil(max_buffered / partitions))
+        self._late_policy = late_policy
+        logger.info(f"ReorderBuffer initialized with lateness of {lateness} seconds, "
+                    f"{partitions} partitions and late policy {late_policy}")
+
+    def push(self, timestamp: int, event_id: str, key: str) -> List[Decision]:
+        """
+        Buffers an event and releases every event of its partition that is
+        at or below the watermark.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID.
+            key: Unique identifier for the user/session.
+
+        Returns:
+            List[Decision]: The released events with their decisions.
+        """
+        partition = self._partitions[hash(key) % self._partition_count]
+        with partition.lock:
+            if timestamp < partition.released:
+                return [self._decide_late(partition, timestamp, event_id, key)]
+            heapq.heappush(partition.heap, (timestamp, next(partition.sequence), event_id, key))
+            if timestamp > partition.max_timestamp:
+                partition.max_timestamp = timestamp
+            return self._release(partition, partition.max_timestamp - self._lateness)
+
+    def push_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> List[Decision]:
+        """
+        Buffers a batch of events and releases what is at or below the watermark.
+
+        Each partition's released events are decided with one
+        should_process_batch call, if the throttler has the method.
+
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs.
+            keys: Unique identifier for the user/session of each event.
+
+        Returns:
+            List[Decision]: The released events with their decisions,
+            grouped by partition.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+
+        grouped: Dict[int, List[tuple]] = {}
+        count = self._partition_count
+        for event in zip(timestamps, event_ids, keys):
+            grouped.setdefault(hash(event[2]) % count, []).append(event)
+
+        decisions = []
+        for index, events in grouped.items():
+            partition = self._partitions[index]
+            with partition.lock:
+                heap = partition.heap
+                for timestamp, event_id, key in events:
+                    if timestamp < partition.released:
+                        decisions.append(self._decide_late(partition, timestamp, event_id, key))
+                        continue
+                    heapq.heappush(heap, (timestamp, next(partition.sequence), event_id, key))
+                    if timestamp > partition.max_timestamp:
+                        partition.max_timestamp = timestamp
+                decisions.extend(self._release(partition, partition.max_timestamp - self._lateness, batch=True))
+        return decisions
+
+    def poll(self) -> List[Decision]:
+        """
+        Releases events of every partition that are at or below the latest
+        timestamp seen by any partition, minus the lateness.
+
+        Call this periodically so that partitions whose keys have gone quiet
+        do not hold their last events back.
+
+        Returns:
+            List[Decision]: The released events with their decisions.
+        """
+        watermark = max(partition.max_timestamp for partition in self._partitions) - self._lateness
+        decisions = []
+        for partition in self._partitions:
+            with partition.lock:
+                if partition.heap:
+                    decisions.extend(self._release(partition, watermark, batch=True))
+        return decisions
+
+    def flush(self) -> List[Decision]:
+        """
+        Releases every buffered event, for example at the end of a stream.
+
+        Returns:
+            List[Decision]: The released events with their decisions.
+        """
+        decisions = []
+        for partition in self._partitions:
+            with partition.lock:
+                if partition.heap:
+                    decisions.extend(self._release(partition, math.inf, batch=True))
+        logger.info(f"ReorderBuffer flushed {len(decisions)} events")
+        return decisions
+
+    def _release(self, partition: _Partition, watermark: float, batch: bool = False) -> List[Decision]:
+        """
+        Pops and decides a partition's events up to the watermark, and its
+        oldest events beyond the watermark while it is over capacity.
+
+        Must be called with the partition lock held.
+
+        Args:
+            partition: The partition to release from.
+            watermark: Latest timestamp that may be released.
+            batch: Whether to decide with one should_process_batch call.
+
+        Returns:
+            List[Decision]: The released events with their decisions.
+        """
+        heap = partition.heap
+        capacity = self._partition_capacity
+        if not heap or (heap[0][0] > watermark and len(heap) <= capacity):
+            return []
+        events = []
+        while heap and (heap[0][0] <= watermark or len(heap) > capacity):
+            if heap[0][0] > watermark:
+                partition.forced_count += 1
+            timestamp, _, event_id, key = heapq.heappop(heap)
+            events.append((timestamp, event_id, key))
+
+        partition.released = events[-1][0]
+        partition.released_count += len(events)
+        if batch and len(events) > 1 and self._should_process_batch is not None:
+            timestamps, event_ids, keys = zip(*events)
+            mask = self._should_process_batch(timestamps, event_ids, keys)
+            return [Decision(*event, bool(processed)) for event, processed in zip(events, mask)]
+        should_process = self._throttler.should_process
+        return [Decision(*event, should_process(*event)) for event in events]
+
+    def _decide_late(self, partition: _Partition, timestamp: int, event_id: str, key: str) -> Decision:
+        """
+        Applies the late-event policy. Must be called with the partition lock held.
+
+        Args:
+            partition: The event's partition.
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID.
+            key: Unique identifier for the user/session.
+
+        Returns:
+            Decision: The late event's decision.
+        """
+        partition.late_count += 1
+        if self._late_policy == "drop":
+            processed = False
+        elif self._late_policy == "process":
+            processed = True
+        else:
+            processed = self._throttler.should_process(timestamp, event_id, key)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Late event: %s, event: %s, timestamp: %s behind %s, processed: %s",
+                         key, event_id, timestamp, partition.released, processed)
+        return Decision(timestamp, event_id, key, processed, True)
+
+    def get_buffered_count(self) -> int:
+        """
+        Returns the number of events waiting in the buffer.
+
+        Returns:
+            int: Number of buffered events across all partitions.
+        """
+        return sum(len(partition.heap) for partition in self._partitions)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing the reordering.
+
+        Returns:
+            Dict[str, int]: buffered events, released events, late events
+            (handled by the late policy) and forced events (released ahead
+            of the watermark because the buffer was full).
+        """
+        stats = {"buffered": 0, "released": 0, "late": 0, "forced": 0}
+        for partition in self._partitions:
+            with partition.lock:
+                stats["buffered"] += len(partition.heap)
+                stats["released"] += partition.released_count
+                stats["late"] += partition.late_count
+                stats["forced"] += partition.forced_count
+        return stats
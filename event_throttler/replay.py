@@ -0,0 +1,361 @@
+"""
+What-if replay of recorded events for tuning windows.
+
+This module replays a recorded event log through many candidate throttler
+configurations (windows, window policies, rate-limiting algorithms) in
+parallel, and reports for each how many events it would have processed and
+throttled, how admissions spread over keys, and how fast it replayed.
+
+A recorded stream is first converted once into an event log file:
+
+- a fixed-size header (magic, version, event count, key count, blob size),
+- a packed int64 timestamps array, one entry per event,
+- a packed uint32 key ID array, one entry per event, padded to 8 bytes,
+- a uint64 offsets array (key count + 1 entries) into the key blob,
+- the UTF-8 key blob, with keys in order of their first event.
+
+The arrays are stored in the host's native byte order. Every worker process
+memory-maps the same file, so the columns are read from the shared page
+cache rather than copied into each worker.
+
+Each configuration is replayed by a real EventThrottler, fed batches of
+REPLAY_CHUNK_EVENTS events through should_process_batch, so decisions are
+exactly those of a live throttler. Keys are passed as their integer IDs,
+which throttle the same as the keys themselves, except with a window
+policy, where the key strings are decoded once so that the policy sees them.
+"""
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, compress
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; replays fall back to plain loops
+    np = None
+
+# Import the throttler, custom logger and configuration
+from throttler import EventThrottler
+from policy import WindowPolicy
+from algorithms import RateAlgorithm
+from cli import Chunk
+from logger import get_module_logger
+from config import MAX_KEYS, CLEANUP_INTERVAL, REPLAY_CHUNK_EVENTS
+
+# Get a logger for this module
+logger = get_module_logger("replay")
+
+_MAGIC = b"ETLOG001"
+_VERSION = 1
+# magic, version, reserved, event count, key count, blob size
+_HEADER = struct.Struct("<8sIIQQQ")
+_MAX_KEY_IDS = 2 ** 32
+
+class EventLogError(ValueError):
+    """
+    Raised when an event log file is truncated, corrupt or of an unknown version.
+    """
+
+class ReplayConfig(NamedTuple):
+    """
+    One candidate throttler configuration; the fields are EventThrottler's arguments.
+    """
+    window: int
+    policy: Optional[WindowPolicy] = None
+    algorithm: Optional[RateAlgorithm] = None
+    max_keys: int = MAX_KEYS
+    cleanup_interval: int = CLEANUP_INTERVAL
+
+class ReplayResult(NamedTuple):
+    """
+    The outcome of replaying an event log through one configuration.
+    """
+    config: ReplayConfig
+    events: int
+    processed: int
+    throttled: int
+    # Processed events per key at the 50th, 90th and 99th percentiles and the maximum
+    admit_percentiles: Dict[str, int]
+    # Number of keys by processed events, in power-of-two buckets keyed by lower bound
+    admit_histogram: Dict[int, int]
+    elapsed: float
+    events_per_second: float
+
+def write_event_log(path: str, chunks: Iterable[Chunk]) -> int:
+    """
+    Writes recorded events to an event log file.
+
+    Chunks are written as they are read, so only the key table is held in
+    memory. The file is written to a temporary name and renamed into place.
+
+    Args:
+        path: Destination file path.
+        chunks: Chunks from one of the cli.read_*_chunks readers.
+
+    Returns:
+        int: Number of events written.
+
+    Raises:
+        ValueError: If the events have 2**32 or more distinct keys.
+    """
+    key_ids: Dict[str, int] = {}
+    event_count = 0
+    temporary_path = f"{path}.tmp"
+    ids_path = f"{path}.ids.tmp"
+    try:
+        with open(temporary_path, "wb") as log_file, open(ids_path, "w+b") as ids_file:
+            log_file.write(bytes(_HEADER.size))
+            setdefault = key_ids.setdefault
+            for chunk in chunks:
+                log_file.write(array("q", chunk.timestamps))
+                # A new key gets the next ID, since len() is taken before it is added
+                ids_file.write(array("I", [setdefault(key, len(key_ids)) for key in chunk.keys]))
+                event_count += len(chunk.timestamps)
+            if len(key_ids) >= _MAX_KEY_IDS:
+                raise ValueError(f"Event logs are limited to {_MAX_KEY_IDS - 1:,} distinct keys")
+
+            ids_file.seek(0)
+            shutil.copyfileobj(ids_file, log_file)
+            log_file.write(bytes(-4 * event_count % 8))
+            encoded_keys = [key.encode("utf-8") for key in key_ids]
+            offsets = array("Q", [0])
+            offsets.extend(accumulate(len(key) for key in encoded_keys))
+            log_file.write(offsets)
+            log_file.write(b"".join(encoded_keys))
+            log_file.seek(0)
+            log_file.write(_HEADER.pack(_MAGIC, _VERSION, 0, event_count, len(key_ids), offsets[-1]))
+            log_file.flush()
+            os.fsync(log_file.fileno())
+        os.replace(temporary_path, path)
+    finally:
+        os.remove(ids_path)
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+    logger.info(f"Wrote {event_count:,} events with {len(key_ids):,} keys to {path}")
+    return event_count
+
+class EventLog:
+    """
+    A read-only, memory-mapped view of an event log file.
+
+    timestamps and key_ids are memoryviews of the mapped columns; keys are
+    only decoded when they are asked for.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map an event log file and validate its layout.
+
+        Args:
+            path: Event log file path.
+
+        Raises:
+            EventLogError: If the file is not a valid event log.
+        """
+        with open(path, "rb") as log_file:
+            size = os.fstat(log_file.fileno()).st_size
+            if size < _HEADER.size:
+                raise EventLogError(f"{path} is too small to be an event log")
+            self._map = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, _, event_count, key_count, blob_size = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise EventLogError(f"{path} is not an event log")
+            if version != _VERSION:
+                raise EventLogError(f"{path} has unsupported event log version {version}")
+
+            timestamps_start = _HEADER.size
+            key_ids_start = timestamps_start + event_count * 8
+            offsets_start = key_ids_start + event_count * 4 + (-4 * event_count % 8)
+            self._blob_start = offsets_start + (key_count + 1) * 8
+            if self._blob_start + blob_size != size:
+                raise EventLogError(f"{path} is truncated")
+        except Exception:
+            self._map.close()
+            raise
+
+        self._view = memoryview(self._map)
+        self.timestamps = self._view[timestamps_start:key_ids_start].cast("q")
+        self.key_ids = self._view[key_ids_start:key_ids_start + event_count * 4].cast("I")
+        self._offsets = self._view[offsets_start:self._blob_start].cast("Q")
+        self.path = path
+        self.event_count = event_count
+        self.key_count = key_count
+
+    def key(self, key_id: int) -> str:
+        """
+        Returns the key with an ID.
+        """
+        start = self._blob_start + self._offsets[key_id]
+        end = self._blob_start + self._offsets[key_id + 1]
+        return self._map[start:end].decode("utf-8")
+
+    def keys(self) -> List[str]:
+        """
+        Returns every key, indexed by key ID.
+        """
+        blob = self._map[self._blob_start:]
+        offsets = self._offsets.tolist()
+        return [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Views of the columns must have been released.
+        """
+        self._offsets.release()
+        self.key_ids.release()
+        self.timestamps.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def replay(path: str, config: ReplayConfig, chunk_events: int = REPLAY_CHUNK_EVENTS) -> ReplayResult:
+    """
+    Replays an event log through one configuration.
+
+    Args:
+        path: Event log file path.
+        config: The throttler configuration to replay.
+        chunk_events: Events decided together per should_process_batch call.
+
+    Returns:
+        ReplayResult: Counts, the per-key admit distribution and throughput.
+    """
+    with EventLog(path) as log:
+        return _replay_log(log, config, chunk_events)
+
+def _replay_log(log: EventLog, config: ReplayConfig, chunk_events: int) -> ReplayResult:
+    """
+    Replays a mapped event log; every view it creates is gone when it returns.
+    """
+    throttler = EventThrottler(
+        config.window, max_keys=config.max_keys, cleanup_interval=config.cleanup_interval,
+        policy=config.policy, algorithm=config.algorithm
+    )
+    key_table = log.keys() if config.policy is not None else None
+    # Event IDs are not recorded; they only matter for logging and deduplication
+    event_ids = [""] * min(chunk_events, log.event_count)
+    processed = 0
+    start_time = time.perf_counter()
+
+    if np is not None:
+        timestamps = np.frombuffer(log.timestamps, dtype=np.int64)
+        key_ids = np.frombuffer(log.key_ids, dtype=np.uint32)
+        admits = np.zeros(log.key_count, dtype=np.int64)
+        for start in range(0, log.event_count, chunk_events):
+            chunk_ids = key_ids[start:start + chunk_events]
+            keys = chunk_ids.tolist()
+            if key_table is not None:
+                keys = list(map(key_table.__getitem__, keys))
+            chunk_timestamps = timestamps[start:start + chunk_events]
+            if config.algorithm is not None:
+                # Algorithms decide batches with a loop, which is faster on Python ints
+                chunk_timestamps = chunk_timestamps.tolist()
+            mask = throttler.should_process_batch(chunk_timestamps, event_ids[:len(keys)], keys)
+            admits += np.bincount(chunk_ids[mask], minlength=log.key_count)
+        processed = int(admits.sum())
+        values, counts = np.unique(admits, return_counts=True)
+        distribution = Counter(dict(zip(values.tolist(), counts.tolist())))
+    else:
+        admits = array("q", bytes(8 * log.key_count))
+        for start in range(0, log.event_count, chunk_events):
+            chunk_ids = log.key_ids[start:start + chunk_events].tolist()
+            keys = chunk_ids if key_table is None else list(map(key_table.__getitem__, chunk_ids))
+            mask = throttler.should_process_batch(
+                log.timestamps[start:start + chunk_events].tolist(), event_ids[:len(keys)], keys
+            )
+            for key_id in compress(chunk_ids, mask):
+                admits[key_id] += 1
+        processed = sum(admits)
+        distribution = Counter(admits)
+
+    elapsed = time.perf_counter() - start_time
+    return ReplayResult(
+        config=config,
+        events=log.event_count,
+        processed=processed,
+        throttled=log.event_count - processed,
+        admit_percentiles=_percentiles(distribution),
+        admit_histogram=_histogram(distribution),
+        elapsed=elapsed,
+        events_per_second=log.event_count / elapsed if elapsed else 0.0
+    )
+
+def _percentiles(distribution: Counter) -> Dict[str, int]:
+    """
+    Returns the p50, p90 and p99 and maximum of per-key admit counts,
+    given the number of keys with each count.
+    """
+    total = sum(distribution.values())
+    result = {"p50": 0, "p90": 0, "p99": 0, "max": max(distribution, default=0)}
+    targets = [(name, fraction * total) for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))]
+    seen = 0
+    for value in sorted(distribution):
+        seen += distribution[value]
+        while targets and seen >= targets[0][1]:
+            result[targets.pop(0)[0]] = value
+    return result
+
+def _histogram(distribution: Counter) -> Dict[int, int]:
+    """
+    Groups per-key admit counts into power-of-two buckets (0, 1, 2-3, 4-7, ...),
+    keyed by each bucket's lower bound.
+    """
+    histogram: Counter = Counter()
+    for value, count in distribution.items():
+        histogram[1 << (value.bit_length() - 1) if value else 0] += count
+    return dict(sorted(histogram.items()))
+
+def sweep(
+    path: str,
+    configs: Sequence[ReplayConfig],
+    workers: Optional[int] = None,
+    chunk_events: int = REPLAY_CHUNK_EVENTS
+) -> List[ReplayResult]:
+    """
+    Replays an event log through every configuration, in parallel.
+
+    Each configuration is replayed in one worker process, which maps the
+    log file itself. Policies and algorithms are pickled to reach the
+    workers, so a policy's classifier must be a module-level function.
+
+    Args:
+        path: Event log file path.
+        configs: The configurations to replay.
+        workers: Number of worker processes (default: one per CPU, at most
+            one per configuration); 0 replays in the calling process.
+        chunk_events: Events decided together per should_process_batch call.
+
+    Returns:
+        List[ReplayResult]: One result per configuration, in the same order.
+    """
+    if workers is not None and workers < 0:
+        raise ValueError("workers must be at least 0")
+    # Fail early, in the caller, if the file is not an event log
+    EventLog(path).close()
+
+    start_time = time.perf_counter()
+    if workers == 0:
+        results = [replay(path, config, chunk_events) for config in configs]
+    else:
+        workers = min(workers or os.cpu_count() or 1, max(len(configs), 1))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context()) as executor:
+            results = executor.map(replay, [path] * len(configs), configs, [chunk_events] * len(configs))
+            # Hand back the caller's configurations rather than the workers' unpickled copies
+            results = [result._replace(config=config) for result, config in zip(results, configs)]
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"Replayed {len(configs)} configurations of {path} in {elapsed:.2f}s")
+    return results
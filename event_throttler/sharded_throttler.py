@@ -0,0 +1,182 @@
+"""
+Lock-striped Event Throttler
+
+This module provides a ShardedEventThrottler that hashes each key to one of
+N independent EventThrottler shards, each guarded by its own plain lock, so
+ingest threads working on different keys rarely contend with each other.
+"""
+import math
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Import the throttler, custom logger and configuration
+from throttler import EventThrottler
+from policy import WindowPolicy
+from algorithms import RateAlgorithm
+from logger import get_module_logger
+from config import DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, DEFAULT_SHARDS
+
+# Get a logger for this module
+logger = get_module_logger("sharded_throttler")
+
+class _Shard(EventThrottler):
+    """
+    A single shard of a ShardedEventThrottler.
+
+    None of the EventThrottler methods re-acquire the lock, so a plain
+    (non-reentrant) lock is sufficient and cheaper to acquire.
+    """
+
+    _lock_type = threading.Lock
+
+class ShardedEventThrottler:
+    """
+    An EventThrottler with the same API whose keys are spread over shards.
+
+    Each key always maps to the same shard, so the throttling semantics are
+    identical to a single EventThrottler. Operations that affect every key
+    (update_window, clear, get_key_count) hold all shard locks at once so
+    that they are observed consistently across shards.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        shards: int = DEFAULT_SHARDS,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL,
+        policy: Optional[WindowPolicy] = None,
+        algorithm: Optional[RateAlgorithm] = None
+    ):
+        """
+        Initialize the ShardedEventThrottler.
+
+        Args:
+            window: The throttling window in seconds (default from config).
+            shards: Number of independently locked shards (default from config).
+            max_keys: Maximum number of keys to track across all shards.
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the window (default from config).
+            policy: Per-key windows; keys it does not match use window.
+            algorithm: Rate-limiting algorithm applied per key, or None to
+                process the first event per window.
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+
+        shard_max_keys = max(1, math.ceil(max_keys / shards))
+        self._shards: List[_Shard] = [
+            _Shard(window, max_keys=shard_max_keys, cleanup_interval=cleanup_interval,
+                   policy=policy, algorithm=algorithm)
+            for _ in range(shards)
+        ]
+        self._shard_count = shards
+        logger.info(f"ShardedEventThrottler initialized with {shards} shards "
+                    f"and window of {window} seconds")
+
+    @contextmanager
+    def _all_locks(self) -> Iterator[None]:
+        """
+        Acquires every shard lock, always in shard order to avoid deadlocks.
+        """
+        acquired = []
+        try:
+            for shard in self._shards:
+                shard._lock.acquire()
+                acquired.append(shard._lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        # Only the owning shard's lock is taken
+        return self._shards[hash(key) % self._shard_count].should_process(timestamp, event_id, key)
+
+    def update_window(self, new_window: Optional[int] = None, policy: Optional[WindowPolicy] = None) -> None:
+        """
+        Updates the throttling window size and/or window policy of every
+        shard atomically.
+
+        Args:
+            new_window: The new throttling window size in seconds, or None
+                to keep the current one.
+            policy: The new window policy, or None to keep the current one.
+                Pass an empty WindowPolicy() to remove it.
+        """
+        with self._all_locks():
+            for shard in self._shards:
+                old_window = shard._update_window_locked(new_window, policy)
+        if new_window is not None:
+            logger.info(f"Window updated from {old_window}s to {new_window}s "
+                        f"across {self._shard_count} shards")
+        if policy is not None:
+            logger.info(f"Window policy updated across {self._shard_count} shards")
+
+    def get_window(self, key: Optional[str] = None) -> int:
+        """
+        Returns the current throttling window size.
+
+        Args:
+            key: If given, return this key's window under the policy instead.
+
+        Returns:
+            int: The current window size in seconds.
+        """
+        if key is None:
+            return self._shards[0].get_window()
+        return self._shards[hash(key) % self._shard_count].get_window(key)
+
+    def clear(self) -> None:
+        """
+        Clears all stored timestamps in every shard.
+        """
+        with self._all_locks():
+            for shard in self._shards:
+                shard._clear_locked()
+        logger.info("ShardedEventThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked across all shards.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        with self._all_locks():
+            return sum(len(shard._last_processed_timestamps) for shard in self._shards)
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns eviction counters summed across all shards.
+
+        Returns:
+            Dict[str, int]: Number of tracked, expired and evicted keys.
+        """
+        with self._all_locks():
+            return {
+                "tracked_keys": sum(len(s._last_processed_timestamps) for s in self._shards),
+                "expired_keys": sum(s._expired_count for s in self._shards),
+                "evicted_keys": sum(s._evicted_count for s in self._shards),
+            }
+
+    def get_shard_count(self) -> int:
+        """
+        Returns the number of shards.
+
+        Returns:
+            int: Number of shards.
+        """
+        return self._shard_count
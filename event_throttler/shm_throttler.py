@@ -0,0 +1,417 @@
+"""
+Shared-memory Event Throttler
+
+This module provides a SharedMemoryEventThrottler whose state lives in a
+multiprocessing.shared_memory block, so several worker processes on one host
+share a single consistent view of every key.
+
+The block holds a fixed-capacity open-addressing hash table of
+(key hash, int64 timestamp) slots, split into stripes. Each stripe is an
+independent linearly probed table guarded by its own multiprocessing.Lock, so
+workers only contend when their keys hash to the same stripe. Idle keys are
+removed by an incremental sweep with backward-shift deletion, as in
+CompactEventThrottler, so probe runs stay short under key churn.
+"""
+import hashlib
+import math
+from multiprocessing import Lock, shared_memory
+from typing import Dict, List
+
+# Import the custom logger and configuration
+from logger import get_module_logger
+from config import DEFAULT_WINDOW, CLEANUP_INTERVAL, MAX_KEYS, DEFAULT_SHARDS, EXPIRY_BATCH_SIZE
+
+# Get a logger for this module
+logger = get_module_logger("shm_throttler")
+
+# Header layout, in int64 words
+_MAGIC = 0x4554484D  # "ETHM"
+_HEADER_MAGIC = 0
+_HEADER_STRIPES = 1
+_HEADER_SLOTS = 2
+_HEADER_WINDOW = 3
+_HEADER_CLEANUP_INTERVAL = 4
+_HEADER_STRIPE_CAPACITY = 5
+_HEADER_WORDS = 6
+# Per-stripe counters that follow the header
+_STRIPE_KEYS = 0
+_STRIPE_EXPIRED = 1
+_STRIPE_EVICTED = 2
+_STRIPE_WATERMARK = 3
+_STRIPE_SWEEP = 4
+_STRIPE_WORDS = 5
+
+_EMPTY = 0
+_NO_TIMESTAMP = -(1 << 63)
+_HASH_MASK = (1 << 63) - 1
+_LOAD_FACTOR = 0.75
+# Keys are never stored further than this from their home slot
+_MAX_PROBE = 64
+_WORD_SIZE = 8
+
+def key_hash(key: str) -> int:
+    """
+    Returns a non-zero 63-bit hash of a key that is the same in every process.
+
+    The built-in hash() of a str is randomized per process, so it cannot be
+    stored in memory shared between processes.
+
+    Args:
+        key: Unique identifier for the user/session.
+
+    Returns:
+        int: A hash in the range [1, 2**63).
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return (int.from_bytes(digest, "little") & _HASH_MASK) or 1
+
+class SharedMemoryEventThrottler:
+    """
+    An EventThrottler with the same API whose state is shared between processes.
+
+    Create it once in the parent process and pass it to worker processes as a
+    multiprocessing.Process argument; each worker attaches to the same shared
+    memory block and stripe locks. Keys are stored as 63-bit hashes, so two
+    keys only share state in the astronomically unlikely case of a collision.
+
+    The table has a fixed capacity. Keys idle for longer than both the window
+    and the cleanup interval are expired, and when a stripe holds its share of
+    the capacity (or a new key's probe sequence is full) the least recently
+    processed key near the new key's slot is evicted.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        capacity: int = MAX_KEYS,
+        stripes: int = DEFAULT_SHARDS,
+        cleanup_interval: int = CLEANUP_INTERVAL
+    ):
+        """
+        Create the shared memory block and its stripe locks.
+
+        Args:
+            window: The throttling window in seconds (default from config).
+            capacity: Number of keys the table must hold (default from config).
+            stripes: Number of independently locked stripes (default from config).
+            cleanup_interval: Idle time in seconds after which a key's slot may
+                be reused, if longer than the window (default from config).
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+
+        stripe_capacity = math.ceil(capacity / stripes)
+        # Keeping a free slot in every stripe guarantees that probes terminate
+        slots = max(stripe_capacity + 1, math.ceil(stripe_capacity / _LOAD_FACTOR))
+        words = _HEADER_WORDS + stripes * _STRIPE_WORDS + stripes * slots * 2
+        self._shm = shared_memory.SharedMemory(create=True, size=words * _WORD_SIZE)
+        self._locks: List = [Lock() for _ in range(stripes)]
+
+        header = self._shm.buf.cast("q")
+        header[_HEADER_STRIPES] = stripes
+        header[_HEADER_SLOTS] = slots
+        header[_HEADER_WINDOW] = window
+        header[_HEADER_CLEANUP_INTERVAL] = cleanup_interval
+        header[_HEADER_STRIPE_CAPACITY] = stripe_capacity
+        for stripe in range(stripes):
+            header[_HEADER_WORDS + stripe * _STRIPE_WORDS + _STRIPE_WATERMARK] = _NO_TIMESTAMP
+        header[_HEADER_MAGIC] = _MAGIC
+        header.release()
+
+        self._attach()
+        logger.info(f"SharedMemoryEventThrottler {self._shm.name} created with "
+                    f"{stripes} stripes of {slots} slots and window of {window} seconds")
+
+    def _attach(self) -> None:
+        """
+        Maps the shared block as int64 words and reads the table geometry.
+        """
+        self._words = self._shm.buf.cast("q")
+        if self._words[_HEADER_MAGIC] != _MAGIC:
+            raise ValueError(f"{self._shm.name} is not a SharedMemoryEventThrottler block")
+        self._stripes = self._words[_HEADER_STRIPES]
+        self._slots = self._words[_HEADER_SLOTS]
+        self._stripe_capacity = self._words[_HEADER_STRIPE_CAPACITY]
+        self._probe_limit = min(self._slots, _MAX_PROBE)
+        self._table_offset = _HEADER_WORDS + self._stripes * _STRIPE_WORDS
+
+    def __getstate__(self) -> Dict:
+        """
+        Pickles a handle to the shared block; used when starting worker processes.
+        """
+        return {"name": self._shm.name, "locks": self._locks}
+
+    def __setstate__(self, state: Dict) -> None:
+        """
+        Attaches a worker process to an existing shared block.
+        """
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._locks = state["locks"]
+        self._attach()
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the shared memory block.
+        """
+        return self._shm.name
+
+    def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Determines if an event should be processed based on the throttling rule.
+
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (not used in throttling logic).
+            key: Unique identifier for the user/session.
+
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        hashed = key_hash(key)
+        stripes = self._stripes
+        stripe = hashed % stripes
+        slots = self._slots
+        words = self._words
+        base = self._table_offset + stripe * slots * 2
+        index = (hashed // stripes) % slots
+
+        with self._locks[stripe]:
+            window = words[_HEADER_WINDOW]
+            idle_limit = max(window, words[_HEADER_CLEANUP_INTERVAL])
+            counters = _HEADER_WORDS + stripe * _STRIPE_WORDS
+            reusable = -1
+            oldest = -1
+            target = -1
+
+            for _ in range(self._probe_limit):
+                position = base + 2 * index
+                slot_hash = words[position]
+                if slot_hash == hashed:
+                    if timestamp - words[position + 1] >= window:
+                        words[position + 1] = timestamp
+                        if timestamp > words[counters + _STRIPE_WATERMARK]:
+                            words[counters + _STRIPE_WATERMARK] = timestamp
+                        return True
+                    return False
+                if slot_hash == _EMPTY:
+                    target = position
+                    break
+                slot_timestamp = words[position + 1]
+                if reusable < 0 and timestamp - slot_timestamp >= idle_limit:
+                    reusable = position
+                if oldest < 0 or slot_timestamp < words[oldest + 1]:
+                    oldest = position
+                index += 1
+                if index == slots:
+                    index = 0
+
+            # The key is new. Prefer reusing an idle slot over growing the
+            # probe run; evict a key only if the stripe holds its share of the
+            # capacity or the new key's probe sequence has no free slot.
+            if reusable >= 0:
+                target = reusable
+                words[counters + _STRIPE_EXPIRED] += 1
+            elif target >= 0 and words[counters + _STRIPE_KEYS] < self._stripe_capacity:
+                words[counters + _STRIPE_KEYS] += 1
+            elif oldest >= 0:
+                target = oldest
+                words[counters + _STRIPE_EVICTED] += 1
+            else:
+                # The new key's home slot is free; evict from the next probe run instead
+                self._evict_after(base, counters, index, timestamp)
+                words[counters + _STRIPE_KEYS] += 1
+
+            words[target] = hashed
+            words[target + 1] = timestamp
+            if timestamp > words[counters + _STRIPE_WATERMARK]:
+                words[counters + _STRIPE_WATERMARK] = timestamp
+            self._sweep(base, counters)
+            return True
+
+    def _home(self, hashed: int) -> int:
+        """
+        Returns the index of a key's preferred slot within its stripe.
+        """
+        return (hashed // self._stripes) % self._slots
+
+    def _delete(self, base: int, counters: int, index: int) -> None:
+        """
+        Empties a slot of a stripe, shifting later entries of its probe run back
+        so that lookups never stop early at the hole (no tombstones are needed).
+
+        Must be called with the stripe lock held. Entries only ever move closer
+        to their home slot, so every key stays within _MAX_PROBE slots of it.
+        """
+        words = self._words
+        slots = self._slots
+        hole = index
+        index = (index + 1) % slots
+        while words[base + 2 * index] != _EMPTY:
+            position = base + 2 * index
+            home = self._home(words[position])
+            # Move the entry into the hole unless its home lies cyclically in (hole, index]
+            if (index - home) % slots >= (index - hole) % slots:
+                words[base + 2 * hole] = words[position]
+                words[base + 2 * hole + 1] = words[position + 1]
+                hole = index
+            index = (index + 1) % slots
+        words[base + 2 * hole] = _EMPTY
+        words[base + 2 * hole + 1] = 0
+        words[counters + _STRIPE_KEYS] -= 1
+
+    def _evict_after(self, base: int, counters: int, index: int, timestamp: int) -> None:
+        """
+        Removes the least recently processed key of the probe run that
+        follows a free slot, to make room in a stripe at its capacity.
+        """
+        words = self._words
+        slots = self._slots
+        while words[base + 2 * index] == _EMPTY:
+            index = (index + 1) % slots
+
+        oldest = index
+        for _ in range(self._probe_limit):
+            if words[base + 2 * index] == _EMPTY:
+                break
+            if words[base + 2 * index + 1] < words[base + 2 * oldest + 1]:
+                oldest = index
+            index = (index + 1) % slots
+
+        idle_limit = max(words[_HEADER_WINDOW], words[_HEADER_CLEANUP_INTERVAL])
+        if timestamp - words[base + 2 * oldest + 1] >= idle_limit:
+            words[counters + _STRIPE_EXPIRED] += 1
+        else:
+            words[counters + _STRIPE_EVICTED] += 1
+        self._delete(base, counters, oldest)
+
+    def _sweep(self, base: int, counters: int) -> None:
+        """
+        Sweeps a few slots of a stripe for idle keys and deletes them.
+
+        Must be called with the stripe lock held, after storing a new key. The
+        sweep visits the stripe in slot order, EXPIRY_BATCH_SIZE slots per new
+        key, so idle keys are freed at least as fast as new keys arrive and
+        the live key count never includes keys that could have expired.
+        """
+        words = self._words
+        slots = self._slots
+        horizon = words[counters + _STRIPE_WATERMARK] - max(words[_HEADER_WINDOW], words[_HEADER_CLEANUP_INTERVAL])
+        index = words[counters + _STRIPE_SWEEP]
+        for _ in range(EXPIRY_BATCH_SIZE):
+            position = base + 2 * index
+            if words[position] != _EMPTY and words[position + 1] <= horizon:
+                # Deleting may shift another entry into this slot, so look again
+                self._delete(base, counters, index)
+                words[counters + _STRIPE_EXPIRED] += 1
+            else:
+                index = (index + 1) % slots
+        words[counters + _STRIPE_SWEEP] = index
+
+    def _acquire_all(self) -> None:
+        """
+        Acquires every stripe lock, always in stripe order to avoid deadlocks.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _release_all(self) -> None:
+        """
+        Releases every stripe lock.
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def update_window(self, new_window: int) -> None:
+        """
+        Updates the throttling window size for every attached process.
+
+        Args:
+            new_window: The new throttling window size in seconds.
+        """
+        self._acquire_all()
+        try:
+            old_window = self._words[_HEADER_WINDOW]
+            self._words[_HEADER_WINDOW] = new_window
+        finally:
+            self._release_all()
+        logger.info(f"Window updated from {old_window}s to {new_window}s")
+
+    def get_window(self) -> int:
+        """
+        Returns the current throttling window size.
+
+        Returns:
+            int: The current window size in seconds.
+        """
+        return self._words[_HEADER_WINDOW]
+
+    def clear(self) -> None:
+        """
+        Clears all stored timestamps for every attached process.
+        """
+        table_start = self._table_offset * _WORD_SIZE
+        self._acquire_all()
+        try:
+            self._shm.buf[table_start:] = bytes(len(self._shm.buf) - table_start)
+            for stripe in range(self._stripes):
+                counters = _HEADER_WORDS + stripe * _STRIPE_WORDS
+                self._words[counters + _STRIPE_KEYS] = 0
+                self._words[counters + _STRIPE_WATERMARK] = _NO_TIMESTAMP
+                self._words[counters + _STRIPE_SWEEP] = 0
+        finally:
+            self._release_all()
+        logger.info("SharedMemoryEventThrottler has been cleared")
+
+    def get_key_count(self) -> int:
+        """
+        Returns the number of keys currently being tracked.
+
+        Returns:
+            int: Number of keys in the throttler.
+        """
+        return self.get_eviction_stats()["tracked_keys"]
+
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+
+        Returns:
+            Dict[str, int]: Number of tracked keys, keys removed after
+            being idle, and keys evicted from a full stripe.
+        """
+        stats = {"tracked_keys": 0, "expired_keys": 0, "evicted_keys": 0}
+        self._acquire_all()
+        try:
+            for stripe in range(self._stripes):
+                counters = _HEADER_WORDS + stripe * _STRIPE_WORDS
+                stats["tracked_keys"] += self._words[counters + _STRIPE_KEYS]
+                stats["expired_keys"] += self._words[counters + _STRIPE_EXPIRED]
+                stats["evicted_keys"] += self._words[counters + _STRIPE_EVICTED]
+        finally:
+            self._release_all()
+        return stats
+
+    def get_capacity(self) -> int:
+        """
+        Returns the number of keys the table holds before evicting.
+
+        Returns:
+            int: The requested capacity, rounded up to a multiple of the stripe count.
+        """
+        return self._stripes * self._stripe_capacity
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared block.
+        """
+        self._words.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Destroys the shared block. Call once, from the creating process.
+        """
+        self._shm.unlink()
@@ -0,0 +1,189 @@
+"""
+Binary snapshots of throttler state.
+
+This module writes and reads the compact snapshot format used by
+EventThrottler.snapshot and EventThrottler.restore. A snapshot file contains:
+
+- a fixed-size header (magic, version, key count, window, watermark,
+  newest timestamp, section sizes and a CRC32 of everything after it),
+- a uint64 offsets array (count + 1 entries) into the key blob,
+- a packed int64 timestamps array, in the same order as the keys,
+- the UTF-8 key blob, with keys sorted by their encoded bytes.
+
+The arrays are stored in the host's native byte order.
+
+Because keys are sorted, a SnapshotView can memory-map the file and look up a
+single key with a binary search, without decoding the other keys.
+"""
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional, Tuple
+
+_MAGIC = b"ETSNAP01"
+_VERSION = 1
+# magic, version, reserved, count, window, watermark, max timestamp, blob size, checksum, reserved
+_HEADER = struct.Struct("<8sIIQqqqQII")
+_NO_TIMESTAMP = -(2 ** 63)
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot file is truncated, corrupt or of an unknown version.
+    """
+
+def write_snapshot(
+    path: str,
+    items: Iterable[Tuple[str, int]],
+    window: int,
+    watermark: Optional[int]
+) -> int:
+    """
+    Writes (key, timestamp) pairs to a snapshot file.
+
+    The file is written to a temporary name and renamed into place, so a
+    reader never sees a partially written snapshot.
+
+    Args:
+        path: Destination file path.
+        items: (key, last processed timestamp) pairs.
+        window: The throttling window in seconds.
+        watermark: Latest processed timestamp, or None if nothing was processed.
+
+    Returns:
+        int: Number of keys written.
+    """
+    entries = sorted((key.encode("utf-8"), timestamp) for key, timestamp in items)
+    encoded_keys = [key for key, _ in entries]
+    timestamps = array("q", [timestamp for _, timestamp in entries])
+    offsets = array("Q", [0])
+    offsets.extend(accumulate(len(key) for key in encoded_keys))
+    blob = b"".join(encoded_keys)
+
+    max_timestamp = max(timestamps) if timestamps else _NO_TIMESTAMP
+    checksum = zlib.crc32(offsets)
+    checksum = zlib.crc32(timestamps, checksum)
+    checksum = zlib.crc32(blob, checksum)
+    header = _HEADER.pack(
+        _MAGIC, _VERSION, 0, len(entries), window,
+        _NO_TIMESTAMP if watermark is None else watermark,
+        max_timestamp, len(blob), checksum, 0
+    )
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(offsets)
+        snapshot_file.write(timestamps)
+        snapshot_file.write(blob)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+    return len(entries)
+
+class SnapshotView:
+    """
+    A read-only, memory-mapped view of a snapshot file.
+
+    Opening a view maps the file and verifies its checksum; keys are only
+    decoded when they are looked up or iterated.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a snapshot file and validate it.
+
+        Args:
+            path: Snapshot file path.
+
+        Raises:
+            SnapshotError: If the file is not a valid snapshot.
+        """
+        with open(path, "rb") as snapshot_file:
+            size = os.fstat(snapshot_file.fileno()).st_size
+            if size < _HEADER.size:
+                raise SnapshotError(f"{path} is too small to be a snapshot")
+            self._map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            (magic, version, _, count, window, watermark,
+             max_timestamp, blob_size, checksum, _) = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise SnapshotError(f"{path} is not a snapshot file")
+            if version != _VERSION:
+                raise SnapshotError(f"{path} has unsupported snapshot version {version}")
+
+            offsets_start = _HEADER.size
+            timestamps_start = offsets_start + (count + 1) * 8
+            self._blob_start = timestamps_start + count * 8
+            if self._blob_start + blob_size != size:
+                raise SnapshotError(f"{path} is truncated")
+            if zlib.crc32(memoryview(self._map)[offsets_start:]) != checksum:
+                raise SnapshotError(f"{path} failed its checksum")
+        except Exception:
+            self._map.close()
+            raise
+
+        self._view = memoryview(self._map)
+        self._offsets = self._view[offsets_start:timestamps_start].cast("Q")
+        self._timestamps = self._view[timestamps_start:self._blob_start].cast("q")
+        self.count = count
+        self.window = window
+        self.watermark = None if watermark == _NO_TIMESTAMP else watermark
+        self.max_timestamp = None if max_timestamp == _NO_TIMESTAMP else max_timestamp
+
+    def _key_bytes(self, index: int) -> bytes:
+        """
+        Returns the encoded key stored at an index.
+        """
+        start = self._blob_start + self._offsets[index]
+        end = self._blob_start + self._offsets[index + 1]
+        return self._map[start:end]
+
+    def find(self, key: str) -> int:
+        """
+        Looks up a key with a binary search over the sorted keys.
+
+        Args:
+            key: Unique identifier for the user/session.
+
+        Returns:
+            int: The key's index, or -1 if it is not in the snapshot.
+        """
+        encoded = key.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_bytes(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._key_bytes(low) == encoded:
+            return low
+        return -1
+
+    def timestamp(self, index: int) -> int:
+        """
+        Returns the last processed timestamp stored at an index.
+        """
+        return self._timestamps[index]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """
+        Yields every (key, timestamp) pair, decoding keys as it goes.
+        """
+        blob = self._map[self._blob_start:]
+        offsets = self._offsets
+        for index in range(self.count):
+            yield blob[offsets[index]:offsets[index + 1]].decode("utf-8"), self._timestamps[index]
+
+    def close(self) -> None:
+        """
+        Unmaps the file.
+        """
+        self._offsets.release()
+        self._timestamps.release()
+        self._view.release()
+        self._map.close()
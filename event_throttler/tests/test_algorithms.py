@@ -0,0 +1,150 @@
+"""
+Unit tests for the rate-limiting algorithms.
+"""
+import unittest
+import os
+import random
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from algorithms import GCRA, TokenBucket, SlidingWindowCounter
+from policy import WindowPolicy
+from throttler import EventThrottler
+from sharded_throttler import ShardedEventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def random_events(count, keys, seed):
+    """Returns events with non-decreasing timestamps over a few keys."""
+    rng = random.Random(seed)
+    timestamp = 0
+    events = []
+    for i in range(count):
+        timestamp += rng.choice([0, 0, 0, 1, 2])
+        events.append((timestamp, f"e{i}", f"user{rng.randrange(keys)}"))
+    return events
+
+class AlgorithmTests(unittest.TestCase):
+    """Test cases for throttlers using a rate-limiting algorithm."""
+
+    def test_gcra(self):
+        """Test a burst followed by evenly spaced events."""
+        throttler = EventThrottler(window=6, algorithm=GCRA(limit=3))
+        self.assertEqual([throttler.should_process(0, f"e{i}", "userA") for i in range(4)],
+                         [True, True, True, False])
+        self.assertFalse(throttler.should_process(1, "e4", "userA"))
+        self.assertTrue(throttler.should_process(2, "e5", "userA"))
+        self.assertFalse(throttler.should_process(3, "e6", "userA"))
+        self.assertTrue(throttler.should_process(4, "e7", "userA"))
+
+    def test_gcra_without_burst_matches_first_event_rule(self):
+        """Test that one event per window is exactly the default rule, expiry included."""
+        gcra = EventThrottler(window=5, cleanup_interval=12, algorithm=GCRA(limit=1))
+        default = EventThrottler(window=5, cleanup_interval=12)
+        for event in random_events(5000, 50, seed=1):
+            self.assertEqual(gcra.should_process(*event), default.should_process(*event))
+        self.assertEqual(gcra.get_eviction_stats(), default.get_eviction_stats())
+
+    def test_token_bucket_matches_gcra(self):
+        """Test that a token bucket decides like GCRA with the same rate and burst."""
+        bucket = EventThrottler(window=7, algorithm=TokenBucket(limit=3, burst=5))
+        gcra = EventThrottler(window=7, algorithm=GCRA(limit=3, burst=5))
+        decisions = []
+        for event in random_events(5000, 20, seed=2):
+            decisions.append(bucket.should_process(*event))
+            self.assertEqual(decisions[-1], gcra.should_process(*event))
+        self.assertIn(True, decisions)
+        self.assertIn(False, decisions)
+
+    def test_sliding_window_counter(self):
+        """Test that the previous window's count is weighted by its overlap."""
+        throttler = EventThrottler(window=10, algorithm=SlidingWindowCounter(limit=2))
+        self.assertTrue(throttler.should_process(0, "e1", "userA"))
+        self.assertTrue(throttler.should_process(1, "e2", "userA"))
+        self.assertFalse(throttler.should_process(2, "e3", "userA"))
+        self.assertFalse(throttler.should_process(10, "e4", "userA"))
+        self.assertTrue(throttler.should_process(15, "e5", "userA"))
+        self.assertTrue(throttler.should_process(16, "e6", "userA"))
+        self.assertFalse(throttler.should_process(17, "e7", "userA"))
+        self.assertFalse(throttler.should_process(20, "e8", "userA"))
+        self.assertTrue(throttler.should_process(25, "e9", "userA"))
+
+    def test_state_is_one_int_and_expires(self):
+        """Test that each key keeps one int and is dropped once it has reset."""
+        for algorithm in [GCRA(limit=4), TokenBucket(limit=4), SlidingWindowCounter(limit=4)]:
+            throttler = EventThrottler(window=10, cleanup_interval=0, algorithm=algorithm)
+            for i in range(100):
+                throttler.should_process(0, f"e{i}", f"user{i}")
+            self.assertTrue(all(type(state) is int for state in throttler._last_processed_timestamps.values()))
+            for timestamp in range(1, 100):
+                throttler.should_process(timestamp, "e", "active")
+            self.assertEqual(throttler.get_key_count(), 1, algorithm)
+
+    def test_shorter_policy_window_expires(self):
+        """Test that keys with a window shorter than the longest one still expire."""
+        policy = WindowPolicy(prefixes={"bot": 2})
+        throttler = EventThrottler(window=100, cleanup_interval=0, algorithm=SlidingWindowCounter(1), policy=policy)
+        throttler.should_process(1000, "e1", "bot1")
+        throttler.should_process(2000, "e2", "user1")
+        self.assertEqual(throttler.get_eviction_stats()["expired_keys"], 1)
+        self.assertEqual(throttler.get_key_count(), 1)
+
+    def test_token_bucket_window_checked_upfront(self):
+        """Test that windows too long for a token bucket are refused before use."""
+        with self.assertRaises(ValueError):
+            EventThrottler(window=10, algorithm=TokenBucket(limit=1, burst=2 ** 31))
+        throttler = EventThrottler(window=10, algorithm=TokenBucket(limit=1, burst=5))
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        with self.assertRaises(ValueError):
+            throttler.update_window(2 ** 30)
+        with self.assertRaises(ValueError):
+            throttler.update_window(policy=WindowPolicy(prefixes={"user": 2 ** 30}))
+        self.assertEqual(throttler.get_window(), 10)
+        self.assertEqual(throttler.get_window("userA"), 10)
+
+    def test_batch_and_shards_match_sequential(self):
+        """Test batches, window policies and shards with an algorithm."""
+        policy = WindowPolicy(prefixes={"user1": 2})
+        events = random_events(3000, 30, seed=3)
+        expected_throttler = EventThrottler(window=6, algorithm=SlidingWindowCounter(3), policy=policy)
+        expected = [expected_throttler.should_process(*event) for event in events]
+
+        batched = EventThrottler(window=6, algorithm=SlidingWindowCounter(3), policy=policy)
+        timestamps, event_ids, keys = zip(*events)
+        mask = batched.should_process_batch(timestamps, event_ids, keys)
+        self.assertEqual([bool(value) for value in mask], expected)
+
+        sharded = ShardedEventThrottler(window=6, shards=4, algorithm=SlidingWindowCounter(3), policy=policy)
+        self.assertEqual([sharded.should_process(*event) for event in events], expected)
+
+    def test_snapshot_not_supported(self):
+        """Test that snapshots refuse algorithm states."""
+        throttler = EventThrottler(window=10, algorithm=GCRA(limit=2))
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                throttler.snapshot(os.path.join(directory, "throttler.snap"))
+
+    def test_invalid_parameters(self):
+        """Test that limits and bursts must be positive."""
+        with self.assertRaises(ValueError):
+            GCRA(limit=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(limit=1, burst=0)
+        with self.assertRaises(ValueError):
+            SlidingWindowCounter(limit=0)
+
+if __name__ == "__main__":
+    unittest.main()
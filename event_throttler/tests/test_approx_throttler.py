@@ -0,0 +1,137 @@
+"""
+Unit tests for the ApproximateEventThrottler class.
+"""
+import unittest
+import random
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+import approx_throttler
+from approx_throttler import ApproximateEventThrottler
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def random_events(count, keys, rate, seed):
+    """Returns events with keys drawn uniformly, rate per second."""
+    rng = random.Random(seed)
+    return [(i // rate, f"e{i}", f"ip{rng.randrange(keys)}") for i in range(count)]
+
+def score(events, decisions, window):
+    """Counts throttled events whose key was idle for the window, and keys processed twice within it."""
+    last_processed = {}
+    false_throttles = 0
+    repeats = 0
+    for (timestamp, _, key), processed in zip(events, decisions):
+        last = last_processed.get(key)
+        idle = last is None or timestamp - last >= window
+        if processed:
+            repeats += not idle
+            last_processed[key] = timestamp
+        elif idle:
+            false_throttles += 1
+    return false_throttles, repeats
+
+class ApproximateEventThrottlerTests(unittest.TestCase):
+    """Test cases for the ApproximateEventThrottler class."""
+
+    def test_basic_throttling(self):
+        """Test the throttling rule with a sketch large enough to be exact."""
+        throttler = ApproximateEventThrottler(window=10, memory_bytes=1 << 16)
+        results = [
+            throttler.should_process(*event)
+            for event in [(1, "e1", "userA"), (5, "e2", "userA"), (11, "e3", "userA"),
+                          (12, "e4", "userB"), (15, 'e5', 12345), (16, "e6", 12345)]
+        ]
+        self.assertEqual(results, [True, False, True, True, True, False])
+        self.assertEqual(throttler.get_key_count(), 3)
+        self.assertEqual(throttler.get_memory_usage(), 1 << 16)
+
+        throttler.update_window(20)
+        self.assertEqual(throttler.get_window(), 20)
+        self.assertFalse(throttler.should_process(30, "e7", "userA"))
+        throttler.clear()
+        self.assertTrue(throttler.should_process(30, "e8", "userA"))
+
+    def test_matches_exact_throttler_when_sparse(self):
+        """Test that a lightly loaded sketch decides like EventThrottler."""
+        events = random_events(20000, 2000, rate=100, seed=1)
+        exact = EventThrottler(window=10)
+        expected = [exact.should_process(*event) for event in events]
+        throttler = ApproximateEventThrottler(window=10, memory_bytes=1 << 20)
+        self.assertEqual([throttler.should_process(*event) for event in events], expected)
+
+    def test_false_throttles_are_bounded(self):
+        """Test that a loaded sketch never repeats a key and stays near the predicted rate."""
+        events = random_events(100000, 1000000, rate=2000, seed=2)
+        memory = ApproximateEventThrottler.memory_for(20000, 0.01)
+        throttler = ApproximateEventThrottler(window=10, memory_bytes=memory)
+        decisions = [throttler.should_process(*event) for event in events]
+
+        false_throttles, repeats = score(events, decisions, 10)
+        self.assertEqual(repeats, 0)
+        self.assertLess(false_throttles / len(events), 0.02)
+        self.assertLess(throttler.estimate_false_throttle_rate(20000), 0.0101)
+        self.assertAlmostEqual(throttler.get_key_count(), 20000, delta=2000)
+
+    def test_batches(self):
+        """Test batch decisions with NumPy and with the plain loop."""
+        events = random_events(30000, 100000, rate=1000, seed=3)
+        throttler = ApproximateEventThrottler(window=5, memory_bytes=1 << 20)
+        expected = [throttler.should_process(*event) for event in events]
+
+        for use_numpy in (True, False):
+            saved_np = approx_throttler.np
+            if not use_numpy:
+                approx_throttler.np = None
+            try:
+                throttler = ApproximateEventThrottler(window=5, memory_bytes=1 << 20)
+                decisions = []
+                for start in range(0, len(events), 7000):
+                    decisions.extend(throttler.should_process_batch(*zip(*events[start:start + 7000])))
+            finally:
+                approx_throttler.np = saved_np
+            self.assertEqual([bool(d) for d in decisions], expected)
+
+        # Without a window every event is decided on its own, also in a batch
+        for window in (0, -3):
+            sequential = ApproximateEventThrottler(window=window, memory_bytes=1 << 16)
+            batched = ApproximateEventThrottler(window=window, memory_bytes=1 << 16)
+            for batch in ([(t // 8, f"e{t}", f"user{t % 3}") for t in range(80)],
+                          [(t // 8, f"e{t}", f"user{t % 5}") for t in range(40)]):
+                expected = [sequential.should_process(*event) for event in batch]
+                self.assertEqual([bool(d) for d in batched.should_process_batch(*zip(*batch))], expected)
+
+        # Out-of-order batches are decided one event at a time
+        throttler = ApproximateEventThrottler(window=5, memory_bytes=1 << 16)
+        batch = [(t, f"e{t}", "userA") for t in [9, 3, 10, 15, 14, 20]] * 6
+        self.assertEqual(
+            [bool(d) for d in throttler.should_process_batch(*zip(*batch))],
+            [t in (9, 15, 20) and i < 6 for i, (t, _, _) in enumerate(batch)]
+        )
+
+    def test_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            ApproximateEventThrottler(rows=0)
+        with self.assertRaises(ValueError):
+            ApproximateEventThrottler(memory_bytes=16, rows=4)
+        with self.assertRaises(ValueError):
+            ApproximateEventThrottler.memory_for(1000, 0)
+        with self.assertRaises(ValueError):
+            ApproximateEventThrottler(window=10).should_process_batch([1], [], ["userA"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Unit tests for the AsyncEventThrottler class and the asyncio pipeline.
+"""
+import unittest
+import asyncio
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from async_throttler import AsyncEventThrottler, throttle_pipeline
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+EVENTS = [
+    (1, "e1", "userA"),
+    (5, "e2", "userA"),
+    (12, "e3", "userA"),
+    (15, "e4", "userB"),
+    (20, "e5", "userB"),
+    (25, "e6", "userB"),
+]
+
+async def iterate(events):
+    for event in events:
+        await asyncio.sleep(0)
+        yield event
+
+class AsyncEventThrottlerTests(unittest.IsolatedAsyncioTestCase):
+    """Test cases for AsyncEventThrottler and throttle_pipeline."""
+    
+    async def test_basic_throttling(self):
+        """Test that decisions match EventThrottler."""
+        throttler = AsyncEventThrottler(window=10)
+        results = [await throttler.should_process(*event) for event in EVENTS]
+        self.assertEqual(results, [True, False, True, True, False, True])
+        self.assertEqual(throttler.get_key_count(), 2)
+        
+        throttler.update_window(20)
+        self.assertEqual(throttler.get_window(), 20)
+        self.assertFalse(await throttler.should_process(30, "e7", "userA"))
+        
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+    
+    async def test_pipeline_from_async_iterator(self):
+        """Test that the pipeline yields only the processed events."""
+        throttler = AsyncEventThrottler(window=10)
+        processed = [event async for event in throttle_pipeline(iterate(EVENTS), throttler, batch_size=4)]
+        self.assertEqual([event[1] for event in processed], ["e1", "e3", "e4", "e6"])
+    
+    async def test_pipeline_from_queue_matches_sequential(self):
+        """Test a queue source against sequential should_process calls."""
+        events = [(i // 3, f"e{i}", f"user{i % 7}", {"payload": i}) for i in range(300)]
+        sequential = EventThrottler(window=4)
+        expected = [event for event in events if sequential.should_process(*event[:3])]
+        
+        queue = asyncio.Queue(maxsize=16)
+        
+        async def produce():
+            for event in events:
+                await queue.put(event)
+            await queue.put(None)
+        
+        producer = asyncio.ensure_future(produce())
+        throttler = AsyncEventThrottler(window=4)
+        processed = [event async for event in throttle_pipeline(queue, throttler, batch_size=8)]
+        await producer
+        self.assertEqual(processed, expected)
+    
+    async def test_pipeline_backpressure(self):
+        """Test that the source is not read ahead of the consumer."""
+        produced = []
+        
+        async def source():
+            for i in range(1000):
+                produced.append(i)
+                yield (i, f"e{i}", f"user{i}")
+        
+        throttler = AsyncEventThrottler(window=10)
+        pipeline = throttle_pipeline(source(), throttler, batch_size=10)
+        await pipeline.__anext__()
+        await asyncio.sleep(0.01)
+        # At most one batch plus the bounded queue has been read
+        self.assertLess(len(produced), 50)
+        await pipeline.aclose()
+    
+    async def test_pipeline_source_error(self):
+        """Test that an error raised by the source reaches the consumer."""
+        async def failing_source():
+            yield (1, "e1", "userA")
+            raise RuntimeError("feed lost")
+        
+        throttler = AsyncEventThrottler(window=10)
+        processed = []
+        with self.assertRaises(RuntimeError):
+            async for event in throttle_pipeline(failing_source(), throttler):
+                processed.append(event)
+        # Events read before the failure are still delivered
+        self.assertEqual(processed, [(1, "e1", "userA")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Unit tests for the benchmark workloads and runner.
+"""
+import unittest
+import sys
+import logging
+from collections import Counter
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from benchmarks.workloads import WORKLOADS, generate_zipfian, generate_churn
+from benchmarks.runner import run_workload, compare_to_baseline, percentile
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class WorkloadTests(unittest.TestCase):
+    """Test cases for the pregenerated workloads."""
+
+    def test_workloads_are_reproducible(self):
+        """Test that every workload is deterministic and time-ordered."""
+        for name, workload in WORKLOADS.items():
+            events = workload.generate(2000, 100, 3)
+            self.assertEqual(events, workload.generate(2000, 100, 3), name)
+            self.assertEqual(len(events), 2000, name)
+            timestamps = [timestamp for timestamp, _, _ in events]
+            self.assertEqual(timestamps, sorted(timestamps), name)
+
+    def test_zipfian_has_hot_keys(self):
+        """Test that the Zipfian workload concentrates events on a few keys."""
+        counts = Counter(key for _, _, key in generate_zipfian(20000, 1000))
+        top_ten = sum(count for _, count in counts.most_common(10))
+        self.assertGreater(top_ten, 20000 * 0.4)
+
+    def test_churn_keeps_creating_keys(self):
+        """Test that the churn workload has far more keys than are active at once."""
+        keys = {key for _, _, key in generate_churn(20000, 100)}
+        self.assertGreater(len(keys), 2000)
+
+class RunnerTests(unittest.TestCase):
+    """Test cases for the benchmark runner."""
+
+    def test_run_workload_reports_metrics(self):
+        """Test that a run reports throughput, latency percentiles and memory."""
+        events = WORKLOADS["contention"].generate(4000, 50, 0)
+        result = run_workload(lambda: EventThrottler(window=5), events, threads=4)
+
+        self.assertEqual(result["events"], 4000)
+        self.assertEqual(result["threads"], 4)
+        self.assertGreater(result["events_per_sec"], 0)
+        latency = result["latency_ns"]
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["p999"])
+        self.assertGreater(result["memory_bytes_per_key"], 0)
+
+    def test_processed_matches_sequential(self):
+        """Test that a single-threaded run decides every event like should_process."""
+        events = WORKLOADS["bursty"].generate(3000, 200, 1)
+        throttler = EventThrottler(window=5)
+        expected = sum(throttler.should_process(*event) for event in events)
+
+        result = run_workload(lambda: EventThrottler(window=5), events, measure_memory=False)
+        self.assertEqual(result["processed"], expected)
+        self.assertNotIn("memory_bytes", result)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 1001))
+        self.assertEqual(percentile(values, 0.5), 501)
+        self.assertEqual(percentile(values, 0.99), 991)
+        self.assertEqual(percentile(values, 0.999), 1000)
+
+    def test_compare_to_baseline(self):
+        """Test that only drops beyond the tolerance are regressions."""
+        baseline = {"uniform": {"events_per_sec": 1000}, "zipfian": {"events_per_sec": 1000}}
+        results = {
+            "uniform": {"events_per_sec": 950},
+            "zipfian": {"events_per_sec": 850},
+            "churn": {"events_per_sec": 10},
+        }
+
+        regressions = compare_to_baseline(results, baseline, tolerance=0.1)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("zipfian"))
+        self.assertEqual(compare_to_baseline(results, baseline, tolerance=0.2), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Unit tests for the BloomFilter class.
+"""
+import unittest
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from bloom import BloomFilter
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class BloomFilterTests(unittest.TestCase):
+    """Test cases for the BloomFilter class."""
+
+    def test_no_false_negatives(self):
+        """Test that every added key is reported as present."""
+        bloom = BloomFilter.from_keys((f"user{i}" for i in range(10000)), capacity=10000)
+        self.assertTrue(all(f"user{i}" in bloom for i in range(10000)))
+        self.assertEqual(len(bloom), 10000)
+
+    def test_false_positive_rate(self):
+        """Test that the false-positive rate at capacity is close to the target."""
+        bloom = BloomFilter.from_keys((f"user{i}" for i in range(20000)), capacity=20000, error_rate=0.01)
+        false_positives = sum(f"other{i}" in bloom for i in range(100000))
+        self.assertLess(false_positives / 100000, 0.02)
+        self.assertLess(bloom.nbytes, 30000)
+
+    def test_clear_and_arguments(self):
+        """Test clear and argument validation."""
+        bloom = BloomFilter(100)
+        bloom.add("userA")
+        bloom.clear()
+        self.assertNotIn("userA", bloom)
+        self.assertEqual(len(bloom), 0)
+        with self.assertRaises(ValueError):
+            BloomFilter(0)
+        with self.assertRaises(ValueError):
+            BloomFilter(100, error_rate=1.0)
+
+if __name__ == "__main__":
+    unittest.main()
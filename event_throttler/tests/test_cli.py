@@ -0,0 +1,121 @@
+"""
+Unit tests for the command-line interface.
+"""
+import unittest
+import io
+import os
+import json
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from cli import BINARY_MAGIC, main, pack_binary_event, read_binary_chunks, read_csv_chunks
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+EVENTS = [(i // 3, f"e{i}", f"user{(i * 7) % 11}") for i in range(600)]
+
+class CliTests(unittest.TestCase):
+    """Test cases for python -m event_throttler."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        throttler = EventThrottler(window=5)
+        self.expected = [throttler.should_process(*event) for event in EVENTS]
+
+    def run_cli(self, name, content, *args):
+        """Writes content to name, runs the CLI on it and returns the output bytes."""
+        input_path = os.path.join(self.directory, name)
+        output_path = os.path.join(self.directory, "output")
+        with open(input_path, "wb") as input_file:
+            input_file.write(content)
+        status = main(["-q", "-w", "5", "--chunk-bytes", "256", "-o", output_path, *args, input_path])
+        self.assertEqual(status, 0)
+        with open(output_path, "rb") as output_file:
+            return output_file.read()
+
+    def test_csv_processed_events(self):
+        """Test that only processed CSV lines are written, with the header."""
+        lines = [f"{t},{e},{k}\n" for t, e, k in EVENTS]
+        output = self.run_cli("events.csv", ("timestamp,event_id,key\n" + "".join(lines)).encode())
+        expected = [line for line, keep in zip(lines, self.expected) if keep]
+        self.assertEqual(output.decode(), "timestamp,event_id,key\n" + "".join(expected))
+
+    def test_csv_blank_lines(self):
+        """Test that blank CSV lines are skipped, as in JSONL input."""
+        lines = [f"{t},{e},{k}\n" for t, e, k in EVENTS]
+        content = "\n" + "".join(line + ("\n" if i % 50 == 0 else "") for i, line in enumerate(lines))
+        output = self.run_cli("events.csv", ("\r\n" + "timestamp,event_id,key\n" + content).encode())
+        expected = [line for line, keep in zip(lines, self.expected) if keep]
+        self.assertEqual(output.decode(), "timestamp,event_id,key\n" + "".join(expected))
+
+    def test_csv_decisions(self):
+        """Test the decision column, quoted fields and extra columns."""
+        lines = [f'{t},{e},"{k},x",extra\n' for t, e, k in EVENTS]
+        output = self.run_cli("events.csv", "".join(lines).encode(), "--decisions").decode()
+        self.assertEqual(
+            output.splitlines(),
+            [f"{line.rstrip()},{int(keep)}" for line, keep in zip(lines, self.expected)]
+        )
+
+    def test_jsonl(self):
+        """Test JSONL input, in both output modes."""
+        lines = [json.dumps({"timestamp": t, "event_id": e, "key": k}) + "\n" for t, e, k in EVENTS]
+        content = "".join(lines).encode()
+
+        output = self.run_cli("events.jsonl", content)
+        self.assertEqual(output.decode(), "".join(line for line, keep in zip(lines, self.expected) if keep))
+
+        output = self.run_cli("events.jsonl", content, "--decisions")
+        decisions = [json.loads(line)["processed"] for line in output.decode().splitlines()]
+        self.assertEqual(decisions, self.expected)
+
+    def test_binary(self):
+        """Test binary records split across chunk boundaries."""
+        content = BINARY_MAGIC + b"".join(pack_binary_event(*event) for event in EVENTS)
+
+        output = self.run_cli("events.bin", content)
+        chunks = list(read_binary_chunks(io.BytesIO(output)))
+        written = [event for chunk in chunks for event in zip(chunk.timestamps, chunk.event_ids, chunk.keys)]
+        self.assertEqual(written, [event for event, keep in zip(EVENTS, self.expected) if keep])
+
+        output = self.run_cli("events.bin", content, "--decisions")
+        self.assertEqual(list(output), [int(keep) for keep in self.expected])
+
+    def test_chunks_are_bounded(self):
+        """Test that the reader yields many small chunks for a small chunk size."""
+        text = "".join(f"{t},{e},{k}\n" for t, e, k in EVENTS)
+        chunks = list(read_csv_chunks(io.StringIO(text), chunk_bytes=200))
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(sum(len(chunk.records) for chunk in chunks), len(EVENTS))
+
+    def test_invalid_input(self):
+        """Test that malformed input fails with a non-zero status."""
+        input_path = os.path.join(self.directory, "bad.csv")
+        with open(input_path, "w") as input_file:
+            input_file.write("1,e1,userA\nnot-a-timestamp,e2\n")
+        status = main(["-q", "-o", os.devnull, input_path])
+        self.assertEqual(status, 1)
+
+        input_path = os.path.join(self.directory, "bad.bin")
+        with open(input_path, "wb") as input_file:
+            input_file.write(BINARY_MAGIC + pack_binary_event(1, "e1", "userA")[:-2])
+        self.assertEqual(main(["-q", "-o", os.devnull, input_path]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,259 @@
+"""
+Unit tests for the cluster mode: hash ring, codec, server and client.
+"""
+import unittest
+import asyncio
+import random
+import sys
+import threading
+import logging
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from cluster import (
+    HashRing,
+    ThrottlerServer,
+    ClusterClient,
+    ClusterError,
+    OP_HANDOFF,
+    encode_events,
+    decode_events,
+    start_server_process
+)
+from throttler import EventThrottler
+from dedup import EventDeduplicator
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def random_events(count, keys, seed):
+    """Returns events with ten per second over keys distinct keys."""
+    rng = random.Random(seed)
+    return [(i // 10, f"e{i}", f"user{rng.randrange(keys)}") for i in range(count)]
+
+def decide_locally(events, window=5):
+    """Returns the decisions of a single EventThrottler."""
+    throttler = EventThrottler(window=window)
+    return [throttler.should_process(*event) for event in events]
+
+class HashRingTests(unittest.TestCase):
+    """Test cases for HashRing and the event codec."""
+
+    def test_ring_spreads_and_moves_few_keys(self):
+        """Test that keys spread over the nodes and adding a node only moves keys to it."""
+        keys = [f"user{i}" for i in range(10000)]
+        ring = HashRing(["a:1", "b:1", "c:1"])
+        owners = {key: ring.node_for(key) for key in keys}
+        for node in ring.nodes:
+            self.assertGreater(list(owners.values()).count(node), 2000)
+
+        grown = ring.with_node("d:1")
+        moved = [key for key in keys if grown.node_for(key) != owners[key]]
+        self.assertTrue(all(grown.node_for(key) == "d:1" for key in moved))
+        self.assertLess(len(moved), 4000)
+        self.assertEqual(
+            {key: grown.without_node("d:1").node_for(key) for key in keys}, owners
+        )
+
+        with self.assertRaises(ValueError):
+            HashRing().node_for("user1")
+
+    def test_codec_round_trip(self):
+        """Test that ASCII and non-ASCII keys survive encoding."""
+        for keys in (["userA", "", "userB"], ["usér", "ключ", "userA"]):
+            timestamps, decoded = decode_events(encode_events([1, -2, 2 ** 40], keys))
+            self.assertEqual(list(timestamps), [1, -2, 2 ** 40])
+            self.assertEqual(decoded, keys)
+        with self.assertRaises(ValueError):
+            decode_events(encode_events([1], ["userA"])[:-1])
+
+    def test_codec_event_ids(self):
+        """Test that event IDs follow the keys and must be present when expected."""
+        payload = encode_events([1, 2], ["userA", "ключ"], ["e1", "é2"])
+        timestamps, keys, event_ids = decode_events(payload, with_event_ids=True)
+        self.assertEqual((list(timestamps), keys, event_ids), ([1, 2], ["userA", "ключ"], ["e1", "é2"]))
+        with self.assertRaises(ValueError):
+            decode_events(payload)
+        with self.assertRaises(ValueError):
+            decode_events(encode_events([1], ["userA"]), with_event_ids=True)
+
+    def test_export_and_import_keys(self):
+        """Test that exported keys leave the throttler and keep their state on import."""
+        source = EventThrottler(window=10)
+        for event in [(1, "e1", "userA"), (2, "e2", "userB"), (3, "e3", "userC")]:
+            source.should_process(*event)
+        copied = source.export_keys(lambda key: key != "userB", remove=False)
+        self.assertEqual(source.get_key_count(), 3)
+        exported = source.export_keys(lambda key: key != "userB")
+        self.assertEqual(sorted(copied), sorted(exported))
+        self.assertEqual(sorted(exported), [("userA", 1), ("userC", 3)])
+        self.assertEqual(source.get_key_count(), 1)
+
+        target = EventThrottler(window=10, max_keys=2)
+        target.should_process(4, "e4", "userD")
+        self.assertEqual(target.import_keys(exported), 2)
+        self.assertEqual(target.get_key_count(), 2)
+        self.assertFalse(target.should_process(12, "e5", "userC"))
+        self.assertTrue(target.should_process(11, "e6", "userA"))
+
+    def test_export_predicate_runs_without_lock(self):
+        """Test that decisions from other threads go ahead while the export predicate runs."""
+        throttler = EventThrottler(window=10)
+        for i in range(10):
+            throttler.should_process(i, f"e{i}", f"user{i}")
+        deciders = []
+
+        def predicate(key):
+            if not deciders:
+                decider = threading.Thread(
+                    target=throttler.should_process, args=(20, "e20", "userX"), daemon=True
+                )
+                deciders.append(decider)
+                decider.start()
+                decider.join(timeout=5)
+            return key == "user3"
+
+        self.assertEqual(throttler.export_keys(predicate), [("user3", 3)])
+        self.assertFalse(deciders[0].is_alive())
+        self.assertEqual(throttler.get_key_count(), 10)
+
+class ClusterTests(unittest.IsolatedAsyncioTestCase):
+    """Test cases for ThrottlerServer and ClusterClient."""
+
+    async def asyncSetUp(self):
+        self.servers = []
+        self.throttlers = []
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            await server.close()
+
+    async def start_servers(self, count, window=5, dedup_horizon=None):
+        """Starts servers in this process and returns their addresses."""
+        addresses = []
+        for _ in range(count):
+            dedup = EventDeduplicator(horizon=dedup_horizon) if dedup_horizon else None
+            throttler = EventThrottler(window=window, dedup=dedup)
+            server = ThrottlerServer(throttler)
+            self.throttlers.append(throttler)
+            await server.start("127.0.0.1", 0)
+            self.servers.append(server)
+            addresses.append(f"127.0.0.1:{server.port}")
+        return addresses
+
+    async def test_batches_match_local_throttler(self):
+        """Test that routed batches give the decisions of a single throttler."""
+        events = random_events(5000, 200, seed=1)
+        async with ClusterClient(await self.start_servers(3)) as client:
+            decisions = []
+            for start in range(0, len(events), 700):
+                decisions.extend(await client.should_process_batch(*zip(*events[start:start + 700])))
+            self.assertEqual(decisions, decide_locally(events))
+
+            stats = await client.get_stats()
+            self.assertEqual(sum(node["tracked_keys"] for node in stats.values()), 200)
+            self.assertTrue(all(node["tracked_keys"] for node in stats.values()))
+            self.assertEqual(await client.should_process_batch([], [], []), [])
+
+    async def test_pipelined_batches(self):
+        """Test that concurrent batches on shared connections are answered in order."""
+        events = [(1, f"e{i}", f"user{i}") for i in range(2000)]
+        async with ClusterClient(await self.start_servers(2)) as client:
+            results = await asyncio.gather(*(
+                client.should_process_batch(*zip(*events[start:start + 100]))
+                for start in range(0, 2000, 100)
+            ))
+            self.assertTrue(all(all(result) for result in results))
+            self.assertFalse(any(await client.should_process_batch(*zip(*events))))
+
+    async def test_add_and_remove_nodes(self):
+        """Test that handoffs keep decisions identical to a single throttler."""
+        events = random_events(6000, 300, seed=2)
+        expected = decide_locally(events)
+        first, second, third = await self.start_servers(3)
+        async with ClusterClient([first]) as client:
+            decisions = []
+            for start in range(0, len(events), 500):
+                if start == 2000:
+                    self.assertGreater(await client.add_node(second), 0)
+                elif start == 3000:
+                    await client.add_node(third)
+                elif start == 4500:
+                    self.assertGreater(await client.remove_node(first), 0)
+                decisions.extend(await client.should_process_batch(*zip(*events[start:start + 500])))
+            self.assertEqual(decisions, expected)
+            self.assertEqual(client.nodes, sorted([second, third]))
+
+            with self.assertRaises(ValueError):
+                await client.add_node(second)
+            await client.remove_node(second)
+            with self.assertRaises(ValueError):
+                await client.remove_node(third)
+
+    async def test_failed_import_keeps_keys(self):
+        """Test that keys stay with their owner when the new owner fails to import them."""
+        events = random_events(2000, 100, seed=4)
+        expected = decide_locally(events)
+        first, second = await self.start_servers(2)
+        async with ClusterClient([first]) as client:
+            decisions = await client.should_process_batch(*zip(*events[:1000]))
+            with mock.patch.object(self.throttlers[1], "import_keys", side_effect=ValueError("Import failed")):
+                with self.assertRaises(ClusterError):
+                    await client.add_node(second)
+            self.assertEqual(client.nodes, [first])
+            self.assertEqual(self.throttlers[0].get_key_count(), 100)
+
+            decisions.extend(await client.should_process_batch(*zip(*events[1000:])))
+            self.assertEqual(decisions, expected)
+            self.assertGreater(await client.add_node(second), 0)
+            self.assertLess(self.throttlers[0].get_key_count(), 100)
+
+    async def test_event_ids_reach_deduplicating_servers(self):
+        """Test that servers with a deduplicator see each event's own ID."""
+        addresses = await self.start_servers(2, dedup_horizon=3600)
+        async with ClusterClient(addresses) as client:
+            decisions = await client.should_process_batch(
+                [1, 2, 3, 20, 21], ["e1", "e2", "e3", "e1", "e4"],
+                ["userA", "userB", "userC", "userA", "userA"]
+            )
+        self.assertEqual(decisions, [True, True, True, False, True])
+
+    async def test_server_errors(self):
+        """Test that a rejected request raises ClusterError and the connection survives."""
+        async with ClusterClient(await self.start_servers(1)) as client:
+            connection = client._connections[client.nodes[0]]
+            with self.assertRaises(ClusterError):
+                await connection.request(99, b"")
+            for payload in (b"{}", b"[1]", b'{"nodes": 1, "vnodes": 1, "node": "a:1"}',
+                            b'{"nodes": [2, "a:1"], "vnodes": 1, "node": "a:1"}'):
+                with self.assertRaises(ClusterError):
+                    await connection.request(OP_HANDOFF, payload)
+            self.assertTrue(await client.should_process(1, "e1", "userA"))
+            with self.assertRaises(ValueError):
+                await client.should_process_batch([1], [], ["userA"])
+
+    async def test_server_process(self):
+        """Test a client against servers running in other processes."""
+        processes = [start_server_process(window=5) for _ in range(2)]
+        try:
+            events = random_events(2000, 100, seed=3)
+            async with ClusterClient([address for _, address in processes]) as client:
+                decisions = await client.should_process_batch(*zip(*events))
+            self.assertEqual(decisions, decide_locally(events))
+        finally:
+            for process, _ in processes:
+                process.terminate()
+                process.join()
+
+if __name__ == "__main__":
+    unittest.main()
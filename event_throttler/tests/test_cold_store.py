@@ -0,0 +1,125 @@
+"""
+Unit tests for the ColdStore class and EventThrottler's cold tier.
+"""
+import unittest
+import os
+import random
+import sys
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from cold_store import ColdStore
+from throttler import EventThrottler
+from algorithms import GCRA
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def skewed_events(count, keys, seed):
+    """Returns events whose keys are drawn from a heavy-tailed distribution."""
+    rng = random.Random(seed)
+    return [(i // 50, f"e{i}", f"user{int(rng.paretovariate(0.8)) % keys}") for i in range(count)]
+
+class ColdStoreTests(unittest.TestCase):
+    """Test cases for ColdStore and EventThrottler(cold_store=...)."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cold.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_spill_and_take(self):
+        """Test that keys come back once, from the buffer or from SQLite."""
+        cold = ColdStore(self.path, batch_size=2)
+        cold.spill("userA", 1, horizon=None)
+        self.assertEqual(cold.take("userA"), 1)
+        self.assertIsNone(cold.take("userA"))
+
+        cold.spill("userB", 2, horizon=None)
+        cold.spill("userC", 3, horizon=None)
+        cold.spill("userA", 4, horizon=None)
+        self.assertEqual(cold.count(), 3)
+        self.assertEqual(cold.take("userB"), 2)
+        self.assertIsNone(cold.take("userB"))
+        self.assertIsNone(cold.take("userD"))
+        self.assertEqual(sorted(cold.items()), [("userA", 4), ("userC", 3)])
+
+        stats = cold.get_stats()
+        self.assertEqual(stats["spilled"], 4)
+        self.assertEqual(stats["loaded"], 2)
+        self.assertGreaterEqual(stats["filtered"], 1)
+        cold.close()
+
+    def test_compaction_deletes_idle_keys(self):
+        """Test that a full filter triggers a compaction that drops idle keys."""
+        cold = ColdStore(self.path, batch_size=10, bloom_capacity=100)
+        purged = sum(cold.spill(f"user{i}", i, horizon=50) for i in range(100))
+        self.assertEqual(purged, 51)
+        self.assertEqual(cold.count(), 49)
+        self.assertEqual(cold.get_stats()["compactions"], 1)
+        self.assertIsNone(cold.take("user10"))
+        self.assertEqual(cold.take("user60"), 60)
+        cold.close()
+
+    def test_decisions_match_unbounded_throttler(self):
+        """Test that a small hot tier with a cold tier decides like an unbounded throttler."""
+        events = skewed_events(50000, 20000, seed=1)
+        reference = EventThrottler(window=30, cleanup_interval=600)
+        expected = [reference.should_process(*event) for event in events]
+
+        cold = ColdStore(self.path, batch_size=50, bloom_capacity=2000)
+        throttler = EventThrottler(window=30, cleanup_interval=600, max_keys=200, cold_store=cold)
+        self.assertEqual([throttler.should_process(*event) for event in events], expected)
+        self.assertEqual(throttler.get_eviction_stats()["evicted_keys"], 0)
+        self.assertGreater(cold.get_stats()["loaded"], 0)
+        self.assertGreater(throttler.get_key_count(), 200)
+
+        cold = ColdStore(self.path, batch_size=50)
+        throttler = EventThrottler(window=30, cleanup_interval=600, max_keys=200, cold_store=cold)
+        decisions = []
+        for start in range(0, len(events), 1000):
+            decisions.extend(throttler.should_process_batch(*zip(*events[start:start + 1000])))
+        self.assertEqual([bool(d) for d in decisions], expected)
+
+    def test_snapshot_export_and_clear(self):
+        """Test that snapshots and exports include cold keys, and clear empties the tier."""
+        cold = ColdStore(self.path, batch_size=2)
+        throttler = EventThrottler(window=10, max_keys=2, cold_store=cold)
+        for i in range(5):
+            throttler.should_process(i, f"e{i}", f"user{i}")
+        self.assertEqual(throttler.get_key_count(), 5)
+
+        snapshot_path = os.path.join(self.directory.name, "throttler.snap")
+        self.assertEqual(throttler.snapshot(snapshot_path), 5)
+        restored = EventThrottler.restore(
+            snapshot_path, lazy=False, max_keys=2, cold_store=ColdStore(":memory:")
+        )
+        self.assertEqual(restored.get_key_count(), 5)
+        self.assertFalse(restored.should_process(5, "e5", "user0"))
+
+        exported = throttler.export_keys(lambda key: key in ("user0", "user4"))
+        self.assertEqual(sorted(exported), [("user0", 0), ("user4", 4)])
+        self.assertEqual(throttler.get_key_count(), 3)
+
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+        self.assertTrue(throttler.should_process(5, "e5", "user1"))
+
+        with self.assertRaises(ValueError):
+            EventThrottler(algorithm=GCRA(2), cold_store=ColdStore(":memory:"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Unit tests for the CompactEventThrottler class.
+"""
+import unittest
+import random
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from compact_throttler import CompactEventThrottler
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class CompactEventThrottlerTests(unittest.TestCase):
+    """Test cases for the CompactEventThrottler class."""
+
+    def test_matches_event_throttler(self):
+        """Test that decisions match EventThrottler across growth and expiry."""
+        rng = random.Random(7)
+        compact = CompactEventThrottler(window=5, cleanup_interval=20, initial_capacity=8)
+        reference = EventThrottler(window=5, cleanup_interval=20)
+
+        timestamp = 0
+        for i in range(20000):
+            timestamp += rng.randint(0, 2)
+            key = f"user{rng.randint(0, 2000)}"
+            self.assertEqual(
+                compact.should_process(timestamp, f"e{i}", key),
+                reference.should_process(timestamp, f"e{i}", key)
+            )
+
+    def test_int_and_prehashed_keys(self):
+        """Test that integer keys work and are distinct from each other."""
+        throttler = CompactEventThrottler(window=10)
+        for key in range(1000):
+            self.assertTrue(throttler.should_process(1, "e1", key))
+        for key in range(1000):
+            self.assertFalse(throttler.should_process(5, "e2", key))
+        self.assertEqual(throttler.get_key_count(), 1000)
+
+        # A key and its pre-computed hash share state
+        self.assertTrue(throttler.should_process(1, "e3", "session"))
+        self.assertFalse(throttler.should_process(2, "e4", hash("session")))
+
+    def test_idle_keys_are_expired(self):
+        """Test that churned keys do not grow the table."""
+        throttler = CompactEventThrottler(window=5, cleanup_interval=10)
+        for i in range(200000):
+            throttler.should_process(i // 1000, f"e{i}", f"session{i}")
+
+        stats = throttler.get_eviction_stats()
+        self.assertLess(stats["tracked_keys"], 20000)
+        self.assertGreater(stats["expired_keys"], 180000)
+        self.assertLess(throttler.get_memory_usage(), 1 << 20)
+
+    def test_max_keys_evicts(self):
+        """Test that the key count never exceeds max_keys."""
+        # No key can go idle for the cleanup interval, so every removal is an eviction
+        throttler = CompactEventThrottler(window=5, max_keys=100, cleanup_interval=10000)
+        for i in range(5000):
+            self.assertTrue(throttler.should_process(i, f"e{i}", f"user{i}"))
+            self.assertLessEqual(throttler.get_key_count(), 100)
+
+        stats = throttler.get_eviction_stats()
+        self.assertEqual(stats["tracked_keys"], 100)
+        self.assertEqual(stats["evicted_keys"], 4900)
+        # The most recent key is never the one evicted
+        self.assertFalse(throttler.should_process(4999, "e", "user4999"))
+
+    def test_batch_matches_sequential(self):
+        """Test that should_process_batch matches should_process."""
+        batch = CompactEventThrottler(window=3)
+        sequential = CompactEventThrottler(window=3)
+        timestamps = [i // 4 for i in range(500)]
+        event_ids = [f"e{i}" for i in range(500)]
+        keys = [f"user{i % 13}" for i in range(500)]
+
+        expected = [sequential.should_process(*event) for event in zip(timestamps, event_ids, keys)]
+        self.assertEqual(batch.should_process_batch(timestamps, event_ids, keys), expected)
+        with self.assertRaises(ValueError):
+            batch.should_process_batch([1], [], [])
+
+    def test_update_window_and_clear(self):
+        """Test window updates and clearing."""
+        throttler = CompactEventThrottler(window=10)
+        self.assertTrue(throttler.should_process(1, "e1", "user1"))
+        throttler.update_window(20)
+        self.assertEqual(throttler.get_window(), 20)
+        self.assertFalse(throttler.should_process(15, "e2", "user1"))
+
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+        self.assertTrue(throttler.should_process(16, "e3", "user1"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Unit tests for event deduplication.
+"""
+import unittest
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+import throttler as throttler_module
+from dedup import EventDeduplicator, BloomEventDeduplicator
+from throttler import EventThrottler
+from approx_throttler import ApproximateEventThrottler
+from algorithms import TokenBucket
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def replayed_events():
+    """Returns events for 50 keys, each delivered again 15 seconds later."""
+    events = []
+    for i in range(2000):
+        event = (i // 20, f"e{i}", f"user{i % 50}")
+        events.append(event)
+        if i >= 300:
+            original = i - 300
+            events.append((i // 20, f"e{original}", f"user{original % 50}"))
+    return events
+
+def first_deliveries(throttler, events):
+    """Decides the events as a throttler that drops every repeated event ID would."""
+    seen = set()
+    decisions = []
+    for timestamp, event_id, key in events:
+        if event_id in seen:
+            decisions.append(False)
+        else:
+            seen.add(event_id)
+            decisions.append(throttler.should_process(timestamp, event_id, key))
+    return decisions
+
+class EventDeduplicatorTests(unittest.TestCase):
+    """Test cases for the deduplicators."""
+
+    def test_remembers_ids_for_the_horizon(self):
+        """Test that IDs are remembered for at least the horizon and then forgotten."""
+        for dedup in (EventDeduplicator(horizon=10, buckets=2), BloomEventDeduplicator(horizon=10, buckets=2,
+                                                                                       capacity=100)):
+            with self.subTest(dedup=type(dedup).__name__):
+                self.assertFalse(dedup.is_duplicate(3, "e1"))
+                self.assertTrue(dedup.is_duplicate(3, "e1"))
+                self.assertTrue(dedup.is_duplicate(13, "e1"))
+                self.assertFalse(dedup.is_duplicate(13, "e2"))
+                self.assertFalse(dedup.is_duplicate(20, "e1"))
+                self.assertTrue(dedup.is_duplicate(5, "e2"))
+                self.assertFalse(dedup.is_duplicate(1000, "e2"))
+                self.assertEqual(dedup.get_duplicate_count(), 3)
+                dedup.clear()
+                self.assertFalse(dedup.is_duplicate(1000, "e2"))
+                self.assertEqual(dedup.get_duplicate_count(), 0)
+
+    def test_memory_is_bounded_by_the_horizon(self):
+        """Test that only the buckets within the horizon are kept."""
+        dedup = EventDeduplicator(horizon=100, buckets=4)
+        for i in range(100000):
+            dedup.is_duplicate(i // 100, f"e{i}")
+        self.assertLessEqual(sum(len(bucket) for bucket in dedup._buckets), 125 * 100)
+
+    def test_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            EventDeduplicator(horizon=0)
+        with self.assertRaises(ValueError):
+            EventDeduplicator(buckets=0)
+        with self.assertRaises(ValueError):
+            BloomEventDeduplicator(capacity=0)
+
+class ThrottlerDeduplicationTests(unittest.TestCase):
+    """Test cases for throttlers created with a deduplicator."""
+
+    def test_event_throttler(self):
+        """Test that replayed events are throttled, per event and in batches."""
+        events = replayed_events()
+        expected = first_deliveries(EventThrottler(window=10), events)
+        throttler = EventThrottler(window=10, dedup=EventDeduplicator(horizon=60))
+        self.assertEqual([throttler.should_process(*event) for event in events], expected)
+
+        for use_numpy in (True, False):
+            saved_np = throttler_module.np
+            if not use_numpy:
+                throttler_module.np = None
+            try:
+                throttler = EventThrottler(window=10, dedup=EventDeduplicator(horizon=60))
+                decisions = []
+                for start in range(0, len(events), 500):
+                    decisions.extend(throttler.should_process_batch(*zip(*events[start:start + 500])))
+            finally:
+                throttler_module.np = saved_np
+            self.assertEqual([bool(d) for d in decisions], expected)
+
+        throttler.clear()
+        self.assertTrue(throttler.should_process(1000, "e0", "user0"))
+
+    def test_with_algorithm(self):
+        """Test that duplicates never consume an algorithm's allowance."""
+        throttler = EventThrottler(window=10, algorithm=TokenBucket(2), dedup=EventDeduplicator(horizon=60))
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertFalse(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(1, "e2", "userA"))
+
+    def test_approximate_throttler(self):
+        """Test that the approximate throttler drops replayed events."""
+        events = replayed_events()
+        expected = first_deliveries(ApproximateEventThrottler(window=10, memory_bytes=1 << 16), events)
+        throttler = ApproximateEventThrottler(window=10, memory_bytes=1 << 16,
+                                              dedup=BloomEventDeduplicator(horizon=60, capacity=10000))
+        self.assertEqual([throttler.should_process(*event) for event in events], expected)
+
+        throttler = ApproximateEventThrottler(window=10, memory_bytes=1 << 16,
+                                              dedup=BloomEventDeduplicator(horizon=60, capacity=10000))
+        decisions = []
+        for start in range(0, len(events), 500):
+            decisions.extend(throttler.should_process_batch(*zip(*events[start:start + 500])))
+        self.assertEqual([bool(d) for d in decisions], expected)
+
+if __name__ == "__main__":
+    unittest.main()
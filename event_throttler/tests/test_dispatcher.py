@@ -0,0 +1,124 @@
+"""
+Unit tests for the KeyAffinityDispatcher class.
+"""
+import unittest
+import threading
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from dispatcher import KeyAffinityDispatcher
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def make_events(count):
+    """Returns events over 97 keys, 7 per second."""
+    return [(i // 7, f"e{i}", f"user{(i * 31) % 97}") for i in range(count)]
+
+class KeyAffinityDispatcherTests(unittest.TestCase):
+    """Test cases for the KeyAffinityDispatcher class."""
+
+    def setUp(self):
+        self.events = make_events(5000)
+        single = EventThrottler(window=10)
+        self.expected = [(*event, single.should_process(*event)) for event in self.events]
+
+    def test_ordered_results_match_single_throttler(self):
+        """Test that results() yields every decision in submission order."""
+        for processes in (False, True):
+            with self.subTest(processes=processes):
+                dispatcher = KeyAffinityDispatcher(4, window=10, processes=processes, batch_size=64)
+                for start in range(0, len(self.events), 500):
+                    dispatcher.submit_batch(*zip(*self.events[start:start + 500]))
+                dispatcher.close()
+                self.assertEqual(list(dispatcher.results()), self.expected)
+
+    def test_callback_preserves_per_key_order(self):
+        """Test that the callback sees each key's decisions in submission order."""
+        decisions = []
+        with KeyAffinityDispatcher(3, window=10, callback=lambda *d: decisions.append(d),
+                                   batch_size=16) as dispatcher:
+            for event in self.events:
+                dispatcher.submit(*event)
+        self.assertEqual(sorted(decisions, key=lambda d: int(d[1][1:])), self.expected)
+        for key in ("user0", "user50"):
+            self.assertEqual([d for d in decisions if d[2] == key],
+                             [d for d in self.expected if d[2] == key])
+        with self.assertRaises(RuntimeError):
+            dispatcher.results()
+        with self.assertRaises(RuntimeError):
+            dispatcher.submit(1, "e1", "userA")
+
+    def test_backpressure_bounds_unread_results(self):
+        """Test that submitting blocks once max_pending decisions are unread."""
+        dispatcher = KeyAffinityDispatcher(2, window=10, batch_size=8, queue_batches=1, max_pending=100)
+        submitted = threading.Event()
+
+        def produce():
+            for event in self.events:
+                dispatcher.submit(*event)
+            submitted.set()
+            dispatcher.close()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        self.assertFalse(submitted.wait(0.5))
+        self.assertLessEqual(dispatcher._pending, 100)
+
+        results = list(dispatcher.results())
+        producer.join()
+        self.assertEqual(results, self.expected)
+
+    def test_batch_larger_than_max_pending(self):
+        """Test that one batch several times max_pending does not wait on its own buffers."""
+        for callback in (None, lambda *d: None):
+            with self.subTest(callback=callback is not None):
+                dispatcher = KeyAffinityDispatcher(4, window=10, callback=callback, max_pending=1000)
+                results = []
+                reader = threading.Thread(target=lambda: results.extend(dispatcher.results()), daemon=True)
+                if callback is None:
+                    reader.start()
+                producer = threading.Thread(target=lambda: dispatcher.submit_batch(*zip(*self.events)), daemon=True)
+                producer.start()
+                producer.join(10)
+                self.assertFalse(producer.is_alive())
+                dispatcher.close()
+                if callback is None:
+                    reader.join()
+                    self.assertEqual(results, self.expected)
+
+    def test_worker_failure(self):
+        """Test that a failing worker is reported instead of hanging."""
+        dispatcher = KeyAffinityDispatcher(2, window=10, batch_size=1)
+        dispatcher.submit(1, "e1", "userA")
+        dispatcher.submit(None, "e2", "userB")
+        with self.assertRaises(RuntimeError):
+            dispatcher.close()
+        with self.assertRaises(RuntimeError):
+            list(dispatcher.results())
+
+    def test_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            KeyAffinityDispatcher(0)
+        with self.assertRaises(ValueError):
+            KeyAffinityDispatcher(1, batch_size=0)
+        with KeyAffinityDispatcher(1) as dispatcher:
+            with self.assertRaises(ValueError):
+                dispatcher.submit_batch([1], [], ["userA"])
+            self.assertEqual(dispatcher.get_worker_count(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
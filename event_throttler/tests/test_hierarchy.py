@@ -0,0 +1,140 @@
+"""
+Unit tests for the HierarchicalThrottler class.
+"""
+import unittest
+import random
+import threading
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from hierarchy import HierarchicalThrottler
+from algorithms import GCRA, TokenBucket
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def reference_decisions(windows, events):
+    """Decides events with the first-event rule at every level, committing only when all admit."""
+    last = [{} for _ in windows]
+    decisions = []
+    for timestamp, _, keys in events:
+        admitted = all(
+            key not in last[level] or timestamp - last[level][key] >= windows[level]
+            for level, key in enumerate(keys)
+        )
+        if admitted:
+            for level, key in enumerate(keys):
+                last[level][key] = timestamp
+        decisions.append(admitted)
+    return decisions
+
+def random_events(count, seed):
+    """Returns events from 50 users spread over 5 accounts."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        user = rng.randrange(50)
+        events.append((i // 10, f"e{i}", (f"user{user}", f"account{user % 5}", "global")))
+    return events
+
+class HierarchicalThrottlerTests(unittest.TestCase):
+    """Test cases for the HierarchicalThrottler class."""
+
+    def test_rejection_commits_nothing(self):
+        """Test that a level rejecting an event leaves the other levels untouched."""
+        throttler = HierarchicalThrottler(windows=[10, 5])
+        self.assertTrue(throttler.should_process(0, "e1", ("userA", "account1")))
+        # Rejected by the account level, so userB's window does not start
+        self.assertFalse(throttler.should_process(1, "e2", ("userB", "account1")))
+        self.assertTrue(throttler.should_process(5, "e3", ("userB", "account1")))
+        # Rejected by the user level, so account1's window does not restart
+        self.assertFalse(throttler.should_process(6, "e4", ("userA", "account2")))
+        self.assertTrue(throttler.should_process(10, "e5", ("userA", "account1")))
+
+    def test_matches_reference(self):
+        """Test per-event and batch decisions against a sequential model."""
+        events = random_events(3000, seed=1)
+        windows = [10, 3, 0]
+        expected = reference_decisions(windows, events)
+
+        for stripes in (1, 4, 16):
+            throttler = HierarchicalThrottler(windows=windows, stripes=stripes)
+            self.assertEqual([throttler.should_process(*event) for event in events], expected)
+
+            throttler = HierarchicalThrottler(windows=windows, stripes=stripes)
+            decisions = []
+            for start in range(0, len(events), 400):
+                decisions.extend(throttler.should_process_batch(*zip(*events[start:start + 400])))
+            self.assertEqual([bool(d) for d in decisions], expected)
+
+    def test_global_cap_under_threads(self):
+        """Test that a global GCRA cap holds exactly with concurrent callers."""
+        throttler = HierarchicalThrottler(windows=[10, 10], algorithms=[None, GCRA(limit=50, burst=50)])
+        processed = []
+
+        def worker(thread):
+            count = 0
+            for i in range(200):
+                count += throttler.should_process(0, f"e{thread}_{i}", (f"user{thread}_{i}", "global"))
+            processed.append(count)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(processed), 50)
+        # Only the 50 admitted users were recorded at the user level
+        self.assertEqual(throttler.get_key_count(), 51)
+
+    def test_update_window_clear_and_expiry(self):
+        """Test window updates, clear and expiry of idle keys."""
+        throttler = HierarchicalThrottler(windows=[10, 5], stripes=1, cleanup_interval=0)
+        self.assertTrue(throttler.should_process(0, "e1", ("userA", "account1")))
+        throttler.update_window(0, 20)
+        self.assertEqual(throttler.get_windows(), [20, 5])
+        self.assertFalse(throttler.should_process(15, "e2", ("userA", "account1")))
+
+        for i in range(100):
+            throttler.should_process(100 + 30 * i, f"e{i}", (f"user{i}", f"account{i}"))
+        self.assertLess(throttler.get_key_count(), 10)
+        self.assertGreater(throttler.get_eviction_stats()["expired_keys"], 0)
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+
+    def test_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            HierarchicalThrottler(windows=[])
+        with self.assertRaises(ValueError):
+            HierarchicalThrottler(windows=[10, 5], algorithms=[None])
+        throttler = HierarchicalThrottler(windows=[10, 5])
+        with self.assertRaises(ValueError):
+            throttler.should_process(1, "e1", ("userA",))
+        with self.assertRaises(ValueError):
+            throttler.update_window(2, 10)
+
+    def test_windows_checked_by_algorithms(self):
+        """Test that a window the level's algorithm cannot hold is rejected upfront."""
+        with self.assertRaises(ValueError):
+            HierarchicalThrottler(windows=[10, 2 ** 31], algorithms=[None, TokenBucket(limit=5, burst=5)])
+        throttler = HierarchicalThrottler(windows=[10, 60], algorithms=[None, TokenBucket(limit=5, burst=5)])
+        with self.assertRaises(ValueError):
+            throttler.update_window(1, 2 ** 31)
+        self.assertEqual(throttler.get_windows(), [10, 60])
+        throttler.update_window(0, 2 ** 31)
+        self.assertTrue(throttler.should_process(1, "e1", ("userA", "account1")))
+
+if __name__ == "__main__":
+    unittest.main()
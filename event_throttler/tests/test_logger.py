@@ -0,0 +1,103 @@
+"""
+Unit tests for the logging utility.
+"""
+import unittest
+import sys
+import logging
+import logging.handlers
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the logger module directly
+import logger as logger_module
+from logger import setup_logger
+
+class LoggerTests(unittest.TestCase):
+    """Test cases for setup_logger and the background listener."""
+    
+    def test_queue_writes_file_off_calling_thread(self):
+        """Test that records reach the file from the listener thread."""
+        with tempfile.TemporaryDirectory() as log_dir:
+            test_logger = setup_logger(
+                logger_name="event_throttler_queue_test",
+                log_level=logging.INFO,
+                log_to_console=False,
+                log_to_file=True,
+                log_dir=log_dir,
+                use_queue=True
+            )
+            self.addCleanup(logger_module._remove_handlers, "event_throttler_queue_test")
+            
+            self.assertEqual(len(test_logger.handlers), 1)
+            self.assertIsInstance(test_logger.handlers[0], logging.handlers.QueueHandler)
+            
+            file_handler = logger_module._handlers["event_throttler_queue_test"][0]
+            emitting_threads = []
+            original_emit = file_handler.emit
+            
+            def recording_emit(record):
+                emitting_threads.append(threading.current_thread())
+                original_emit(record)
+            
+            file_handler.emit = recording_emit
+            test_logger.info("hello %s", "queue")
+            logger_module._remove_handlers("event_throttler_queue_test")
+            
+            contents = (Path(log_dir) / "event_throttler_queue_test.log").read_text()
+            self.assertIn("hello queue", contents)
+            self.assertEqual(len(emitting_threads), 1)
+            self.assertIsNot(emitting_threads[0], threading.current_thread())
+    
+    def test_direct_handlers_without_queue(self):
+        """Test that use_queue=False attaches the handlers directly."""
+        test_logger = setup_logger(
+            logger_name="event_throttler_direct_test",
+            log_to_console=True,
+            use_queue=False
+        )
+        self.assertEqual(len(test_logger.handlers), 1)
+        self.assertIsInstance(test_logger.handlers[0], logging.StreamHandler)
+        self.assertNotIn("event_throttler_direct_test", logger_module._handlers)
+    
+    def test_reconfigure_replaces_handlers(self):
+        """Test that configuring a logger again replaces its handlers on the listener."""
+        setup_logger(logger_name="event_throttler_reconfigure_test", use_queue=True)
+        first = logger_module._handlers["event_throttler_reconfigure_test"]
+        setup_logger(logger_name="event_throttler_reconfigure_test", use_queue=True)
+        self.addCleanup(logger_module._remove_handlers, "event_throttler_reconfigure_test")
+        
+        self.assertIsNot(logger_module._handlers["event_throttler_reconfigure_test"], first)
+        self.assertIsNotNone(logger_module._listener._thread)
+    
+    def test_loggers_share_one_listener(self):
+        """Test that queued loggers share one listener thread and keep their own handlers."""
+        with tempfile.TemporaryDirectory() as log_dir:
+            thread_count = threading.active_count()
+            names = [f"event_throttler_shared_test{i}" for i in range(5)]
+            for name in names:
+                setup_logger(
+                    logger_name=name,
+                    log_to_console=False,
+                    log_to_file=True,
+                    log_dir=log_dir,
+                    use_queue=True
+                )
+                self.addCleanup(logger_module._remove_handlers, name)
+            self.assertLessEqual(threading.active_count(), thread_count + 1)
+            
+            for name in names:
+                logging.getLogger(name).info("from %s", name)
+            for name in names:
+                logger_module._remove_handlers(name)
+                contents = (Path(log_dir) / f"{name}.log").read_text()
+                self.assertEqual(contents.count("from event_throttler_shared_test"), 1)
+                self.assertIn(f"from {name}", contents)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Unit tests for throttler metrics and the Prometheus exporter.
+"""
+import unittest
+import random
+import sys
+import logging
+import urllib.request
+import urllib.error
+from collections import Counter
+from pathlib import Path
+from threading import Thread
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from metrics import ThrottlerMetrics, SpaceSavingSketch, MetricsServer, format_prometheus
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class SpaceSavingSketchTests(unittest.TestCase):
+    """Test cases for the space-saving hot-key sketch."""
+
+    def test_exact_below_capacity(self):
+        """Test that counts are exact while the sketch is not full."""
+        sketch = SpaceSavingSketch(10)
+        for key in "aababcabcd":
+            sketch.add(key)
+        self.assertEqual(sketch.items(), [("a", 4), ("b", 3), ("c", 2), ("d", 1)])
+
+    def test_finds_heavy_hitters(self):
+        """Test that skewed keys are found with bounded overestimates."""
+        rng = random.Random(5)
+        sketch = SpaceSavingSketch(40)
+        exact = Counter()
+        for _ in range(50000):
+            key = min(int(rng.paretovariate(1.2)), 10000)
+            sketch.add(key)
+            exact[key] += 1
+
+        estimated = dict(sketch.items())
+        for key, count in exact.most_common(5):
+            self.assertIn(key, estimated)
+            self.assertGreaterEqual(estimated[key], count)
+        self.assertEqual(sum(estimated.values()), 50000)
+
+class ThrottlerMetricsTests(unittest.TestCase):
+    """Test cases for an instrumented EventThrottler."""
+
+    def test_counts_match_decisions(self):
+        """Test event, new-key and eviction counts."""
+        throttler = EventThrottler(window=10, max_keys=3, metrics=ThrottlerMetrics(sample_rate=1))
+        decisions = [
+            throttler.should_process(1, "e1", "userA"),
+            throttler.should_process(5, "e2", "userA"),
+            throttler.should_process(6, "e3", "userB"),
+            throttler.should_process(7, "e4", "userC"),
+            throttler.should_process(8, "e5", "userD"),
+        ]
+
+        metrics = throttler.get_metrics()
+        self.assertEqual(metrics["processed"], decisions.count(True))
+        self.assertEqual(metrics["throttled"], decisions.count(False))
+        self.assertEqual(metrics["new_keys"], 4)
+        self.assertEqual(metrics["evicted_keys"], 1)
+        self.assertEqual(metrics["tracked_keys"], 3)
+        self.assertEqual(metrics["lock_acquisitions"], 5)
+        self.assertEqual(metrics["hot_keys"][0], ("userA", 2))
+        self.assertGreater(metrics["lock_hold_seconds"], 0)
+
+    def test_counts_from_many_threads(self):
+        """Test that per-thread counters add up without losing events."""
+        throttler = EventThrottler(window=5, metrics=ThrottlerMetrics())
+
+        def worker(thread_id):
+            for i in range(5000):
+                throttler.should_process(i // 100, f"e{i}", f"user{thread_id}_{i % 50}")
+
+        threads = [Thread(target=worker, args=(thread_id,)) for thread_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = throttler.get_metrics()
+        self.assertEqual(metrics["processed"] + metrics["throttled"], 20000)
+        self.assertEqual(metrics["lock_acquisitions"], 20000)
+        self.assertEqual(metrics["new_keys"], 200)
+
+    def test_batch_is_instrumented(self):
+        """Test that batch decisions are counted like single ones."""
+        throttler = EventThrottler(window=3, metrics=ThrottlerMetrics(sample_rate=1))
+        timestamps = [i // 4 for i in range(200)]
+        keys = [f"user{i % 7}" for i in range(200)]
+        mask = throttler.should_process_batch(timestamps, [f"e{i}" for i in range(200)], keys)
+
+        metrics = throttler.get_metrics()
+        self.assertEqual(metrics["processed"], sum(bool(value) for value in mask))
+        self.assertEqual(metrics["processed"] + metrics["throttled"], 200)
+        self.assertEqual(metrics["new_keys"], 7)
+        self.assertEqual(metrics["lock_acquisitions"], 1)
+
+    def test_metrics_disabled(self):
+        """Test that a throttler without metrics keeps its plain methods."""
+        throttler = EventThrottler(window=10)
+        self.assertNotIn("should_process", vars(throttler))
+        with self.assertRaises(RuntimeError):
+            throttler.get_metrics()
+
+class PrometheusExporterTests(unittest.TestCase):
+    """Test cases for the Prometheus exposition format and HTTP server."""
+
+    def setUp(self):
+        self.throttler = EventThrottler(window=10, metrics=ThrottlerMetrics(sample_rate=1))
+        self.throttler.should_process(1, "e1", 'user"A"')
+        self.throttler.should_process(2, "e2", 'user"A"')
+
+    def test_format(self):
+        """Test the exposition text, including label escaping."""
+        text = format_prometheus(self.throttler.get_metrics())
+        self.assertIn('event_throttler_events_total{decision="processed"} 1\n', text)
+        self.assertIn('event_throttler_events_total{decision="throttled"} 1\n', text)
+        self.assertIn("# TYPE event_throttler_new_keys_total counter\n", text)
+        self.assertIn('event_throttler_hot_key_events{key="user\\"A\\""} 2\n', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_http_server(self):
+        """Test that /metrics is served and other paths are not."""
+        server = MetricsServer(self.throttler.get_metrics, port=0)
+        self.addCleanup(server.stop)
+        url = f"http://127.0.0.1:{server.port}"
+
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            self.assertEqual(response.status, 200)
+            self.assertIn("text/plain", response.headers["Content-Type"])
+            self.assertIn("event_throttler_tracked_keys 1", response.read().decode("utf-8"))
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+
+    def test_scrape_rate_ignores_other_callers(self):
+        """Test that other get_metrics() callers do not reset the scraped rate."""
+        server = MetricsServer(self.throttler.get_metrics, port=0)
+        self.addCleanup(server.stop)
+        url = f"http://127.0.0.1:{server.port}/metrics"
+
+        def scraped_rate():
+            with urllib.request.urlopen(url) as response:
+                for line in response.read().decode("utf-8").splitlines():
+                    if line.startswith("event_throttler_new_key_rate "):
+                        return float(line.split()[1])
+
+        scraped_rate()
+        for i in range(100):
+            self.throttler.should_process(3, f"e{i}", f"user{i}")
+        # This caller consumes the new keys from the shared rate, not the scrape's
+        self.assertGreater(self.throttler.get_metrics()["new_key_rate"], 0)
+        self.assertEqual(self.throttler.get_metrics()["new_key_rate"], 0)
+        self.assertGreater(scraped_rate(), 0)
+
+    def test_concurrent_collection(self):
+        """Test that concurrent collections never report a negative rate."""
+        rates = []
+
+        def collect(thread_id):
+            for i in range(200):
+                self.throttler.should_process(3, "e", f"t{thread_id}-{i}")
+                rates.append(self.throttler.get_metrics()["new_key_rate"])
+
+        threads = [Thread(target=collect, args=(thread_id,)) for thread_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(rates), 800)
+        self.assertGreaterEqual(min(rates), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for the MultiWindowThrottler class.
+"""
+import unittest
+import random
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from multi_window import MultiWindowThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def random_events(count, keys, seed):
+    """Returns events over keys with timestamps that never go backwards."""
+    rng = random.Random(seed)
+    return [(i // 5, f"e{i}", f"user{rng.randrange(keys)}") for i in range(count)]
+
+class MultiWindowThrottlerTests(unittest.TestCase):
+    """Test cases for the MultiWindowThrottler class."""
+
+    def test_matches_reference(self):
+        """Test that events are processed and recorded only when every window admits them."""
+        events = random_events(5000, 40, seed=1)
+        windows = (1, 10, 60)
+        throttler = MultiWindowThrottler(windows=(60, 1, 10), cleanup_interval=0)
+        self.assertEqual(throttler.get_windows(), windows)
+
+        last = {}
+        for event in events:
+            timestamp, _, key = event
+            windows_admit = tuple(key not in last or timestamp - last[key] >= window for window in windows)
+            self.assertEqual(throttler.check(*event), windows_admit)
+            self.assertEqual(throttler.should_process(*event), all(windows_admit))
+            if all(windows_admit):
+                last[key] = timestamp
+
+    def test_rejected_event_uses_up_no_window(self):
+        """Test that a window admitting an event another window rejects records nothing."""
+        throttler = MultiWindowThrottler(windows=(10, 60))
+        events = [0] + [base + offset for base in range(0, 600, 60) for offset in (55, 60, 65)]
+        processed = [timestamp for timestamp in events if throttler.should_process(timestamp, "e", "userA")]
+        # At 55 only the 10s window admits; the 60s window's state must not move to 55
+        self.assertEqual(processed, list(range(0, 660, 60)))
+
+    def test_should_process_requires_every_window(self):
+        """Test that an event is processed only if every window admits it."""
+        throttler = MultiWindowThrottler(windows=(2, 10))
+        self.assertEqual(throttler.check(0, "e1", "userA"), (True, True))
+        self.assertTrue(throttler.should_process(0, "e1", "userA"))
+        self.assertEqual(throttler.check(3, "e2", "userA"), (True, False))
+        self.assertFalse(throttler.should_process(3, "e2", "userA"))
+        self.assertFalse(throttler.should_process(6, "e3", "userA"))
+        self.assertTrue(throttler.should_process(10, "e4", "userA"))
+
+        events = random_events(3000, 20, seed=2)
+        expected = MultiWindowThrottler(windows=(1, 10))
+        expected = [expected.should_process(*event) for event in events]
+        batched = MultiWindowThrottler(windows=(1, 10))
+        decisions = []
+        for start in range(0, len(events), 700):
+            decisions.extend(batched.should_process_batch(*zip(*events[start:start + 700])))
+        self.assertEqual([bool(d) for d in decisions], expected)
+
+    def test_update_window(self):
+        """Test adding and removing windows at runtime."""
+        throttler = MultiWindowThrottler(windows=(1, 10))
+        throttler.should_process(0, "e1", "userA")
+        throttler.update_window(add=[60], remove=[1])
+        self.assertEqual(throttler.get_windows(), (10, 60))
+        # The 10s window keeps its state; the new 60s window admits the next event
+        self.assertEqual(throttler.check(5, "e2", "userA"), (False, True))
+        self.assertTrue(throttler.should_process(10, "e3", "userA"))
+        self.assertEqual(throttler.check(20, "e4", "userA"), (True, False))
+
+        with self.assertRaises(ValueError):
+            throttler.update_window(remove=[1])
+        with self.assertRaises(ValueError):
+            throttler.update_window(remove=[10, 60])
+        self.assertEqual(throttler.get_windows(), (10, 60))
+
+    def test_expiry_and_eviction(self):
+        """Test that idle keys are expired and max_keys is enforced."""
+        throttler = MultiWindowThrottler(windows=(1, 10), cleanup_interval=0)
+        for i in range(100):
+            throttler.should_process(i, f"e{i}", f"user{i}")
+        self.assertLessEqual(throttler.get_key_count(), 12)
+        self.assertGreater(throttler.get_eviction_stats()["expired_keys"], 0)
+
+        throttler = MultiWindowThrottler(windows=(1, 10), max_keys=5)
+        for i in range(20):
+            throttler.should_process(0, f"e{i}", f"user{i}")
+        self.assertEqual(throttler.get_eviction_stats(),
+                         {"tracked_keys": 5, "expired_keys": 0, "evicted_keys": 15})
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+
+    def test_arguments(self):
+        """Test argument validation."""
+        with self.assertRaises(ValueError):
+            MultiWindowThrottler(windows=())
+        with self.assertRaises(ValueError):
+            MultiWindowThrottler(max_keys=0)
+        with self.assertRaises(ValueError):
+            MultiWindowThrottler().should_process_batch([1], [], ["userA"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Unit tests for per-key window policies.
+"""
+import unittest
+import random
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from policy import WindowPolicy
+from throttler import EventThrottler
+from sharded_throttler import ShardedEventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def classify(key):
+    """Classifies keys ending in -mm as market makers."""
+    return "market_maker" if key.endswith("-mm") else None
+
+POLICY = WindowPolicy(
+    prefixes={"retail:": 10, "retail:vip:": 2, "internal:": 1},
+    classes={"market_maker": 0},
+    classifier=classify,
+    overrides={"retail:alice": 30},
+)
+
+class WindowPolicyTests(unittest.TestCase):
+    """Test cases for WindowPolicy resolution."""
+
+    def test_resolution_order(self):
+        """Test overrides, then classes, then the longest prefix, then the default."""
+        self.assertEqual(POLICY.resolve("retail:alice"), 30)
+        self.assertEqual(POLICY.resolve("retail:bob-mm"), 0)
+        self.assertEqual(POLICY.resolve("retail:vip:carol"), 2)
+        self.assertEqual(POLICY.resolve("retail:dave"), 10)
+        self.assertIsNone(POLICY.resolve("other"))
+        self.assertEqual(WindowPolicy(prefixes={"a": 1}, default=7).resolve("b"), 7)
+        self.assertEqual(POLICY.max_window, 30)
+
+    def test_classes_need_classifier(self):
+        """Test that classes without a classifier are rejected."""
+        with self.assertRaises(ValueError):
+            WindowPolicy(classes={"market_maker": 0})
+
+class PolicyThrottlerTests(unittest.TestCase):
+    """Test cases for throttlers with a window policy."""
+
+    def test_per_key_windows(self):
+        """Test that each key is throttled with its own window."""
+        throttler = EventThrottler(window=5, policy=POLICY)
+        for key in ["retail:alice", "retail:dave", "retail:vip:carol", "internal:risk", "other", "x-mm"]:
+            self.assertTrue(throttler.should_process(0, "e0", key))
+
+        self.assertFalse(throttler.should_process(0, "e1", "internal:risk"))
+        self.assertTrue(throttler.should_process(1, "e2", "internal:risk"))
+        self.assertTrue(throttler.should_process(0, "e3", "x-mm"))
+        self.assertFalse(throttler.should_process(1, "e4", "retail:vip:carol"))
+        self.assertTrue(throttler.should_process(2, "e5", "retail:vip:carol"))
+        self.assertFalse(throttler.should_process(4, "e6", "other"))
+        self.assertTrue(throttler.should_process(5, "e7", "other"))
+        self.assertFalse(throttler.should_process(9, "e8", "retail:dave"))
+        self.assertTrue(throttler.should_process(10, "e9", "retail:dave"))
+        self.assertFalse(throttler.should_process(29, "e10", "retail:alice"))
+        self.assertTrue(throttler.should_process(30, "e11", "retail:alice"))
+        self.assertEqual(throttler.get_window("retail:alice"), 30)
+        self.assertEqual(throttler.get_window("unseen"), 5)
+        self.assertEqual(throttler.get_window(), 5)
+
+    def test_batch_matches_sequential(self):
+        """Test that batches, vectorized or not, decide like single events."""
+        rng = random.Random(3)
+        keys = [f"{rng.choice(['retail:', 'retail:vip:', 'internal:', ''])}user{rng.randrange(40)}"
+                for _ in range(3000)]
+        timestamps = [i // 20 for i in range(3000)]
+        event_ids = [f"e{i}" for i in range(3000)]
+
+        sequential = EventThrottler(window=4, policy=POLICY)
+        expected = [sequential.should_process(*event) for event in zip(timestamps, event_ids, keys)]
+
+        batched = EventThrottler(window=4, policy=POLICY)
+        mask = []
+        for start in range(0, 3000, 500):
+            end = start + 500
+            mask.extend(bool(value) for value in
+                        batched.should_process_batch(timestamps[start:end], event_ids[start:end], keys[start:end]))
+        self.assertEqual(mask, expected)
+
+    def test_hot_reload(self):
+        """Test that a new policy applies to keys that are already tracked."""
+        throttler = EventThrottler(window=5, policy=POLICY)
+        self.assertTrue(throttler.should_process(0, "e1", "retail:dave"))
+        self.assertFalse(throttler.should_process(3, "e2", "retail:dave"))
+
+        throttler.update_window(policy=WindowPolicy(prefixes={"retail:": 2}))
+        self.assertTrue(throttler.should_process(3, "e3", "retail:dave"))
+        self.assertFalse(throttler.should_process(4, "e4", "retail:dave"))
+
+        throttler.update_window(8, policy=WindowPolicy())
+        self.assertFalse(throttler.should_process(10, "e5", "retail:dave"))
+        self.assertTrue(throttler.should_process(11, "e6", "retail:dave"))
+        self.assertEqual(throttler.get_window("retail:dave"), 8)
+
+    def test_longest_window_is_kept(self):
+        """Test that keys are not expired before their own window has passed."""
+        throttler = EventThrottler(window=5, cleanup_interval=1, policy=POLICY)
+        self.assertTrue(throttler.should_process(0, "e1", "retail:alice"))
+        for timestamp in range(1, 29):
+            throttler.should_process(timestamp, f"e{timestamp}", f"other{timestamp}")
+        self.assertFalse(throttler.should_process(29, "e2", "retail:alice"))
+
+    def test_cached_windows_are_dropped(self):
+        """Test that cached windows are dropped with expired and evicted keys."""
+        throttler = EventThrottler(window=5, max_keys=3, cleanup_interval=1, policy=POLICY)
+        for i in range(10):
+            throttler.should_process(0, f"e{i}", f"internal:{i}")
+            throttler.should_process(0, f"e{i}", f"internal:{i}")
+        self.assertEqual(len(throttler._key_windows), 3)
+
+        throttler.should_process(100, "e", "internal:late")
+        self.assertEqual(throttler.get_key_count(), 1)
+        self.assertEqual(len(throttler._key_windows), 0)
+
+    def test_sharded(self):
+        """Test that a sharded throttler applies the policy in every shard."""
+        sharded = ShardedEventThrottler(window=5, shards=4, policy=POLICY)
+        single = EventThrottler(window=5, policy=POLICY)
+        for i in range(2000):
+            key = ["retail:", "internal:", "retail:vip:", ""][i % 4] + f"user{(i * 31) % 23}"
+            self.assertEqual(
+                sharded.should_process(i // 30, f"e{i}", key),
+                single.should_process(i // 30, f"e{i}", key)
+            )
+
+        sharded.update_window(policy=WindowPolicy(default=50))
+        self.assertEqual(sharded.get_window("internal:user1"), 50)
+        self.assertEqual(sharded.get_window(), 5)
+
+if __name__ == "__main__":
+    unittest.main()
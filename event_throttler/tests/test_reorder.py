@@ -0,0 +1,135 @@
+"""
+Unit tests for the ReorderBuffer class.
+"""
+import unittest
+import random
+import sys
+import logging
+from collections import Counter
+from pathlib import Path
+from threading import Thread
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from reorder import ReorderBuffer, Decision
+from throttler import EventThrottler
+from sharded_throttler import ShardedEventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def jittered_events(count, keys, jitter, seed):
+    """Returns in-order events and the same events delayed by up to jitter seconds."""
+    rng = random.Random(seed)
+    events = [(i // 10, f"e{i}", f"user{rng.randrange(keys)}") for i in range(count)]
+    arrival = sorted(range(count), key=lambda i: events[i][0] + rng.uniform(0, jitter))
+    return events, [events[i] for i in arrival]
+
+def decide_in_order(events, window=5):
+    """Returns the decisions made when events arrive in timestamp order."""
+    throttler = EventThrottler(window=window)
+    return Counter((t, key, throttler.should_process(t, event_id, key)) for t, event_id, key in events)
+
+def summarize(decisions):
+    """Counts decisions by timestamp and key; which of several tied events is processed may differ."""
+    return Counter((d.timestamp, d.key, d.processed) for d in decisions)
+
+class ReorderBufferTests(unittest.TestCase):
+    """Test cases for the ReorderBuffer class."""
+
+    def test_reorders_within_lateness(self):
+        """Test that jitter within the lateness gives the in-order decisions."""
+        events, arrival = jittered_events(5000, 50, jitter=3, seed=1)
+        buffer = ReorderBuffer(EventThrottler(window=5), lateness=3, partitions=8)
+
+        decisions = []
+        for event in arrival:
+            decisions.extend(buffer.push(*event))
+        decisions.extend(buffer.flush())
+
+        self.assertEqual(summarize(decisions), decide_in_order(events))
+        self.assertEqual(buffer.get_stats(), {"buffered": 0, "released": 5000, "late": 0, "forced": 0})
+
+    def test_release_order_within_key(self):
+        """Test that each key's events are released in timestamp order."""
+        buffer = ReorderBuffer(EventThrottler(window=5), lateness=2, partitions=2)
+        self.assertEqual(buffer.push(10, "e1", "userA"), [])
+        self.assertEqual(buffer.push(8, "e2", "userA"), [Decision(8, "e2", "userA", True)])
+        self.assertEqual(buffer.push(13, "e3", "userA"), [Decision(10, "e1", "userA", False)])
+        self.assertEqual(buffer.get_buffered_count(), 1)
+        self.assertEqual(buffer.flush(), [Decision(13, "e3", "userA", True)])
+
+    def test_late_policies(self):
+        """Test drop, process and decide for events behind released ones."""
+        for policy, expected in [("drop", False), ("process", True), ("decide", False)]:
+            buffer = ReorderBuffer(EventThrottler(window=5), lateness=1, partitions=1, late_policy=policy)
+            buffer.push(10, "e1", "userA")
+            buffer.push(12, "e2", "userA")
+            self.assertEqual(buffer.push(9, "e3", "userA"), [Decision(9, "e3", "userA", expected, True)])
+            self.assertEqual(buffer.get_stats()["late"], 1)
+
+        with self.assertRaises(ValueError):
+            ReorderBuffer(EventThrottler(), late_policy="ignore")
+
+    def test_bounded_buffer(self):
+        """Test that a full partition releases its oldest events early."""
+        buffer = ReorderBuffer(EventThrottler(window=5), lateness=100, partitions=4, max_buffered=40)
+        for i in range(1000):
+            buffer.push(i, f"e{i}", f"user{i % 97}")
+        stats = buffer.get_stats()
+        self.assertLessEqual(stats["buffered"], 40)
+        self.assertEqual(stats["released"] + stats["buffered"], 1000)
+        self.assertGreater(stats["forced"], 0)
+
+    def test_poll_releases_quiet_partitions(self):
+        """Test that poll uses the latest timestamp of any partition."""
+        buffer = ReorderBuffer(EventThrottler(window=5), lateness=2, partitions=64)
+        buffer.push(1, "e1", "quiet")
+        # Only busy keys outside the quiet key's partition, which str hashing varies per process
+        quiet_partition = hash("quiet") % 64
+        busy = [key for key in (f"busy{i}" for i in range(500)) if hash(key) % 64 != quiet_partition]
+        for i, key in enumerate(busy[:100]):
+            buffer.push(10, f"e{i}", key)
+        self.assertEqual(buffer.get_stats()["released"], 0)
+        released = buffer.poll()
+        self.assertIn(Decision(1, "e1", "quiet", True), released)
+
+    def test_batches_and_threads(self):
+        """Test push_batch, and concurrent pushes from several threads."""
+        events, arrival = jittered_events(4000, 40, jitter=2, seed=2)
+        expected = decide_in_order(events)
+
+        buffer = ReorderBuffer(EventThrottler(window=5), lateness=2, partitions=8)
+        decisions = []
+        for start in range(0, 4000, 300):
+            decisions.extend(buffer.push_batch(*zip(*arrival[start:start + 300])))
+        decisions.extend(buffer.flush())
+        self.assertEqual(summarize(decisions), expected)
+
+        # Each thread owns a subset of keys, so every key keeps its arrival order
+        buffer = ReorderBuffer(ShardedEventThrottler(window=5, shards=4), lateness=2, partitions=8)
+        results = [[] for _ in range(4)]
+
+        def worker(index):
+            for event in arrival:
+                if hash(event[2]) % 4 == index:
+                    results[index].extend(buffer.push(*event))
+
+        threads = [Thread(target=worker, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        decisions = [d for result in results for d in result] + buffer.flush()
+        self.assertEqual(summarize(decisions), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for the event log format and the replay engine.
+"""
+import unittest
+import os
+import sys
+import random
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from throttler import EventThrottler
+from policy import WindowPolicy
+from algorithms import GCRA
+from cli import Chunk
+from replay import EventLog, EventLogError, ReplayConfig, replay, sweep, write_event_log
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def random_events(count, seed):
+    """Returns events from 40 keys, 10 per second, a few of them out of order."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        timestamp = i // 10 - (3 if rng.random() < 0.01 else 0)
+        events.append((timestamp, f"e{i}", f"{rng.choice(['user', 'bot'])}{rng.randrange(20)}"))
+    return events
+
+class ReplayTests(unittest.TestCase):
+    """Test cases for event logs and replays."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "events.log")
+        self.events = random_events(5000, seed=1)
+        chunks = [
+            Chunk([], *map(list, zip(*self.events[start:start + 1500])))
+            for start in range(0, len(self.events), 1500)
+        ]
+        self.assertEqual(write_event_log(self.path, chunks), len(self.events))
+
+    def expected(self, config):
+        """Decides the events one at a time with an EventThrottler."""
+        throttler = EventThrottler(config.window, max_keys=config.max_keys, policy=config.policy,
+                                   algorithm=config.algorithm)
+        admits = {}
+        for event in self.events:
+            if throttler.should_process(*event):
+                admits[event[2]] = admits.get(event[2], 0) + 1
+        return admits
+
+    def test_event_log_layout(self):
+        """Test that the columns and key table round-trip."""
+        with EventLog(self.path) as log:
+            self.assertEqual(log.event_count, len(self.events))
+            keys = log.keys()
+            self.assertEqual(log.key_count, len(set(keys)))
+            self.assertEqual(log.timestamps.tolist(), [timestamp for timestamp, _, _ in self.events])
+            self.assertEqual([keys[key_id] for key_id in log.key_ids.tolist()], [key for _, _, key in self.events])
+            self.assertEqual(log.key(0), self.events[0][2])
+
+    def test_replay_matches_throttler(self):
+        """Test counts and per-key admits against per-event decisions."""
+        configs = [
+            ReplayConfig(window=5),
+            ReplayConfig(window=5, max_keys=15),
+            ReplayConfig(window=10, policy=WindowPolicy(prefixes={"bot": 60})),
+            ReplayConfig(window=10, algorithm=GCRA(limit=3)),
+        ]
+        for config in configs:
+            admits = self.expected(config)
+            counts = sorted(admits.values())
+            result = replay(self.path, config, chunk_events=700)
+            self.assertEqual(result.events, len(self.events))
+            self.assertEqual(result.processed, sum(counts))
+            self.assertEqual(result.throttled, len(self.events) - sum(counts))
+            self.assertEqual(result.admit_percentiles["max"], counts[-1])
+            self.assertEqual(result.admit_percentiles["p50"], counts[(len(counts) - 1) // 2])
+            self.assertEqual(sum(result.admit_histogram.values()), len(counts))
+            for lower, keys in result.admit_histogram.items():
+                self.assertEqual(keys, sum(lower <= count < max(2 * lower, 1) for count in counts))
+
+    def test_sweep_in_processes(self):
+        """Test that worker processes give the same results as the calling process."""
+        configs = [ReplayConfig(window=window) for window in (1, 5, 30)]
+        configs.append(ReplayConfig(window=10, policy=WindowPolicy(prefixes={"bot": 60})))
+        local = sweep(self.path, configs, workers=0)
+        parallel = sweep(self.path, configs, workers=2)
+        self.assertEqual([result.config for result in parallel], configs)
+        self.assertEqual(
+            [(r.processed, r.admit_percentiles, r.admit_histogram) for r in parallel],
+            [(r.processed, r.admit_percentiles, r.admit_histogram) for r in local]
+        )
+        self.assertGreater(local[0].processed, local[2].processed)
+
+    def test_invalid_files(self):
+        """Test that files that are not event logs are rejected."""
+        with open(self.path, "r+b") as log_file:
+            log_file.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(EventLogError):
+            EventLog(self.path)
+        with open(self.path, "wb") as log_file:
+            log_file.write(b"timestamp,event_id,key\n" * 4)
+        with self.assertRaises(EventLogError):
+            sweep(self.path, [ReplayConfig(window=10)])
+        with self.assertRaises(ValueError):
+            sweep(self.path, [ReplayConfig(window=10)], workers=-1)
+
+if __name__ == "__main__":
+    unittest.main()
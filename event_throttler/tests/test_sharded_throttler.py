@@ -0,0 +1,96 @@
+"""
+Unit tests for the ShardedEventThrottler class.
+"""
+import unittest
+import threading
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from sharded_throttler import ShardedEventThrottler
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class ShardedEventThrottlerTests(unittest.TestCase):
+    """Test cases for the ShardedEventThrottler class."""
+    
+    def test_matches_single_throttler(self):
+        """Test that sharding does not change any decision."""
+        sharded = ShardedEventThrottler(window=10, shards=4)
+        single = EventThrottler(window=10)
+        
+        for i in range(2000):
+            timestamp = i // 7
+            key = f"user{(i * 31) % 97}"
+            self.assertEqual(
+                sharded.should_process(timestamp, f"e{i}", key),
+                single.should_process(timestamp, f"e{i}", key)
+            )
+        self.assertEqual(sharded.get_key_count(), single.get_key_count())
+    
+    def test_update_window_applies_to_all_shards(self):
+        """Test that a window update is seen by every shard."""
+        throttler = ShardedEventThrottler(window=10, shards=8)
+        keys = [f"user{i}" for i in range(64)]
+        
+        for key in keys:
+            self.assertTrue(throttler.should_process(1, "e1", key))
+        
+        throttler.update_window(20)
+        self.assertEqual(throttler.get_window(), 20)
+        for key in keys:
+            self.assertFalse(throttler.should_process(15, "e2", key))
+            self.assertTrue(throttler.should_process(21, "e3", key))
+    
+    def test_clear_and_key_count(self):
+        """Test that clear and get_key_count cover every shard."""
+        throttler = ShardedEventThrottler(window=10, shards=4)
+        for i in range(100):
+            throttler.should_process(1, f"e{i}", f"user{i}")
+        
+        self.assertEqual(throttler.get_key_count(), 100)
+        self.assertEqual(throttler.get_eviction_stats()["tracked_keys"], 100)
+        
+        throttler.clear()
+        self.assertEqual(throttler.get_key_count(), 0)
+        self.assertTrue(throttler.should_process(2, "e100", "user0"))
+    
+    def test_thread_safety(self):
+        """Test that each key is processed once per window under contention."""
+        throttler = ShardedEventThrottler(window=10, shards=4)
+        processed = []
+        
+        def worker():
+            count = 0
+            for i in range(500):
+                if throttler.should_process(1, f"e{i}", f"user{i % 50}"):
+                    count += 1
+            processed.append(count)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sum(processed), 50)
+    
+    def test_invalid_shard_count(self):
+        """Test that at least one shard is required."""
+        with self.assertRaises(ValueError):
+            ShardedEventThrottler(shards=0)
+
+if __name__ == "__main__":
+    unittest.main()
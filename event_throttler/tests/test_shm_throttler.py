@@ -0,0 +1,144 @@
+"""
+Unit tests for the SharedMemoryEventThrottler class.
+"""
+import unittest
+import multiprocessing
+import sys
+import logging
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from shm_throttler import SharedMemoryEventThrottler
+from throttler import EventThrottler
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+def count_processed(throttler, worker_id, num_keys, barrier, results):
+    """Process one event per key and round, reporting how many were processed."""
+    processed = 0
+    for timestamp in (1, 5, 11):
+        # Every worker finishes a round before any worker starts the next one
+        barrier.wait()
+        for i in range(num_keys):
+            if throttler.should_process(timestamp, f"w{worker_id}e{i}", f"user{i}"):
+                processed += 1
+    results.put(processed)
+    throttler.close()
+
+class SharedMemoryEventThrottlerTests(unittest.TestCase):
+    """Test cases for the SharedMemoryEventThrottler class."""
+    
+    def setUp(self):
+        self.throttler = SharedMemoryEventThrottler(window=10, capacity=1000, stripes=4)
+        
+        def cleanup():
+            self.throttler.close()
+            self.throttler.unlink()
+        
+        self.addCleanup(cleanup)
+    
+    def test_matches_event_throttler(self):
+        """Test that decisions match EventThrottler in a single process."""
+        reference = EventThrottler(window=10)
+        for i in range(3000):
+            timestamp = i // 11
+            key = f"user{(i * 13) % 101}"
+            self.assertEqual(
+                self.throttler.should_process(timestamp, f"e{i}", key),
+                reference.should_process(timestamp, f"e{i}", key)
+            )
+        self.assertEqual(self.throttler.get_key_count(), 101)
+    
+    def test_update_window_and_clear(self):
+        """Test window updates and clearing the shared table."""
+        self.assertTrue(self.throttler.should_process(1, "e1", "userA"))
+        self.throttler.update_window(20)
+        self.assertEqual(self.throttler.get_window(), 20)
+        self.assertFalse(self.throttler.should_process(15, "e2", "userA"))
+        self.assertTrue(self.throttler.should_process(21, "e3", "userA"))
+        
+        self.throttler.clear()
+        self.assertEqual(self.throttler.get_key_count(), 0)
+        self.assertTrue(self.throttler.should_process(22, "e4", "userA"))
+    
+    def test_full_stripe_reuses_idle_and_evicts_oldest(self):
+        """Test that a full table reuses idle slots, then evicts the oldest key."""
+        throttler = SharedMemoryEventThrottler(window=10, capacity=3, stripes=1, cleanup_interval=0)
+        self.addCleanup(throttler.unlink)
+        self.addCleanup(throttler.close)
+        capacity = throttler.get_capacity()
+        
+        for i in range(capacity):
+            self.assertTrue(throttler.should_process(i, f"e{i}", f"user{i}"))
+        
+        # Every slot is in use and no key is idle yet, so user0 is evicted
+        self.assertTrue(throttler.should_process(capacity, "e", "late"))
+        self.assertEqual(throttler.get_eviction_stats()["evicted_keys"], 1)
+        self.assertTrue(throttler.should_process(capacity, "e", "user0"))
+        evicted = throttler.get_eviction_stats()["evicted_keys"]
+        
+        # Much later, idle keys are expired instead of evicted
+        self.assertTrue(throttler.should_process(100, "e", "new"))
+        stats = throttler.get_eviction_stats()
+        self.assertEqual(stats["evicted_keys"], evicted)
+        self.assertGreaterEqual(stats["expired_keys"], 1)
+        self.assertEqual(stats["tracked_keys"], capacity + 1 - stats["expired_keys"])
+    
+    def test_key_churn_frees_idle_slots(self):
+        """Test that idle keys are freed, so only live keys are counted."""
+        throttler = SharedMemoryEventThrottler(window=10, capacity=2000, stripes=4, cleanup_interval=0)
+        self.addCleanup(throttler.unlink)
+        self.addCleanup(throttler.close)
+        reference = EventThrottler(window=10, cleanup_interval=0)
+        
+        # 50 new keys per second, each seen again twice, for 50 windows
+        for timestamp in range(500):
+            for i in range(50):
+                for key in (f"k{timestamp}-{i}", f"k{max(timestamp - 5, 0)}-{i}", f"k{max(timestamp - 10, 0)}-{i}"):
+                    self.assertEqual(
+                        throttler.should_process(timestamp, "e", key),
+                        reference.should_process(timestamp, "e", key)
+                    )
+            self.assertLessEqual(throttler.get_key_count(), throttler.get_capacity())
+        
+        stats = throttler.get_eviction_stats()
+        self.assertEqual(stats["evicted_keys"], 0)
+        self.assertGreater(stats["expired_keys"], 20000)
+        # Keys seen in the last window remain, plus idle ones the sweep has not reached
+        self.assertLess(stats["tracked_keys"], 11 * 50 + throttler.get_capacity() // 2)
+    
+    def test_multiple_processes_share_state(self):
+        """Test that each key is processed once per window across processes."""
+        num_workers = 4
+        num_keys = 200
+        barrier = multiprocessing.Barrier(num_workers)
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=count_processed,
+                args=(self.throttler, worker_id, num_keys, barrier, results)
+            )
+            for worker_id in range(num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        processed = [results.get() for _ in workers]
+        # Each key is processed at t=1 and t=11 by exactly one worker
+        self.assertEqual(sum(processed), 2 * num_keys)
+        self.assertEqual(self.throttler.get_key_count(), num_keys)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for EventThrottler snapshots and the snapshot file format.
+"""
+import unittest
+import os
+import sys
+import time
+import logging
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the Python path
+# This ensures we can import the modules directly
+parent_dir = str(Path(__file__).parent.parent)
+sys.path.insert(0, parent_dir)
+
+# Import the modules directly
+from throttler import EventThrottler
+from snapshot import SnapshotError, SnapshotView
+from logger import setup_logger
+
+# Configure a logger for tests with minimal output
+test_logger = setup_logger(
+    logger_name="event_throttler_tests",
+    log_level=logging.WARNING  # Only show warnings and errors during tests
+)
+
+class SnapshotTests(unittest.TestCase):
+    """Test cases for snapshot and restore."""
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "throttler.snap")
+        
+        self.throttler = EventThrottler(window=10, cleanup_interval=0)
+        self.throttler.should_process(1, "e1", "userA")
+        self.throttler.should_process(5, "e2", "userB")
+        self.throttler.should_process(8, "e3", "ключ")
+    
+    def test_view_lookup(self):
+        """Test that the snapshot file stores sorted keys and their timestamps."""
+        self.assertEqual(self.throttler.snapshot(self.path), 3)
+        
+        view = SnapshotView(self.path)
+        self.addCleanup(view.close)
+        self.assertEqual(view.count, 3)
+        self.assertEqual(view.window, 10)
+        self.assertEqual(view.watermark, 8)
+        self.assertEqual(view.timestamp(view.find("userB")), 5)
+        self.assertEqual(view.timestamp(view.find("ключ")), 8)
+        self.assertEqual(view.find("userC"), -1)
+        self.assertEqual(sorted(view.items()), [("userA", 1), ("userB", 5), ("ключ", 8)])
+    
+    def test_restore_eager_and_lazy(self):
+        """Test that both restore modes continue throttling where they left off."""
+        self.throttler.snapshot(self.path)
+        
+        for lazy in (False, True):
+            restored = EventThrottler.restore(self.path, lazy=lazy, cleanup_interval=0)
+            self.assertEqual(restored.get_window(), 10)
+            self.assertEqual(restored.get_key_count(), 3)
+            self.assertFalse(restored.should_process(9, "e4", "userA"))
+            self.assertTrue(restored.should_process(11, "e5", "userA"))
+            self.assertFalse(restored.should_process(11, "e6", "userB"))
+            self.assertTrue(restored.should_process(11, "e7", "userC"))
+            self.assertEqual(restored.get_key_count(), 4)
+    
+    def test_lazy_snapshot_released_when_idle(self):
+        """Test that a lazy snapshot is dropped once all its keys are idle."""
+        self.throttler.snapshot(self.path)
+        restored = EventThrottler.restore(self.path, cleanup_interval=0)
+        self.assertFalse(restored.should_process(2, "e4", "userA"))
+        
+        # At t=18 every restored key has been idle for a full window
+        self.assertTrue(restored.should_process(18, "e5", "userC"))
+        self.assertIsNone(restored._snapshot)
+        self.assertTrue(restored.should_process(18, "e6", "userB"))
+    
+    def test_snapshot_of_lazily_restored_throttler(self):
+        """Test that keys not yet loaded are still written to a new snapshot."""
+        self.throttler.snapshot(self.path)
+        restored = EventThrottler.restore(self.path)
+        restored.should_process(9, "e4", "userA")
+        restored.should_process(9, "e5", "userD")
+        
+        second_path = self.path + ".2"
+        self.assertEqual(restored.snapshot(second_path), 4)
+        view = SnapshotView(second_path)
+        self.addCleanup(view.close)
+        self.assertEqual(dict(view.items()), {"userA": 1, "userB": 5, "ключ": 8, "userD": 9})
+    
+    def test_corrupt_snapshot_rejected(self):
+        """Test that a damaged or foreign file is rejected."""
+        self.throttler.snapshot(self.path)
+        with open(self.path, "r+b") as snapshot_file:
+            snapshot_file.seek(-1, os.SEEK_END)
+            last_byte = snapshot_file.read(1)
+            snapshot_file.seek(-1, os.SEEK_END)
+            snapshot_file.write(bytes([last_byte[0] ^ 0xFF]))
+        with self.assertRaises(SnapshotError):
+            EventThrottler.restore(self.path)
+        
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b"not a snapshot" * 10)
+        with self.assertRaises(SnapshotError):
+            SnapshotView(self.path)
+    
+    def test_periodic_snapshot(self):
+        """Test that the background thread writes snapshots."""
+        self.throttler.start_periodic_snapshot(self.path, interval=0.01)
+        with self.assertRaises(RuntimeError):
+            self.throttler.start_periodic_snapshot(self.path)
+        
+        deadline = time.monotonic() + 5
+        while not os.path.exists(self.path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.throttler.stop_periodic_snapshot()
+        
+        restored = EventThrottler.restore(self.path)
+        self.assertEqual(restored.get_key_count(), 3)
+
+if __name__ == "__main__":
+    unittest.main()
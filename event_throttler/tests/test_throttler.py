@@ -5,7 +5,9 @@ import unittest
 import threading
 import time
 import sys
+import random
 import logging
+from unittest import mock
 from pathlib import Path
 
 # Add the parent directory to the Python path
@@ -14,7 +16,9 @@ parent_dir = str(Path(__file__).parent.parent)
 sys.path.insert(0, parent_dir)
 
 # Import the throttler module directly
+import throttler as throttler_module
 from throttler import EventThrottler
+from metrics import ThrottlerMetrics
 from logger import setup_logger
 
 # Configure a logger for tests with minimal output
@@ -134,5 +138,196 @@ class EventThrottlerTests(unittest.TestCase):
             self.assertEqual(user_results[user_id].count(True), 2)
             self.assertEqual(user_results[user_id].count(False), 2)
 
+    def test_idle_keys_expire(self):
+        """Test that keys idle longer than the window are expired."""
+        throttler = EventThrottler(window=10, cleanup_interval=0)
+        
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(2, "e2", "userB"))
+        self.assertEqual(throttler.get_key_count(), 2)
+        
+        # Processing an event 10s later expires both idle keys
+        self.assertTrue(throttler.should_process(12, "e3", "userC"))
+        self.assertEqual(throttler.get_key_count(), 1)
+        self.assertEqual(throttler.get_eviction_stats()["expired_keys"], 2)
+        
+        # An expired key behaves exactly like a key past its window
+        self.assertTrue(throttler.should_process(13, "e4", "userA"))
+        self.assertFalse(throttler.should_process(14, "e5", "userA"))
+    
+    def test_late_event_after_expiry(self):
+        """Test that a late event for an expired key is processed, unless the cleanup interval covers it."""
+        throttler = EventThrottler(window=10, cleanup_interval=0)
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(20, "e2", "userB"))
+        self.assertTrue(throttler.should_process(5, "e3", "userA"))
+        
+        throttler = EventThrottler(window=10, cleanup_interval=30)
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(20, "e2", "userB"))
+        self.assertFalse(throttler.should_process(5, "e3", "userA"))
+    
+    def test_cleanup_interval_delays_expiry(self):
+        """Test that keys are kept until the cleanup interval has passed."""
+        throttler = EventThrottler(window=10, cleanup_interval=100)
+        
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(50, "e2", "userB"))
+        self.assertEqual(throttler.get_key_count(), 2)
+        
+        self.assertTrue(throttler.should_process(101, "e3", "userC"))
+        self.assertEqual(throttler.get_key_count(), 2)
+        self.assertEqual(throttler.get_eviction_stats()["expired_keys"], 1)
+    
+    def test_max_keys_evicts_oldest(self):
+        """Test that the least recently processed key is evicted at capacity."""
+        throttler = EventThrottler(window=10, max_keys=2)
+        
+        self.assertTrue(throttler.should_process(1, "e1", "userA"))
+        self.assertTrue(throttler.should_process(2, "e2", "userB"))
+        # Re-processing userA makes userB the oldest key
+        self.assertTrue(throttler.should_process(11, "e3", "userA"))
+        self.assertTrue(throttler.should_process(12, "e4", "userC"))
+        
+        stats = throttler.get_eviction_stats()
+        self.assertEqual(stats["tracked_keys"], 2)
+        self.assertEqual(stats["evicted_keys"], 1)
+        self.assertFalse(throttler.should_process(13, "e5", "userA"))
+        self.assertTrue(throttler.should_process(13, "e6", "userB"))
+    
+    def test_memory_flat_under_key_churn(self):
+        """Test that memory stays flat over a multi-million-key churn run."""
+        throttler = EventThrottler(window=10, cleanup_interval=0)
+        total_keys = 2_000_000
+        keys_per_second = 1000
+        sizes = []
+        
+        for i in range(total_keys):
+            throttler.should_process(i // keys_per_second, "e", f"session{i}")
+            if i % 500_000 == 499_999:
+                sizes.append(sys.getsizeof(throttler._last_processed_timestamps))
+                # Only keys seen within the last window are still tracked
+                self.assertLessEqual(throttler.get_key_count(), 11 * keys_per_second)
+        
+        self.assertEqual(len(set(sizes)), 1)
+        stats = throttler.get_eviction_stats()
+        self.assertEqual(stats["evicted_keys"], 0)
+        self.assertEqual(stats["expired_keys"] + stats["tracked_keys"], total_keys)
+
+    def test_batch_matches_sequential(self):
+        """Test that batch decisions match calling should_process in order."""
+        rng = random.Random(42)
+        batch_throttler = EventThrottler(window=5)
+        sequential_throttler = EventThrottler(window=5)
+        timestamp = 0
+        
+        for _ in range(20):
+            timestamps, event_ids, keys = [], [], []
+            for i in range(500):
+                timestamp += rng.choice([0, 0, 1, 3])
+                timestamps.append(timestamp)
+                event_ids.append(f"e{i}")
+                keys.append(f"user{rng.randint(0, 40)}")
+            
+            mask = batch_throttler.should_process_batch(timestamps, event_ids, keys)
+            expected = [
+                sequential_throttler.should_process(ts, event_id, key)
+                for ts, event_id, key in zip(timestamps, event_ids, keys)
+            ]
+            self.assertEqual([bool(decision) for decision in mask], expected)
+    
+    def test_batch_repeats_and_boundary(self):
+        """Test same-key repeats within one batch and the window boundary."""
+        throttler = EventThrottler(window=10)
+        self.assertTrue(throttler.should_process(1, "e0", "userB"))
+        
+        mask = throttler.should_process_batch(
+            [1, 5, 10, 11, 11, 20, 21, 31],
+            ["e1", "e2", "e3", "e4", "e5", "e6", "e7", "e8"],
+            ["userA", "userA", "userB", "userA", "userB", "userA", "userA", "userA"]
+        )
+        self.assertEqual(
+            [bool(decision) for decision in mask],
+            [True, False, False, True, True, False, True, True]
+        )
+        self.assertFalse(throttler.should_process(40, "e9", "userA"))
+    
+    def test_batch_out_of_order_timestamps(self):
+        """Test batches whose timestamps go backwards and the pure-Python path."""
+        timestamps = [10, 3, 25, 14, 12, 40, 30]
+        keys = ["userA", "userA", "userA", "userB", "userA", "userB", "userB"]
+        event_ids = [f"e{i}" for i in range(len(keys))]
+        
+        sequential_throttler = EventThrottler(window=10)
+        expected = [
+            sequential_throttler.should_process(ts, event_id, key)
+            for ts, event_id, key in zip(timestamps, event_ids, keys)
+        ]
+        
+        mask = EventThrottler(window=10).should_process_batch(timestamps, event_ids, keys)
+        self.assertEqual([bool(decision) for decision in mask], expected)
+        
+        with mock.patch.object(throttler_module, "np", None):
+            mask = EventThrottler(window=10).should_process_batch(timestamps, event_ids, keys)
+        self.assertEqual(mask, expected)
+        
+        # A late event for a key expired within the batch is processed, as it is sequentially
+        mask = EventThrottler(window=10, cleanup_interval=0).should_process_batch(
+            [1, 20, 5], ["e1", "e2", "e3"], ["userA", "userB", "userA"]
+        )
+        self.assertEqual([bool(decision) for decision in mask], [True, True, True])
+    
+    def test_batch_fallback_counts_new_keys_once(self):
+        """Test that a batch handed to the sequential path counts its new keys once."""
+        throttler = EventThrottler(window=10, metrics=ThrottlerMetrics())
+        # Timestamps spanning 2**61 seconds are too far apart for the vectorized index
+        timestamps = list(range(39)) + [2 ** 61]
+        keys = [f"user{i}" for i in range(40)]
+        mask = throttler.should_process_batch(timestamps, [f"e{i}" for i in range(40)], keys)
+        self.assertTrue(all(mask))
+        self.assertEqual(throttler.get_metrics()["new_keys"], 40)
+    
+    def test_batch_length_mismatch(self):
+        """Test that batch inputs must have matching lengths."""
+        throttler = EventThrottler(window=10)
+        with self.assertRaises(ValueError):
+            throttler.should_process_batch([1, 2], ["e1"], ["userA", "userB"])
+
+    def test_debug_arguments_not_formatted_when_disabled(self):
+        """Test that no log message is formatted when debug is off."""
+        formatted = []
+        
+        class Key(str):
+            def __str__(self):
+                formatted.append(self)
+                return str.__str__(self)
+        
+        throttler_logger = logging.getLogger("event_throttler.throttler")
+        old_level = throttler_logger.level
+        throttler_logger.setLevel(logging.INFO)
+        self.addCleanup(throttler_logger.setLevel, old_level)
+        
+        throttler = EventThrottler(window=10)
+        key = Key("userA")
+        throttler.should_process(1, "e1", key)
+        throttler.should_process(2, "e2", key)
+        throttler.should_process(12, "e3", key)
+        self.assertEqual(formatted, [])
+    
+    def test_throttled_log_sampling(self):
+        """Test that 1 in N throttled events per key is logged."""
+        throttler = EventThrottler(window=100, log_sample_rate=3)
+        
+        with self.assertLogs("event_throttler.throttler", level=logging.DEBUG) as captured:
+            for i in range(10):
+                throttler.should_process(i, f"a{i}", "userA")
+            for i in range(4):
+                throttler.should_process(i, f"b{i}", "userB")
+        
+        throttled = [line for line in captured.output if "Throttling" in line]
+        # 9 throttled events for userA and 3 for userB
+        self.assertEqual(len([line for line in throttled if "userA" in line]), 3)
+        self.assertEqual(len([line for line in throttled if "userB" in line]), 1)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
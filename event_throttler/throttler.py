@@ -3,14 +3,64 @@ Event Throttler for Trading Platform
 
 This module provides an EventThrottler class that implements a sliding window
 approach to throttle events based on a specified key.
+
+Keys are kept in an expiry-ordered index (an OrderedDict ordered by the time
+each key was last processed), so idle keys can be expired from the front in
+amortized O(1) per processed event and the oldest keys can be evicted once
+MAX_KEYS is reached.
+
+State can be written to a compact binary snapshot and restored on startup;
+a lazily restored snapshot stays memory-mapped and is consulted only for keys
+that are not yet in memory, until every key in it has gone idle.
+
+Passing a ThrottlerMetrics instance enables per-thread event counters, lock
+timings and hot-key tracking; without one, the hot path is unchanged.
+
+A WindowPolicy gives keys their own windows. Each key's window is resolved
+through the policy once and cached next to its timestamp until the key is
+expired or evicted, or the policy is replaced.
+
+A RateAlgorithm (GCRA, token bucket or sliding window counter) replaces the
+first-event-per-window rule. Its single-int state per key is stored in
+place of the key's last processed timestamp.
+
+With a ColdStore, max_keys bounds the keys held in memory rather than the
+keys tracked: the least recently processed key is spilled to the cold tier
+instead of being dropped, and a key missing from memory is looked for
+there before it is treated as new.
+
+An EventDeduplicator drops repeat deliveries of the same event ID before
+the throttling rule sees them, under the same lock acquisition.
 """
+import logging
 import threading
-from typing import Dict, Optional
-from collections import defaultdict
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from collections import OrderedDict
 
-# Import the custom logger and configuration
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; batches fall back to a Python loop
+    np = None
+
+# Import the custom logger, snapshot format, metrics, window policies,
+# rate-limiting algorithms, cold tier, deduplication and configuration
 from logger import get_module_logger
-from config import DEFAULT_WINDOW
+from snapshot import SnapshotView, write_snapshot
+from metrics import ThrottlerMetrics
+from policy import WindowPolicy
+from algorithms import RateAlgorithm
+from cold_store import ColdStore
+from dedup import EventDeduplicator
+from config import (
+    DEFAULT_WINDOW,
+    CLEANUP_INTERVAL,
+    MAX_KEYS,
+    EXPIRY_BATCH_SIZE,
+    BATCH_VECTORIZE_THRESHOLD,
+    LOG_SAMPLE_RATE,
+    SNAPSHOT_INTERVAL
+)
 
 # Get a logger for this module
 logger = get_module_logger("throttler")
@@ -21,19 +71,98 @@ class EventThrottler:
     
     For each unique key, only the first event within a specified time window
     is processed. All subsequent events within that window are ignored.
+    
+    Keys that have been idle for longer than both the window and the cleanup
+    interval are expired, and the least recently processed key is evicted
+    when the number of tracked keys reaches max_keys.
     """
     
-    def __init__(self, window: int = DEFAULT_WINDOW):
+    # Reentrant lock for thread safety; subclasses may use a cheaper lock
+    _lock_type = threading.RLock
+    
+    def __init__(
+        self,
+        window: int = DEFAULT_WINDOW,
+        max_keys: int = MAX_KEYS,
+        cleanup_interval: int = CLEANUP_INTERVAL,
+        log_sample_rate: int = LOG_SAMPLE_RATE,
+        metrics: Optional[ThrottlerMetrics] = None,
+        policy: Optional[WindowPolicy] = None,
+        algorithm: Optional[RateAlgorithm] = None,
+        cold_store: Optional[ColdStore] = None,
+        dedup: Optional[EventDeduplicator] = None
+    ):
         """
         Initialize the EventThrottler with a specified window size.
         
         Args:
             window: The throttling window in seconds (default from config).
+            max_keys: Maximum number of keys to track (default from config).
+            cleanup_interval: Idle time in seconds after which a key is
+                expired, if longer than the window (default from config).
+            log_sample_rate: Log 1 in N throttled events per key when debug
+                logging is enabled (default from config).
+            metrics: Instrumentation to record into, or None to disable it.
+            policy: Per-key windows; keys it does not match use window.
+            algorithm: Rate-limiting algorithm applied per key, or None to
+                process the first event per window.
+            cold_store: Tier that keys evicted from memory are spilled to,
+                or None to drop them.
+            dedup: Deduplicator that throttles events whose ID was already
+                seen, or None to ignore event IDs.
         """
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        if log_sample_rate < 1:
+            raise ValueError("log_sample_rate must be at least 1")
+        if algorithm is not None and cold_store is not None:
+            raise ValueError("A cold store is only supported without a rate-limiting algorithm")
+        
         self._window = window
-        self._last_processed_timestamps: Dict[str, int] = {}
-        self._lock = threading.RLock()  # Reentrant lock for thread safety
-        logger.info(f"EventThrottler initialized with window of {window} seconds")
+        self._policy = None if policy is None or policy.is_empty() else policy
+        # Window of each key resolved through the policy, while the key is tracked
+        self._key_windows: Dict[str, int] = {}
+        # Longest window of any key, which bounds how long a key must be kept
+        self._longest_window = self._get_longest_window(window, self._policy)
+        if algorithm is not None:
+            algorithm.check_window(self._longest_window)
+        self._max_keys = max_keys
+        self._cleanup_interval = cleanup_interval
+        # Ordered by the time each key was last processed, oldest first
+        self._last_processed_timestamps: "OrderedDict[str, int]" = OrderedDict()
+        # Latest timestamp of a processed event, used as the expiry clock
+        self._watermark: Optional[int] = None
+        self._expired_count = 0
+        self._evicted_count = 0
+        self._new_key_count = 0
+        self._log_sample_rate = log_sample_rate
+        # Throttled events per key since the last one that was logged
+        self._throttled_since_log: Dict[str, int] = {}
+        # Lazily restored snapshot, consulted for keys not yet in memory
+        self._snapshot: Optional[SnapshotView] = None
+        self._snapshot_taken: Optional[bytearray] = None
+        self._snapshot_pending = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_stop: Optional[threading.Event] = None
+        self._lock = self._lock_type()
+        self._cold_store = cold_store
+        self._algorithm = algorithm
+        if algorithm is not None:
+            # Shadow the first-event rule, which stays free of algorithm checks
+            self._process_locked = self._process_algorithm_locked
+            self._advance = self._advance_algorithm
+        self._dedup = dedup
+        if dedup is not None:
+            # Check event IDs first, then apply whichever rule was chosen above
+            self._process_unique_locked = self._process_locked
+            self._process_locked = self._process_dedup_locked
+        self._metrics = metrics
+        if metrics is not None:
+            # Shadow the public methods so the uninstrumented path pays nothing
+            self.should_process = self._should_process_instrumented
+            self.should_process_batch = self._should_process_batch_instrumented
+        logger.info(f"EventThrottler initialized with window of {window} seconds"
+                    f"{f' using {algorithm!r}' if algorithm is not None else ''}")
     
     def should_process(self, timestamp: int, event_id: str, key: str) -> bool:
         """
@@ -41,71 +170,990 @@ class EventThrottler:
         
         Args:
             timestamp: Time (in seconds) the event arrived.
-            event_id: Unique event ID (not used in throttling logic).
+            event_id: Unique event ID (only used by a deduplicator).
             key: Unique identifier for the user/session.
             
         Returns:
             bool: True if the event should be processed, False otherwise.
         """
         with self._lock:
-            # Check if we've seen this key before
-            if key not in self._last_processed_timestamps:
-                # First time seeing this key, so process it
-                self._last_processed_timestamps[key] = timestamp
-                logger.debug(f"Processing new key: {key}, event: {event_id}, timestamp: {timestamp}")
-                return True
-            
-            last_timestamp = self._last_processed_timestamps[key]
-            time_diff = timestamp - last_timestamp
-            
-            # If the time difference is greater than the window, process the event
-            if time_diff >= self._window:
-                self._last_processed_timestamps[key] = timestamp
-                logger.debug(f"Processing after window: {key}, event: {event_id}, " 
-                             f"time since last: {time_diff}s")
-                return True
-            
-            # Otherwise, throttle the event
-            logger.debug(f"Throttling: {key}, event: {event_id}, " 
-                         f"time since last: {time_diff}s (window: {self._window}s)")
+            return self._process_locked(timestamp, event_id, key)
+    
+    def should_process_batch(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Determines which events of a batch should be processed.
+        
+        The decisions are identical to calling should_process for each event
+        in order, including repeats of the same key within the batch, but the
+        lock is acquired only once. When NumPy is installed, events are grouped
+        by key and decided with vectorized operations.
+        
+        Only batches whose timestamps never go backwards are decided by
+        timestamp alone. Out-of-order batches are decided with the loop, and
+        like should_process, their decisions then depend on arrival order:
+        a key expired by a later timestamp admits an earlier event as new.
+        
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (only used by a deduplicator).
+            keys: Unique identifier for the user/session of each event.
+            
+        Returns:
+            A boolean mask that is True for each event that should be processed
+            (a NumPy array if NumPy is installed, otherwise a list).
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+        
+        with self._lock:
+            return self._process_batch_locked(timestamps, event_ids, keys)
+    
+    def _should_process_instrumented(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        should_process, recording the decision into the calling thread's
+        metrics counters, and the lock timings and key on sampled calls.
+        """
+        counters = self._metrics.counters()
+        counters.events += 1
+        counters.lock_acquisitions += 1
+        if counters.lock_acquisitions % self._metrics.sample_rate:
+            with self._lock:
+                result = self._process_locked(timestamp, event_id, key)
+            counters.processed += result
+            return result
+        
+        clock = time.perf_counter_ns
+        start = clock()
+        with self._lock:
+            acquired = clock()
+            result = self._process_locked(timestamp, event_id, key)
+            held = clock() - acquired
+        counters.processed += result
+        counters.lock_wait_ns += acquired - start
+        counters.lock_hold_ns += held
+        if counters.hot_keys is not None:
+            counters.hot_keys.add(key)
+        return result
+    
+    def _should_process_batch_instrumented(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        should_process_batch, recording the decisions into the calling
+        thread's metrics counters, and the lock timings and keys on sampled calls.
+        """
+        if not len(timestamps) == len(event_ids) == len(keys):
+            raise ValueError("timestamps, event_ids and keys must have the same length")
+        
+        counters = self._metrics.counters()
+        counters.lock_acquisitions += 1
+        sampled = counters.lock_acquisitions % self._metrics.sample_rate == 0
+        clock = time.perf_counter_ns
+        start = clock()
+        with self._lock:
+            acquired = clock()
+            mask = self._process_batch_locked(timestamps, event_ids, keys)
+            held = clock() - acquired
+        
+        counters.events += len(keys)
+        counters.processed += int(np.count_nonzero(mask)) if np is not None else sum(mask)
+        if sampled:
+            counters.lock_wait_ns += acquired - start
+            counters.lock_hold_ns += held
+            if counters.hot_keys is not None:
+                for key in keys:
+                    counters.hot_keys.add(key)
+        return mask
+    
+    def _process_batch_locked(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Decides a batch of events. Must be called with the lock held.
+        
+        Args:
+            timestamps: Time (in seconds) each event arrived.
+            event_ids: Unique event IDs (only used for logging).
+            keys: Unique identifier for the user/session of each event.
+            
+        Returns:
+            The boolean mask described in should_process_batch.
+        """
+        if self._dedup is not None:
+            return self._process_batch_dedup_locked(timestamps, event_ids, keys)
+        if np is not None and len(keys) >= BATCH_VECTORIZE_THRESHOLD and self._algorithm is None:
+            mask = self._process_batch_vectorized(np.asarray(timestamps, dtype=np.int64), keys)
+            if mask is not None:
+                return mask
+        
+        decisions = [
+            self._process_locked(timestamp, event_id, key)
+            for timestamp, event_id, key in zip(timestamps, event_ids, keys)
+        ]
+        if np is not None:
+            return np.array(decisions, dtype=bool)
+        return decisions
+    
+    def _process_batch_dedup_locked(
+        self,
+        timestamps: Sequence[int],
+        event_ids: Sequence[str],
+        keys: Sequence[str]
+    ) -> Union[List[bool], "np.ndarray"]:
+        """
+        Decides a batch of events on a throttler with a deduplicator. Must be
+        called with the lock held.
+        
+        Duplicates are throttled, and the remaining events are decided as
+        _process_batch_locked decides a batch.
+        """
+        is_duplicate = self._dedup.is_duplicate
+        fresh = [
+            index for index, (timestamp, event_id) in enumerate(zip(timestamps, event_ids))
+            if not is_duplicate(timestamp, event_id)
+        ]
+        fresh_timestamps = [timestamps[index] for index in fresh]
+        fresh_event_ids = [event_ids[index] for index in fresh]
+        fresh_keys = [keys[index] for index in fresh]
+        
+        fresh_mask = None
+        if np is not None and len(fresh) >= BATCH_VECTORIZE_THRESHOLD and self._algorithm is None:
+            fresh_mask = self._process_batch_vectorized(np.asarray(fresh_timestamps, dtype=np.int64), fresh_keys)
+        if fresh_mask is None:
+            process = self._process_unique_locked
+            fresh_mask = [
+                process(timestamp, event_id, key)
+                for timestamp, event_id, key in zip(fresh_timestamps, fresh_event_ids, fresh_keys)
+            ]
+        
+        if np is not None:
+            mask = np.zeros(len(keys), dtype=bool)
+            mask[fresh] = fresh_mask
+            return mask
+        mask = [False] * len(keys)
+        for index, processed in zip(fresh, fresh_mask):
+            mask[index] = processed
+        return mask
+    
+    def _process_dedup_locked(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Throttles an event whose ID was already seen, and otherwise applies
+        the throttling rule. Must be called with the lock held.
+        
+        Replaces _process_locked on throttlers created with a deduplicator.
+        """
+        if self._dedup.is_duplicate(timestamp, event_id):
             return False
+        return self._process_unique_locked(timestamp, event_id, key)
     
-    def update_window(self, new_window: int) -> None:
+    def _process_locked(self, timestamp: int, event_id: str, key: str) -> bool:
         """
-        Updates the throttling window size dynamically.
+        Applies the throttling rule to one event. Must be called with the lock held.
         
         Args:
-            new_window: The new throttling window size in seconds.
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (only used for logging).
+            key: Unique identifier for the user/session.
+            
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        timestamps = self._last_processed_timestamps
+        
+        # Check if we've seen this key before
+        last_timestamp = timestamps.get(key)
+        if last_timestamp is None and self._snapshot is not None:
+            last_timestamp = self._take_from_snapshot(key)
+        if last_timestamp is None and self._cold_store is not None:
+            last_timestamp = self._take_from_cold_store(key)
+        if last_timestamp is None:
+            # First time seeing this key, so process it
+            if len(timestamps) >= self._max_keys:
+                self._evict_oldest()
+            timestamps[key] = timestamp
+            self._new_key_count += 1
+            self._advance(timestamp)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing new key: %s, event: %s, timestamp: %s", key, event_id, timestamp)
+            return True
+        
+        time_diff = timestamp - last_timestamp
+        window = self._window if self._policy is None else self._window_for(key)
+        
+        # If the time difference is greater than the window, process the event
+        if time_diff >= window:
+            timestamps[key] = timestamp
+            timestamps.move_to_end(key)
+            self._advance(timestamp)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing after window: %s, event: %s, time since last: %ss",
+                             key, event_id, time_diff)
+            return True
+        
+        # Otherwise, throttle the event
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_throttled(key, event_id, time_diff, window)
+        return False
+    
+    def _window_for(self, key: str) -> int:
+        """
+        Returns a key's window, resolving it through the policy on first use.
+        
+        Must be called with the lock held, while a policy is set.
+        
+        Args:
+            key: Unique identifier for the user/session.
+            
+        Returns:
+            int: The key's window in seconds.
+        """
+        window = self._key_windows.get(key)
+        if window is None:
+            window = self._policy.resolve(key)
+            if window is None:
+                window = self._window
+            self._key_windows[key] = window
+        return window
+    
+    def _get_longest_window(self, window: int, policy: Optional[WindowPolicy]) -> int:
+        """
+        Returns the longest window any key can have with a default window and policy.
+        """
+        if policy is None or policy.max_window is None:
+            return window
+        return max(window, policy.max_window)
+    
+    def _process_algorithm_locked(self, timestamp: int, event_id: str, key: str) -> bool:
+        """
+        Applies the rate-limiting algorithm to one event. Must be called with the lock held.
+        
+        Replaces _process_locked on throttlers created with an algorithm.
+        
+        Args:
+            timestamp: Time (in seconds) the event arrived.
+            event_id: Unique event ID (only used for logging).
+            key: Unique identifier for the user/session.
+            
+        Returns:
+            bool: True if the event should be processed, False otherwise.
+        """
+        states = self._last_processed_timestamps
+        window = self._window if self._policy is None else self._window_for(key)
+        
+        state = states.get(key)
+        if state is None:
+            # First time seeing this key, so process it
+            if len(states) >= self._max_keys:
+                self._evict_oldest()
+            states[key] = self._algorithm.start(timestamp, window)
+            self._new_key_count += 1
+            self._advance(timestamp)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing new key: %s, event: %s, timestamp: %s", key, event_id, timestamp)
+            return True
+        
+        state = self._algorithm.admit(state, timestamp, window)
+        if state is not None:
+            states[key] = state
+            states.move_to_end(key)
+            self._advance(timestamp)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processing within limit: %s, event: %s, timestamp: %s", key, event_id, timestamp)
+            return True
+        
+        if logger.isEnabledFor(logging.DEBUG) and self._sample_throttled_log(key):
+            logger.debug("Throttling: %s, event: %s, over the limit of %r (window: %ss, 1 in %d logged)",
+                         key, event_id, self._algorithm, window, self._log_sample_rate)
+        return False
+    
+    def _sample_throttled_log(self, key: str) -> bool:
+        """
+        Returns whether to log a throttled event, 1 in log_sample_rate per key.
+        
+        Must be called with the lock held.
+        
+        Args:
+            key: Unique identifier for the user/session.
+        """
+        count = self._throttled_since_log.get(key, 0) + 1
+        if count < self._log_sample_rate:
+            self._throttled_since_log[key] = count
+            return False
+        
+        self._throttled_since_log.pop(key, None)
+        return True
+    
+    def _log_throttled(self, key: str, event_id: str, time_diff: int, window: int) -> None:
+        """
+        Logs a throttled event, sampling 1 in log_sample_rate events per key.
+        
+        Must be called with the lock held.
+        
+        Args:
+            key: Unique identifier for the user/session.
+            event_id: Unique event ID.
+            time_diff: Seconds since the key was last processed.
+            window: The key's window in seconds.
+        """
+        if not self._sample_throttled_log(key):
+            return
+        logger.debug("Throttling: %s, event: %s, time since last: %ss (window: %ss, 1 in %d logged)",
+                     key, event_id, time_diff, window, self._log_sample_rate)
+    
+    def _process_batch_vectorized(self, timestamps: "np.ndarray", keys: Sequence[str]) -> Optional["np.ndarray"]:
+        """
+        Decides a batch with NumPy. Must be called with the lock held.
+        
+        Events are grouped by key (keeping arrival order within each group).
+        The first event of every key is compared with the stored timestamp in
+        one vectorized step, and the remaining admissions of every key are
+        found together, one admission per round, by jumping with searchsorted
+        to the first event at least one window after the previous admission.
+        
+        Expiry and eviction are applied after the whole batch, which only gives
+        the same decisions as the sequential path when timestamps do not go
+        backwards and the batch does not push the throttler past max_keys. In
+        any other case nothing is modified and None is returned.
+        
+        Args:
+            timestamps: Event timestamps as an int64 array.
+            keys: Unique identifier for the user/session of each event.
+            
+        Returns:
+            The boolean mask, or None if the batch must be decided sequentially.
+        """
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            return None
+        if self._watermark is not None and timestamps[0] < self._watermark:
+            return None
+        
+        unique_keys = list(dict.fromkeys(keys))
+        key_index = dict(zip(unique_keys, range(len(unique_keys))))
+        key_ids = np.fromiter(map(key_index.__getitem__, keys), dtype=np.int64, count=len(keys))
+        stored = self._last_processed_timestamps
+        stored_timestamps = [stored.get(key) for key in unique_keys]
+        if len(stored) + stored_timestamps.count(None) > self._max_keys:
+            return None
+        if self._snapshot is not None:
+            stored_timestamps = [
+                self._take_from_snapshot(key) if ts is None else ts
+                for key, ts in zip(unique_keys, stored_timestamps)
+            ]
+        if self._cold_store is not None:
+            stored_timestamps = [
+                self._take_from_cold_store(key) if ts is None else ts
+                for key, ts in zip(unique_keys, stored_timestamps)
+            ]
+        
+        order = np.argsort(key_ids, kind="stable")
+        grouped_ids = key_ids[order]
+        grouped_timestamps = timestamps[order]
+        starts = np.flatnonzero(np.r_[True, grouped_ids[1:] != grouped_ids[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        group_keys = grouped_ids[starts]
+        if self._policy is None:
+            window = np.full(len(starts), self._window, dtype=np.int64)
+        else:
+            window = np.array([self._window_for(key) for key in unique_keys], dtype=np.int64)[group_keys]
+        
+        # First event of each key: compare with the stored timestamp, if any
+        is_new = np.array([ts is None for ts in stored_timestamps], dtype=bool)[group_keys]
+        last = np.array([0 if ts is None else ts for ts in stored_timestamps], dtype=np.int64)[group_keys]
+        first_timestamps = grouped_timestamps[starts]
+        first_admitted = is_new | (first_timestamps - last >= window)
+        
+        admitted = np.zeros(len(order), dtype=bool)
+        admitted[starts] = first_admitted
+        current = np.where(first_admitted, first_timestamps, last)
+        
+        # Later admissions of a key are the first events at least one window
+        # after the previous admission. Every key still scanning advances by
+        # one admission per round, using searchsorted on a combined
+        # (group, timestamp) index, which is sorted because groups are stored
+        # contiguously and timestamps never decrease.
+        base = int(timestamps[0])
+        span = int(timestamps[-1]) - base + max(int(window.max()), 0) + 1
+        if span * len(starts) >= 2 ** 62:
+            return None
+        # Counted only once the batch is certain not to fall back to the loop
+        self._new_key_count += int(is_new.sum())
+        group_offsets = np.arange(len(starts), dtype=np.int64) * span
+        combined = np.repeat(group_offsets, ends - starts) + (grouped_timestamps - base)
+        
+        active = np.flatnonzero((ends - starts > 1) & (grouped_timestamps[ends - 1] - current >= window))
+        positions = starts[active]
+        while len(active):
+            targets = group_offsets[active] + np.maximum(current[active] + window[active] - base, 0)
+            positions = np.maximum(np.searchsorted(combined, targets, side="left"), positions + 1)
+            found = positions < ends[active]
+            active = active[found]
+            positions = positions[found]
+            admitted[positions] = True
+            current[active] = grouped_timestamps[positions]
+        
+        # Write back the latest processed timestamp of every admitted key,
+        # oldest first so the expiry-ordered index stays in order
+        changed = np.flatnonzero(np.logical_or.reduceat(admitted, starts))
+        changed = changed[np.argsort(current[changed], kind="stable")]
+        for group, timestamp in zip(group_keys[changed].tolist(), current[changed].tolist()):
+            key = unique_keys[group]
+            stored[key] = timestamp
+            stored.move_to_end(key)
+        
+        processed_count = int(admitted.sum())
+        if processed_count:
+            self._advance(int(current[changed[-1]]), budget=processed_count * EXPIRY_BATCH_SIZE)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Batch of %d events: %d processed", len(order), processed_count)
+        
+        mask = np.empty(len(order), dtype=bool)
+        mask[order] = admitted
+        return mask
+    
+    def _advance(self, timestamp: int, budget: int = EXPIRY_BATCH_SIZE) -> None:
+        """
+        Moves the expiry clock forward and expires a bounded number of idle keys.
+        
+        Must be called with the lock held. Only the front of the expiry-ordered
+        index is inspected, so the cost per processed event is O(1).
+        
+        The clock is the latest timestamp processed, and the index follows
+        processing order. With timestamps that go backwards, a key can be
+        expired before an earlier event for it arrives, which is then
+        processed as the key's first event.
+        
+        Args:
+            timestamp: Timestamp of the event that was just processed.
+            budget: Maximum number of keys to expire.
+        """
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+        
+        timestamps = self._last_processed_timestamps
+        horizon = self._watermark - max(self._longest_window, self._cleanup_interval)
+        if self._snapshot is not None and self._snapshot.max_timestamp <= horizon:
+            # Every key left in the snapshot is idle, so it is no longer needed
+            self._expired_count += self._snapshot_pending
+            self._detach_snapshot()
+        for _ in range(budget):
+            if not timestamps:
+                break
+            oldest_key = next(iter(timestamps))
+            if timestamps[oldest_key] > horizon:
+                break
+            del timestamps[oldest_key]
+            if self._key_windows:
+                self._key_windows.pop(oldest_key, None)
+            if self._throttled_since_log:
+                self._throttled_since_log.pop(oldest_key, None)
+            self._expired_count += 1
+    
+    def _advance_algorithm(self, timestamp: int, budget: int = EXPIRY_BATCH_SIZE) -> None:
+        """
+        _advance for throttlers created with an algorithm, which it replaces.
+        
+        Must be called with the lock held. A key is expired once its state
+        has reset, and it has been idle for the cleanup interval counting
+        the window. Keys are ordered by their last processed event rather
+        than by reset time, so a key that resets early may wait behind one
+        that resets later.
+        
+        Args:
+            timestamp: Timestamp of the event that was just processed.
+            budget: Maximum number of keys to expire.
+        """
+        if self._watermark is None or timestamp > self._watermark:
+            self._watermark = timestamp
+        
+        states = self._last_processed_timestamps
+        reset_time = self._algorithm.reset_time
+        window = self._longest_window
+        horizon = self._watermark - max(self._cleanup_interval - window, 0)
+        for _ in range(budget):
+            if not states:
+                break
+            oldest_key = next(iter(states))
+            if reset_time(states[oldest_key], window) > horizon:
+                break
+            del states[oldest_key]
+            if self._key_windows:
+                self._key_windows.pop(oldest_key, None)
+            if self._throttled_since_log:
+                self._throttled_since_log.pop(oldest_key, None)
+            self._expired_count += 1
+    
+    def _take_from_snapshot(self, key: str) -> Optional[int]:
+        """
+        Moves a key from the lazily restored snapshot into memory.
+        
+        Must be called with the lock held, for a key that is not in memory.
+        Each snapshot entry is taken at most once; afterwards the in-memory
+        state is authoritative, even if the key is later expired.
+        
+        Args:
+            key: Unique identifier for the user/session.
+            
+        Returns:
+            The key's restored timestamp, or None if the snapshot does not have it.
+        """
+        index = self._snapshot.find(key)
+        if index < 0 or self._snapshot_taken[index]:
+            return None
+        
+        self._snapshot_taken[index] = 1
+        self._snapshot_pending -= 1
+        last_timestamp = self._snapshot.timestamp(index)
+        
+        timestamps = self._last_processed_timestamps
+        if len(timestamps) >= self._max_keys:
+            self._evict_oldest()
+        # Restored keys are older than anything processed since the restart
+        timestamps[key] = last_timestamp
+        timestamps.move_to_end(key, last=False)
+        return last_timestamp
+    
+    def _take_from_cold_store(self, key: str) -> Optional[int]:
+        """
+        Moves a key from the cold tier into memory.
+        
+        Must be called with the lock held, for a key that is not in memory.
+        The key is placed with the most recently processed keys, since an
+        event for it has just arrived.
+        
+        Args:
+            key: Unique identifier for the user/session.
+            
+        Returns:
+            The key's last processed timestamp, or None if the tier does not have it.
+        """
+        last_timestamp = self._cold_store.take(key)
+        if last_timestamp is None:
+            return None
+        
+        timestamps = self._last_processed_timestamps
+        if len(timestamps) >= self._max_keys:
+            self._evict_oldest()
+        timestamps[key] = last_timestamp
+        return last_timestamp
+    
+    def _get_horizon(self) -> Optional[int]:
+        """
+        Returns the timestamp at or before which a key is idle and may be
+        expired, or None before the first processed event.
+        """
+        if self._watermark is None:
+            return None
+        return self._watermark - max(self._longest_window, self._cleanup_interval)
+    
+    def _detach_snapshot(self) -> None:
+        """
+        Stops consulting the lazily restored snapshot. Must be called with the lock held.
+        
+        The view is not closed here because a background snapshot may still be
+        reading it; the file is unmapped once the last reference is dropped.
+        """
+        self._snapshot = None
+        self._snapshot_taken = None
+        self._snapshot_pending = 0
+    
+    def _evict_oldest(self) -> None:
+        """
+        Evicts the least recently processed key to stay within max_keys.
+        
+        With a cold store the key is spilled to it rather than dropped,
+        unless it is already idle.
+        
+        Must be called with the lock held.
+        """
+        evicted_key, last_timestamp = self._last_processed_timestamps.popitem(last=False)
+        if self._key_windows:
+            self._key_windows.pop(evicted_key, None)
+        if self._throttled_since_log:
+            self._throttled_since_log.pop(evicted_key, None)
+        if self._cold_store is not None:
+            horizon = self._get_horizon()
+            if horizon is not None and last_timestamp <= horizon:
+                self._expired_count += 1
+            else:
+                self._expired_count += self._cold_store.spill(evicted_key, last_timestamp, horizon)
+            return
+        self._evicted_count += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Evicted key %s (max keys: %d)", evicted_key, self._max_keys)
+    
+    def update_window(self, new_window: Optional[int] = None, policy: Optional[WindowPolicy] = None) -> None:
+        """
+        Updates the throttling window size and/or window policy dynamically.
+        
+        The lock is held only to swap references: cached per-key windows are
+        dropped in O(1) and re-resolved lazily as each key's events arrive,
+        so ingest is not paused however many keys are tracked.
+        
+        Args:
+            new_window: The new throttling window size in seconds, or None
+                to keep the current one.
+            policy: The new window policy, or None to keep the current one.
+                Pass an empty WindowPolicy() to remove it.
+        
+        Raises:
+            ValueError: If the rate-limiting algorithm cannot hold the new windows.
         """
         with self._lock:
-            old_window = self._window
-            self._window = new_window
+            old_window = self._update_window_locked(new_window, policy)
+        if new_window is not None:
             logger.info(f"Window updated from {old_window}s to {new_window}s")
+        if policy is not None:
+            logger.info("Window policy updated")
+    
+    def _update_window_locked(self, new_window: Optional[int], policy: Optional[WindowPolicy]) -> int:
+        """
+        Applies update_window. Must be called with the lock held.
+        
+        Returns:
+            int: The previous window size in seconds.
+        """
+        old_window = self._window
+        window = old_window if new_window is None else new_window
+        if policy is None:
+            policy = self._policy
+        elif policy.is_empty():
+            policy = None
+        longest_window = self._get_longest_window(window, policy)
+        if self._algorithm is not None:
+            # Refuse windows the algorithm cannot hold before changing anything
+            self._algorithm.check_window(longest_window)
+        self._window = window
+        self._policy = policy
+        self._key_windows = {}
+        self._longest_window = longest_window
+        return old_window
     
-    def get_window(self) -> int:
+    def get_window(self, key: Optional[str] = None) -> int:
         """
         Returns the current throttling window size.
         
+        Args:
+            key: If given, return this key's window under the policy instead.
+        
         Returns:
             int: The current window size in seconds.
         """
         with self._lock:
-            return self._window
+            if key is None or self._policy is None:
+                return self._window
+            # Keys that are not tracked are resolved without caching them
+            window = self._key_windows.get(key)
+            if window is None:
+                window = self._policy.resolve(key)
+            return self._window if window is None else window
     
     def clear(self) -> None:
         """
         Clears all stored timestamps, effectively resetting the throttler.
         """
         with self._lock:
-            self._last_processed_timestamps.clear()
+            self._clear_locked()
             logger.info("EventThrottler has been cleared")
     
+    def _clear_locked(self) -> None:
+        """
+        Drops all per-key state. Must be called with the lock held.
+        """
+        self._last_processed_timestamps.clear()
+        self._key_windows.clear()
+        self._throttled_since_log.clear()
+        self._detach_snapshot()
+        if self._cold_store is not None:
+            self._cold_store.clear()
+        if self._dedup is not None:
+            self._dedup.clear()
+        self._watermark = None
+    
     def get_key_count(self) -> int:
         """
         Returns the number of keys currently being tracked.
         
         Returns:
-            int: Number of keys in the throttler.
+            int: Number of keys in the throttler, including the cold tier.
+        """
+        with self._lock:
+            return self._get_key_count_locked()
+    
+    def _get_key_count_locked(self) -> int:
+        """
+        Returns the number of tracked keys. Must be called with the lock held.
+        """
+        count = len(self._last_processed_timestamps) + self._snapshot_pending
+        if self._cold_store is not None:
+            count += self._cold_store.count()
+        return count
+    
+    def get_eviction_stats(self) -> Dict[str, int]:
+        """
+        Returns counters describing how many keys have been dropped.
+        
+        Returns:
+            Dict[str, int]: Number of tracked keys, keys expired after being
+            idle, and keys evicted because max_keys was reached (keys
+            spilled to a cold store are not evicted).
+        """
+        with self._lock:
+            return {
+                "tracked_keys": self._get_key_count_locked(),
+                "expired_keys": self._expired_count,
+                "evicted_keys": self._evicted_count,
+            }
+    
+    def export_keys(self, predicate: Callable[[str], bool], remove: bool = True) -> List[Tuple[str, int]]:
+        """
+        Removes the keys matching predicate and returns their state, so
+        they can be handed off to another throttler with import_keys.
+        
+        Keys still in a lazily restored snapshot or in the cold tier are included.
+        The predicate runs without holding the lock, so a slow predicate does
+        not hold up decisions; keys first tracked while it runs are kept.
+        
+        Args:
+            predicate: Called with each tracked key; True exports it.
+            remove: False returns copies and keeps the keys, so they can be
+                removed once the receiving throttler has imported them.
+            
+        Returns:
+            List[Tuple[str, int]]: (key, state) pairs; the state is the last
+            processed timestamp, or the algorithm state.
+        """
+        with self._lock:
+            candidates = list(self._last_processed_timestamps)
+            if self._snapshot is not None:
+                taken = self._snapshot_taken
+                candidates.extend(
+                    key for index, (key, _) in enumerate(self._snapshot.items()) if not taken[index]
+                )
+            if self._cold_store is not None:
+                candidates.extend(key for key, _ in self._cold_store.items())
+        selected = {key for key in candidates if predicate(key)}
+        predicate = selected.__contains__
+        
+        with self._lock:
+            exported = []
+            if self._snapshot is not None:
+                taken = self._snapshot_taken
+                for index, (key, timestamp) in enumerate(self._snapshot.items()):
+                    if not taken[index] and predicate(key):
+                        if remove:
+                            taken[index] = 1
+                            self._snapshot_pending -= 1
+                        exported.append((key, timestamp))
+            if self._cold_store is not None:
+                if remove:
+                    exported.extend(self._cold_store.export(predicate))
+                else:
+                    exported.extend(item for item in self._cold_store.items() if predicate(item[0]))
+            
+            states = self._last_processed_timestamps
+            if not remove:
+                exported.extend((key, state) for key, state in states.items() if predicate(key))
+                return exported
+            for key in [key for key in states if predicate(key)]:
+                exported.append((key, states.pop(key)))
+                self._key_windows.pop(key, None)
+                self._throttled_since_log.pop(key, None)
+        logger.info(f"Exported {len(exported)} keys")
+        return exported
+    
+    def import_keys(self, items: Iterable[Tuple[str, int]]) -> int:
+        """
+        Adds keys exported by export_keys of a throttler with the same settings.
+        
+        A key that is already tracked keeps the later of the two states.
+        Imported keys are placed after the keys already tracked, so they are
+        never expired or evicted ahead of them.
+        
+        Args:
+            items: (key, state) pairs.
+            
+        Returns:
+            int: Number of keys imported.
+        """
+        with self._lock:
+            states = self._last_processed_timestamps
+            count = 0
+            # Oldest first, keeping the expiry order among imported keys
+            for key, state in sorted(items, key=lambda item: item[1]):
+                existing = states.get(key)
+                if existing is None and self._snapshot is not None:
+                    existing = self._take_from_snapshot(key)
+                if existing is None and self._cold_store is not None:
+                    existing = self._take_from_cold_store(key)
+                if existing is None:
+                    if len(states) >= self._max_keys:
+                        self._evict_oldest()
+                    states[key] = state
+                elif state > existing:
+                    states[key] = state
+                    states.move_to_end(key)
+                count += 1
+        logger.info(f"Imported {count} keys")
+        return count
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Returns the throttler's metrics.
+        
+        Returns:
+            Dict[str, Any]: tracked_keys, expired_keys, evicted_keys and
+            new_keys, plus the fields of ThrottlerMetrics.collect.
+            
+        Raises:
+            RuntimeError: If the throttler was created without metrics.
+        """
+        if self._metrics is None:
+            raise RuntimeError("EventThrottler was created without metrics")
+        with self._lock:
+            stats = {
+                "tracked_keys": self._get_key_count_locked(),
+                "expired_keys": self._expired_count,
+                "evicted_keys": self._evicted_count,
+                "new_keys": self._new_key_count,
+            }
+        stats.update(self._metrics.collect(stats["new_keys"]))
+        return stats
+    
+    def snapshot(self, path: str) -> int:
+        """
+        Writes the throttler state to a binary snapshot file.
+        
+        The lock is only held while the in-memory state is copied; sorting,
+        encoding and writing the file happen without it.
+        
+        Args:
+            path: Destination file path.
+            
+        Returns:
+            int: Number of keys written.
+            
+        Raises:
+            ValueError: If the throttler uses a rate-limiting algorithm,
+                whose states are not timestamps.
         """
+        if self._algorithm is not None:
+            raise ValueError("Snapshots are only supported without a rate-limiting algorithm")
         with self._lock:
-            return len(self._last_processed_timestamps)
\ No newline at end of file
+            items = list(self._last_processed_timestamps.items())
+            if self._cold_store is not None:
+                items.extend(self._cold_store.items())
+            window = self._window
+            watermark = self._watermark
+            restored = self._snapshot
+            taken = bytes(self._snapshot_taken) if restored is not None else None
+        
+        if restored is not None:
+            # Keys never taken from the restored snapshot are not in memory
+            items.extend(
+                item for index, item in enumerate(restored.items()) if not taken[index]
+            )
+        
+        count = write_snapshot(path, items, window, watermark)
+        logger.info(f"Snapshot of {count} keys written to {path}")
+        return count
+    
+    @classmethod
+    def restore(cls, path: str, lazy: bool = True, **kwargs: Any) -> "EventThrottler":
+        """
+        Creates an EventThrottler from a snapshot file.
+        
+        With lazy=True the file stays memory-mapped and a key is only loaded
+        the first time an event for it arrives, so startup time does not
+        depend on the number of keys. Once every restored key has gone idle,
+        the file is released. Restored keys count towards get_key_count but
+        are only subject to max_keys once they have been loaded. With
+        lazy=False, keys beyond max_keys are spilled to the cold store, if
+        one is given, instead of being dropped.
+        
+        Args:
+            path: Snapshot file path.
+            lazy: Whether to load keys on demand rather than up front.
+            **kwargs: EventThrottler arguments; the window defaults to the
+                window stored in the snapshot.
+            
+        Returns:
+            EventThrottler: The restored throttler.
+            
+        Raises:
+            SnapshotError: If the file is not a valid snapshot.
+            ValueError: If a rate-limiting algorithm is given.
+        """
+        if kwargs.get("algorithm") is not None:
+            raise ValueError("Snapshots are only supported without a rate-limiting algorithm")
+        view = SnapshotView(path)
+        kwargs.setdefault("window", view.window)
+        throttler = cls(**kwargs)
+        
+        with throttler._lock:
+            throttler._watermark = view.watermark
+            if lazy and view.count:
+                throttler._snapshot = view
+                throttler._snapshot_taken = bytearray(view.count)
+                throttler._snapshot_pending = view.count
+            else:
+                # Oldest first, keeping only the newest max_keys keys in memory
+                items = sorted(view.items(), key=lambda item: item[1])
+                if throttler._cold_store is not None:
+                    horizon = throttler._get_horizon()
+                    for key, timestamp in items[:-throttler._max_keys]:
+                        throttler._cold_store.spill(key, timestamp, horizon)
+                throttler._last_processed_timestamps.update(items[-throttler._max_keys:])
+                view.close()
+        
+        logger.info(f"Restored {view.count} keys from {path}{' lazily' if lazy else ''}")
+        return throttler
+    
+    def start_periodic_snapshot(self, path: str, interval: float = SNAPSHOT_INTERVAL) -> None:
+        """
+        Starts a background thread that writes a snapshot every interval seconds.
+        
+        Args:
+            path: Destination file path.
+            interval: Seconds between snapshots (default from config).
+        """
+        if self._algorithm is not None:
+            raise ValueError("Snapshots are only supported without a rate-limiting algorithm")
+        if self._snapshot_thread is not None:
+            raise RuntimeError("Periodic snapshots are already running")
+        
+        stop = threading.Event()
+        
+        def run() -> None:
+            while not stop.wait(interval):
+                try:
+                    self.snapshot(path)
+                except Exception:
+                    logger.exception(f"Periodic snapshot to {path} failed")
+        
+        self._snapshot_stop = stop
+        self._snapshot_thread = threading.Thread(target=run, name="event-throttler-snapshot", daemon=True)
+        self._snapshot_thread.start()
+        logger.info(f"Periodic snapshots to {path} every {interval}s started")
+    
+    def stop_periodic_snapshot(self) -> None:
+        """
+        Stops the background snapshot thread, waiting for a write in progress.
+        """
+        if self._snapshot_thread is None:
+            return
+        self._snapshot_stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+        self._snapshot_stop = None
+        logger.info("Periodic snapshots stopped")